@@ -1,7 +1,20 @@
+import os
+
 from fastapi import FastAPI
 
 app = FastAPI(title="DOGMA ML Engine")
 
+@app.on_event("startup")
+def warm_up_models():
+    """Carga los modelos YOLO al arrancar para que la primera petición no pague la carga"""
+    if os.getenv("DUMMY_MODE", "true").lower() == "true" or os.getenv("YOLO_WARMUP", "true").lower() != "true":
+        return
+    try:
+        from ml_engine.vision.model_registry import get_model_registry
+        get_model_registry().warm_up()
+    except ImportError as e:
+        print(f"⚠️ Warm-up YOLO no disponible: {e}")
+
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "ml-engine"}
@@ -1,90 +1,503 @@
 import sqlite3
 import os
-from typing import Dict, List
+import queue
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+
+
+# Sentencias SQL constantes: sqlite3 cachea las sentencias preparadas por
+# conexión usando el texto SQL como clave, así que reutilizar siempre las
+# mismas cadenas evita volver a compilarlas en cada llamada.
+_SQL_CREATE_CAMPAIGNS = """
+    CREATE TABLE IF NOT EXISTS campaigns (
+        id TEXT PRIMARY KEY,
+        artist TEXT,
+        track TEXT,
+        genre TEXT,
+        status TEXT,
+        created_at TEXT
+    )
+"""
+# Todas incluyen implícitamente el rowid, que es la clave de paginación:
+# "WHERE status = ? AND rowid < ? ORDER BY rowid DESC" se resuelve con el índice.
+_SQL_CREATE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_campaigns_status ON campaigns (status)",
+    "CREATE INDEX IF NOT EXISTS idx_campaigns_artist ON campaigns (artist)",
+    "CREATE INDEX IF NOT EXISTS idx_campaigns_created_at ON campaigns (created_at)",
+)
+# ON CONFLICT DO UPDATE (no INSERT OR REPLACE): la fila se actualiza en su
+# sitio y conserva el rowid, que es la clave de paginación
+_SQL_UPSERT_CAMPAIGN = (
+    "INSERT INTO campaigns (id, artist, track, genre, status, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (id) DO UPDATE SET artist = excluded.artist, track = excluded.track, "
+    "genre = excluded.genre, status = excluded.status, created_at = excluded.created_at"
+)
+_SQL_GET_CAMPAIGN = "SELECT * FROM campaigns WHERE id = ?"
+_SQL_ALL_CAMPAIGNS = "SELECT * FROM campaigns"
+_SQL_UPDATE_STATUS = "UPDATE campaigns SET status = ? WHERE id = ?"
+
+# --- Estadísticas materializadas ---
+# campaign_stats guarda un contador por (dimensión, clave) que mantienen los
+# triggers de campaigns dentro de la misma transacción que la escritura, así
+# que leer las estadísticas es una búsqueda por clave primaria, no un COUNT(*).
+_STATS_DIMENSIONS = {
+    "total": "''",
+    "status": "COALESCE({row}.status, '')",
+    "genre": "COALESCE({row}.genre, '')",
+    "artist": "COALESCE({row}.artist, '')",
+    # Cubo horario ISO "YYYY-MM-DDTHH" a partir de created_at
+    "created_hour": "COALESCE(substr({row}.created_at, 1, 13), '')",
+}
+_STATS_SOURCE_COLUMNS = {"status": "status", "genre": "genre", "artist": "artist", "created_hour": "created_at"}
+
+
+def _stats_delta(dimension: str, row: str, delta: int) -> str:
+    key = _STATS_DIMENSIONS[dimension].format(row=row)
+    return (
+        f"INSERT INTO campaign_stats (dimension, key, count) VALUES ('{dimension}', {key}, {delta}) "
+        "ON CONFLICT (dimension, key) DO UPDATE SET count = count + excluded.count;"
+    )
+
+
+def _stats_schema() -> str:
+    parts = [
+        """
+        CREATE TABLE IF NOT EXISTS campaign_stats (
+            dimension TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, key)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_campaign_stats_count ON campaign_stats (dimension, count);
+        """,
+        "CREATE TRIGGER IF NOT EXISTS trg_campaigns_stats_insert AFTER INSERT ON campaigns BEGIN "
+        + " ".join(_stats_delta(d, "NEW", 1) for d in _STATS_DIMENSIONS)
+        + " END;",
+        "CREATE TRIGGER IF NOT EXISTS trg_campaigns_stats_delete AFTER DELETE ON campaigns BEGIN "
+        + " ".join(_stats_delta(d, "OLD", -1) for d in _STATS_DIMENSIONS)
+        + " END;",
+    ]
+    for dimension, column in _STATS_SOURCE_COLUMNS.items():
+        parts.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_campaigns_stats_update_{dimension} "
+            f"AFTER UPDATE OF {column} ON campaigns WHEN OLD.{column} IS NOT NEW.{column} BEGIN "
+            f"{_stats_delta(dimension, 'OLD', -1)} {_stats_delta(dimension, 'NEW', 1)} END;"
+        )
+    # Transiciones de estado por hora de reloj: no se pueden recalcular a posteriori
+    parts.append(
+        "CREATE TRIGGER IF NOT EXISTS trg_campaigns_stats_transition "
+        "AFTER UPDATE OF status ON campaigns WHEN OLD.status IS NOT NEW.status BEGIN "
+        "INSERT INTO campaign_stats (dimension, key, count) "
+        "SELECT 'transition_hour', strftime('%Y-%m-%dT%H', 'now'), 1 WHERE 1 "
+        "ON CONFLICT (dimension, key) DO UPDATE SET count = count + 1; END;"
+    )
+    return "\n".join(parts)
+
+
+def _stats_rebuild() -> str:
+    parts = ["DELETE FROM campaign_stats WHERE dimension != 'transition_hour';"]
+    for dimension, expr in _STATS_DIMENSIONS.items():
+        key = expr.format(row="campaigns")
+        parts.append(
+            f"INSERT INTO campaign_stats (dimension, key, count) "
+            f"SELECT '{dimension}', {key}, COUNT(*) FROM campaigns GROUP BY {key};"
+        )
+    # Con la tabla vacía el GROUP BY '' no devuelve filas: el total debe existir
+    parts.append("INSERT OR IGNORE INTO campaign_stats (dimension, key, count) VALUES ('total', '', 0);")
+    return "\n".join(parts)
+
+
+_SQL_STATS_SCHEMA = _stats_schema()
+_SQL_STATS_REBUILD = _stats_rebuild()
+_SQL_STATS_COUNT = "SELECT count FROM campaign_stats WHERE dimension = ? AND key = ?"
+_SQL_STATS_DIMENSION = "SELECT key, count FROM campaign_stats WHERE dimension = ? AND count > 0"
+_SQL_STATS_TOP = (
+    "SELECT key, count FROM campaign_stats WHERE dimension = ? AND count > 0 "
+    "ORDER BY count DESC LIMIT ?"
+)
+_SQL_STATS_RECENT = (
+    "SELECT key, count FROM campaign_stats WHERE dimension = ? AND count > 0 "
+    "ORDER BY key DESC LIMIT ?"
+)
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024  # 256 MiB
+DEFAULT_CACHE_SIZE_KIB = 16 * 1024  # 16 MiB de page cache por conexión
+DEFAULT_STATEMENT_CACHE = 128
+# Filas por executemany; también acota los parámetros de los IN (...) por lote
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _campaign_query(
+    status: Optional[str] = None,
+    artist: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    before_rowid: Optional[int] = None,
+) -> tuple:
+    """Construye el SELECT paginado por rowid (más recientes primero)."""
+    clauses, params = [], []
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(status)
+    if artist is not None:
+        clauses.append("artist = ?")
+        params.append(artist)
+    if created_from is not None:
+        clauses.append("created_at >= ?")
+        params.append(created_from)
+    if created_to is not None:
+        clauses.append("created_at < ?")
+        params.append(created_to)
+    if before_rowid is not None:
+        clauses.append("rowid < ?")
+        params.append(before_rowid)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT rowid AS _rowid, * FROM campaigns{where} ORDER BY rowid DESC", params
+
+
+def _campaign_row(campaign: Dict) -> tuple:
+    return (
+        campaign.get("id"),
+        campaign.get("artist"),
+        campaign.get("track"),
+        campaign.get("genre"),
+        campaign.get("status"),
+        campaign.get("created_at"),
+    )
+
+
+class ConnectionPool:
+    """Pool thread-safe de conexiones SQLite en modo WAL.
+
+    Las conexiones se crean bajo demanda hasta ``max_size`` y se devuelven al
+    pool al salir de ``connection()``. Con WAL los lectores no bloquean al
+    escritor, y ``busy_timeout`` hace que los escritores concurrentes esperen
+    en lugar de fallar con ``database is locked``.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = DEFAULT_POOL_SIZE,
+        busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+        mmap_size: int = DEFAULT_MMAP_SIZE,
+        cache_size_kib: int = DEFAULT_CACHE_SIZE_KIB,
+        statement_cache: int = DEFAULT_STATEMENT_CACHE,
+    ):
+        self.db_path = db_path
+        # Una base ":memory:" es distinta por conexión: solo puede compartirse una
+        self.max_size = 1 if db_path == ":memory:" else max(1, max_size)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.statement_cache = statement_cache
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            check_same_thread=False,
+            cached_statements=self.statement_cache,
+        )
+        conn.row_factory = sqlite3.Row
+        cur = conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        cur.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        # Valor negativo = tamaño en KiB en lugar de número de páginas
+        cur.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        # Si algún cliente usa INSERT OR REPLACE, sus borrados implícitos solo
+        # disparan los triggers de contadores con esto activo
+        cur.execute("PRAGMA recursive_triggers=ON")
+        cur.close()
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("ConnectionPool cerrado")
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Presta una conexión del pool durante el bloque ``with``."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """Como ``connection()`` pero con commit al salir y rollback si hay error.
+
+        Con ``immediate=True`` se toma el lock de escritura al empezar
+        (``BEGIN IMMEDIATE``), útil para transacciones largas de varias
+        sentencias que no deben fallar a mitad por contención.
+        """
+        with self.connection() as conn:
+            try:
+                if immediate:
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close(self) -> None:
+        """Cierra las conexiones libres; las prestadas se cierran al devolverse."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
 
 
 class DatabaseManager:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, pool_size: int = DEFAULT_POOL_SIZE):
         self.db_path = db_path
+        self._pool = ConnectionPool(db_path, max_size=pool_size)
         self._ensure_db()
 
     def _ensure_db(self):
         dirpath = os.path.dirname(self.db_path)
         if dirpath:
             os.makedirs(dirpath, exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS campaigns (
-                id TEXT PRIMARY KEY,
-                artist TEXT,
-                track TEXT,
-                genre TEXT,
-                status TEXT,
-                created_at TEXT
-            )
-            """
-        )
-        conn.commit()
-        conn.close()
+        with self._pool.transaction() as conn:
+            conn.execute(_SQL_CREATE_CAMPAIGNS)
+            for sql in _SQL_CREATE_INDEXES:
+                conn.execute(sql)
+        with self._pool.connection() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'campaign_stats'"
+            ).fetchone()
+            if not exists:
+                # Tabla y triggers se crean y se rellenan con los datos ya
+                # existentes en una misma transacción
+                conn.executescript(f"BEGIN IMMEDIATE; {_SQL_STATS_SCHEMA}\n{_SQL_STATS_REBUILD}\nCOMMIT;")
+
+    def rebuild_stats(self) -> None:
+        """Recalcula los contadores desde cero (salvo las transiciones por hora)."""
+        with self._pool.connection() as conn:
+            conn.executescript(f"BEGIN IMMEDIATE; {_SQL_STATS_REBUILD}\nCOMMIT;")
+
+    def close(self):
+        self._pool.close()
 
     def save_campaign(self, campaign: Dict) -> bool:
         try:
-            conn = sqlite3.connect(self.db_path)
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT OR REPLACE INTO campaigns (id, artist, track, genre, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-                (
-                    campaign.get("id"),
-                    campaign.get("artist"),
-                    campaign.get("track"),
-                    campaign.get("genre"),
-                    campaign.get("status"),
-                    campaign.get("created_at"),
-                ),
-            )
-            conn.commit()
-            conn.close()
+            with self._pool.transaction() as conn:
+                conn.execute(_SQL_UPSERT_CAMPAIGN, _campaign_row(campaign))
             return True
         except Exception:
             return False
 
+    def save_campaigns(self, campaigns: Iterable[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[bool]:
+        """Inserta/actualiza muchas campañas en una sola transacción.
+
+        Las filas se envían con ``executemany`` en lotes de ``chunk_size``.
+        Devuelve un booleano por campaña, en el mismo orden de entrada.
+        """
+        results: List[bool] = []
+        with self._pool.transaction(immediate=True) as conn:
+            for chunk in _chunked(campaigns, chunk_size):
+                rows, row_ok = [], []
+                for campaign in chunk:
+                    try:
+                        rows.append(_campaign_row(campaign))
+                        row_ok.append(True)
+                    except AttributeError:
+                        row_ok.append(False)
+                inserted = iter(self._executemany_chunk(conn, _SQL_UPSERT_CAMPAIGN, rows))
+                results.extend(next(inserted) if ok else False for ok in row_ok)
+        return results
+
     def get_campaign(self, campaign_id: str) -> Dict:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM campaigns WHERE id = ?", (campaign_id,))
-        row = cur.fetchone()
-        conn.close()
+        with self._pool.connection() as conn:
+            row = conn.execute(_SQL_GET_CAMPAIGN, (campaign_id,)).fetchone()
         if row:
             return dict(row)
         return None
 
     def get_all_campaigns(self) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM campaigns")
-        rows = cur.fetchall()
-        conn.close()
+        with self._pool.connection() as conn:
+            rows = conn.execute(_SQL_ALL_CAMPAIGNS).fetchall()
         return [dict(r) for r in rows]
 
+    def iter_campaigns(
+        self,
+        status: Optional[str] = None,
+        artist: Optional[str] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+        batch_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[Dict]:
+        """Recorre las campañas filtradas sin materializar la tabla entera.
+
+        Las filas se leen en páginas de ``batch_size`` por rowid (keyset);
+        la conexión se devuelve al pool antes de entregar cada página, así
+        que un consumidor lento no retiene conexiones del pool.
+        ``created_from`` es inclusivo y ``created_to`` exclusivo.
+        """
+        before_rowid = None
+        while True:
+            sql, params = _campaign_query(status, artist, created_from, created_to, before_rowid)
+            with self._pool.connection() as conn:
+                rows = conn.execute(f"{sql} LIMIT ?", (*params, batch_size)).fetchall()
+            if not rows:
+                return
+            before_rowid = rows[-1]["_rowid"]
+            for row in rows:
+                campaign = dict(row)
+                del campaign["_rowid"]
+                yield campaign
+
+    def get_campaigns_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        artist: Optional[str] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+    ) -> Dict:
+        """Devuelve una página de campañas con paginación por cursor (keyset).
+
+        El resultado es ``{"campaigns": [...], "next_cursor": str | None}``;
+        pasar ``next_cursor`` en la siguiente llamada continúa donde terminó
+        esta. El coste no depende del número de páginas anteriores.
+        """
+        before_rowid = int(cursor) if cursor else None
+        sql, params = _campaign_query(status, artist, created_from, created_to, before_rowid)
+        with self._pool.connection() as conn:
+            rows = conn.execute(f"{sql} LIMIT ?", (*params, limit + 1)).fetchall()
+        next_cursor = str(rows[limit - 1]["_rowid"]) if len(rows) > limit else None
+        campaigns = []
+        for row in rows[:limit]:
+            campaign = dict(row)
+            del campaign["_rowid"]
+            campaigns.append(campaign)
+        return {"campaigns": campaigns, "next_cursor": next_cursor}
+
     def update_campaign_status(self, campaign_id: str, new_status: str) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("UPDATE campaigns SET status = ? WHERE id = ?", (new_status, campaign_id))
-        updated = cur.rowcount
-        conn.commit()
-        conn.close()
+        with self._pool.transaction() as conn:
+            updated = conn.execute(_SQL_UPDATE_STATUS, (new_status, campaign_id)).rowcount
         return updated > 0
 
+    def update_statuses(self, statuses: Mapping[str, str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, bool]:
+        """Aplica varias transiciones de estado en una sola transacción.
+
+        Devuelve ``{campaign_id: bool}``; ``False`` si la campaña no existe o
+        la actualización falló.
+        """
+        results: Dict[str, bool] = {}
+        with self._pool.transaction(immediate=True) as conn:
+            for chunk in _chunked(statuses.items(), chunk_size):
+                ids = [campaign_id for campaign_id, _ in chunk]
+                placeholders = ",".join("?" * len(ids))
+                existing = {
+                    row[0]
+                    for row in conn.execute(f"SELECT id FROM campaigns WHERE id IN ({placeholders})", ids)
+                }
+                rows = [(status, campaign_id) for campaign_id, status in chunk if campaign_id in existing]
+                updated = iter(self._executemany_chunk(conn, _SQL_UPDATE_STATUS, rows))
+                for campaign_id, _ in chunk:
+                    results[campaign_id] = campaign_id in existing and next(updated)
+        return results
+
+    @staticmethod
+    def _executemany_chunk(conn: sqlite3.Connection, sql: str, rows: List[tuple]) -> List[bool]:
+        """Ejecuta un lote con ``executemany`` dentro de un savepoint.
+
+        Si el lote falla se deshace y se reintenta fila a fila para saber
+        exactamente qué filas son inválidas, sin abortar la transacción.
+        """
+        if not rows:
+            return []
+        conn.execute("SAVEPOINT bulk_chunk")
+        try:
+            conn.executemany(sql, rows)
+            conn.execute("RELEASE SAVEPOINT bulk_chunk")
+            return [True] * len(rows)
+        except sqlite3.Error:
+            conn.execute("ROLLBACK TO SAVEPOINT bulk_chunk")
+        results = []
+        for row in rows:
+            try:
+                conn.execute(sql, row)
+                results.append(True)
+            except sqlite3.Error:
+                results.append(False)
+        conn.execute("RELEASE SAVEPOINT bulk_chunk")
+        return results
+
     def get_stats(self) -> Dict:
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM campaigns")
-        total = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM campaigns WHERE status = 'active' OR status = 'ACTIVE'")
-        active = cur.fetchone()[0]
-        conn.close()
-        return {"total_campaigns": int(total), "active_campaigns": int(active)}
+        """Totales leídos de los contadores materializados (no escanea campaigns)."""
+        with self._pool.connection() as conn:
+            total = conn.execute(_SQL_STATS_COUNT, ("total", "")).fetchone()
+            by_status = dict(conn.execute(_SQL_STATS_DIMENSION, ("status",)).fetchall())
+        active = by_status.get("active", 0) + by_status.get("ACTIVE", 0)
+        return {
+            "total_campaigns": int(total[0]) if total else 0,
+            "active_campaigns": int(active),
+            "campaigns_by_status": by_status,
+        }
+
+    def get_detailed_stats(self, top_n: int = 20, hours: int = 24) -> Dict:
+        """Estadísticas por estado, género, artista (top N) y throughput por hora.
+
+        Los cubos horarios se devuelven ordenados del más antiguo al más
+        reciente; ``created_per_hour`` agrupa por ``created_at`` y
+        ``transitions_per_hour`` cuenta cambios de estado por hora de reloj.
+        """
+        with self._pool.connection() as conn:
+            stats = {
+                "by_status": dict(conn.execute(_SQL_STATS_DIMENSION, ("status",)).fetchall()),
+                "by_genre": dict(conn.execute(_SQL_STATS_DIMENSION, ("genre",)).fetchall()),
+                "top_artists": dict(conn.execute(_SQL_STATS_TOP, ("artist", top_n)).fetchall()),
+                "created_per_hour": dict(reversed(
+                    conn.execute(_SQL_STATS_RECENT, ("created_hour", hours)).fetchall()
+                )),
+                "transitions_per_hour": dict(reversed(
+                    conn.execute(_SQL_STATS_RECENT, ("transition_hour", hours)).fetchall()
+                )),
+            }
+        stats.update(self.get_stats())
+        return stats
@@ -347,13 +347,20 @@ class LongcatUploadRequest(BaseModel):
 def longcat_upload(req: LongcatUploadRequest):
     """
     Recibe un vídeo largo (longcat), lo analiza con Ultralytics y deja preparado el punto para integración con Runway.
+    El análisis queda en la caché de análisis: re-subir el mismo vídeo no lo vuelve a procesar.
     """
-    # Dummy response
+    yolo_analysis = "dummy_result"
+    if os.path.isfile(req.video_file_path):
+        try:
+            from ml_engine.vision.yolo_analyzer import get_yolo_analyzer
+            yolo_analysis = get_yolo_analyzer().analyze_video(req.video_file_path)
+        except ImportError as e:
+            logging.warning(f"Análisis YOLO no disponible: {e}")
     return {
         "channel_id": req.channel_id,
         "video_file_path": req.video_file_path,
         "metadata": req.metadata,
-        "yolo_analysis": "dummy_result",
+        "yolo_analysis": yolo_analysis,
         "runway_analysis": {"status": "pending", "msg": "Integración Runway dummy"},
         "msg": "Vídeo analizado y listo para distribución y procesamiento avanzado (dummy)."
     }
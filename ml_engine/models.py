@@ -0,0 +1,18 @@
+"""
+ML Engine Models - Punto de entrada simple a los modelos de visión
+Los imports pesados (numpy, Ultralytics) se hacen al llamar, no al
+importar el paquete: `import ml_engine` no debe fallar ni tardar.
+"""
+from typing import Dict, Optional
+
+
+def load_model(weights: Optional[str] = None):
+    """Modelo YOLO compartido del proceso (se carga una sola vez, ver ModelRegistry)"""
+    from .vision.model_registry import YOLO_MODEL, get_model_registry
+    return get_model_registry().get(weights or YOLO_MODEL)
+
+
+def evaluate_clip(video_path: str, use_coco: bool = False) -> Dict:
+    """Análisis visual del clip con el analizador compartido (usa la caché de análisis)"""
+    from .vision.yolo_analyzer import get_yolo_analyzer
+    return get_yolo_analyzer(use_coco=use_coco).analyze_video(video_path, use_coco=use_coco)
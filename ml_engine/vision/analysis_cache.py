@@ -0,0 +1,127 @@
+"""
+Analysis Cache - Análisis de video persistidos en disco
+Un análisis se identifica por el hash del contenido del video, la versión
+del modelo (nombre + hash del checkpoint + versión de Ultralytics) y los
+parámetros de muestreo. Se guarda el timeline por segundo como .npz
+comprimido: repetir un análisis es leer unos pocos KB.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from .timeline import Timeline
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", "data/cache/analysis")
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANALYSIS_CACHE_VERSION = 1  # Súbelo al cambiar cómo se calculan las features: invalida la caché
+
+
+@lru_cache(maxsize=256)
+def _digest(path: str, size: int, mtime_ns: int) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class AnalysisCache:
+    """Almacén de timelines en disco"""
+
+    def __init__(self, root: str = ANALYSIS_CACHE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def video_digest(self, path: str) -> str:
+        """
+        SHA-256 del video. El hash de un video largo cuesta, así que se
+        recuerda por (ruta, tamaño, mtime) en memoria y en disco.
+        """
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        marker = hashlib.sha1(f"{path}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()
+        memo = self.root / "digests" / marker
+        try:
+            return memo.read_text().strip()
+        except FileNotFoundError:
+            digest = _digest(path, stat.st_size, stat.st_mtime_ns)
+            self._write_atomic(memo, digest.encode())
+            return digest
+
+    def key(self, video_path: str, model_version: str, sampling: Dict) -> str:
+        payload = {"video": self.video_digest(video_path), "model": model_version, "sampling": sampling,
+                   "version": ANALYSIS_CACHE_VERSION}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.npz"
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _write_atomic(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def get(self, key: str) -> Optional[Timeline]:
+        try:
+            with np.load(self._entry(key), allow_pickle=False) as arrays:
+                timeline = Timeline.from_arrays(arrays)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except (OSError, ValueError, KeyError) as e:  # Entrada corrupta o de un formato anterior
+            logger.warning(f"⚠️ Análisis en caché ilegible, se recalcula: {e}")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return timeline
+
+    def put(self, key: str, timeline: Timeline):
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **timeline.to_arrays())
+        self._write_atomic(self._entry(key), buffer.getvalue())
+        self._count("stores")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Caché de análisis del proceso: se crea en el primer uso."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalysisCache()
+    return _cache
@@ -0,0 +1,182 @@
+"""
+YOLO Model Registry - Modelos cargados una vez por proceso
+Los pesos se cargan la primera vez que se piden y se comparten entre
+analizadores e hilos. Caben varias variantes (nano, COCO, custom) con un
+tope de memoria: al superarlo se descarta la menos usada recientemente.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+YOLO_MODEL = os.getenv("YOLO_MODEL", "yolov8n.pt")
+YOLO_COCO_MODEL = os.getenv("YOLO_COCO_MODEL", "yolov8n.pt")  # COCO es el dataset por defecto en YOLOv8
+YOLO_REGISTRY_MAX_MB = int(os.getenv("YOLO_REGISTRY_MAX_MB", "1024"))
+YOLO_WARMUP_MODELS = [m for m in os.getenv("YOLO_WARMUP_MODELS", YOLO_MODEL).split(",") if m]
+WARMUP_IMGSZ = 640
+
+
+def _model_bytes(model, weights: str) -> int:
+    """Memoria aproximada del modelo: parámetros + buffers (o tamaño del .pt si no es un módulo torch)"""
+    try:
+        module = model.model
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return os.path.getsize(weights) if os.path.isfile(weights) else 0
+
+
+def _model_version(model, weights: str) -> str:
+    """Identifica los pesos cargados: nombre + hash del checkpoint + versión de Ultralytics"""
+    path = getattr(model, "ckpt_path", None) or weights
+    digest = "unknown"
+    if isinstance(path, str) and os.path.isfile(path):
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                sha.update(chunk)
+        digest = sha.hexdigest()[:16]
+    try:
+        from ultralytics import __version__ as library
+    except ImportError:
+        library = "unknown"
+    return f"{weights}:{digest}:{library}"
+
+
+class _Entry:
+    def __init__(self, model, nbytes: int, version: str):
+        self.model = model
+        self.nbytes = nbytes
+        self.version = version
+        # El predictor de Ultralytics guarda estado por llamada: una inferencia a la vez por modelo
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Caché LRU de modelos YOLO acotada en memoria, segura entre hilos"""
+
+    def __init__(self, max_bytes: Optional[int] = None, loader=None):
+        self.max_bytes = YOLO_REGISTRY_MAX_MB * 1024 ** 2 if max_bytes is None else max_bytes
+        self._loader = loader
+        self._models: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._stats = {"hits": 0, "loads": 0, "evictions": 0, "load_seconds": 0.0}
+
+    def _load(self, weights: str):
+        if self._loader:
+            return self._loader(weights)
+        from ultralytics import YOLO
+        return YOLO(weights)
+
+    def _entry(self, weights: str) -> _Entry:
+        with self._lock:
+            entry = self._models.get(weights)
+            if entry is not None:
+                self._models.move_to_end(weights)
+                self._stats["hits"] += 1
+                return entry
+            loading = self._loading.setdefault(weights, threading.Lock())
+
+        # Un lock por modelo: dos hilos que piden el mismo modelo lo cargan una sola vez
+        with loading:
+            with self._lock:
+                entry = self._models.get(weights)
+                if entry is not None:
+                    self._stats["hits"] += 1
+                    return entry
+            started = time.perf_counter()
+            model = self._load(weights)
+            elapsed = time.perf_counter() - started
+            entry = _Entry(model, _model_bytes(model, weights), _model_version(model, weights))
+            with self._lock:
+                self._models[weights] = entry
+                self._loading.pop(weights, None)
+                self._stats["loads"] += 1
+                self._stats["load_seconds"] += elapsed
+                self._evict(keep=weights)
+            logger.info(f"🧠 Modelo {weights} cargado en {elapsed:.2f}s ({entry.nbytes / 1024 ** 2:.0f} MB)")
+            return entry
+
+    def _evict(self, keep: str):
+        total = sum(entry.nbytes for entry in self._models.values())
+        for weights in list(self._models):
+            if total <= self.max_bytes:
+                break
+            if weights == keep:
+                continue
+            # Quien lo esté usando conserva su referencia; solo sale del registro
+            total -= self._models.pop(weights).nbytes
+            self._stats["evictions"] += 1
+            logger.info(f"🧹 Modelo {weights} descartado del registro")
+
+    def get(self, weights: str = YOLO_MODEL):
+        """Modelo compartido (cargado una vez). Para inferir desde varios hilos usa `use()`"""
+        return self._entry(weights).model
+
+    def version(self, weights: str = YOLO_MODEL) -> str:
+        """Versión de los pesos (cambia si cambia el checkpoint o la librería)"""
+        return self._entry(weights).version
+
+    @contextmanager
+    def use(self, weights: str = YOLO_MODEL):
+        """Modelo con su lock de inferencia tomado: seguro entre hilos"""
+        entry = self._entry(weights)
+        with entry.lock:
+            yield entry.model
+
+    def warm_up(self, models: Optional[Iterable[str]] = None, imgsz: int = WARMUP_IMGSZ) -> Dict[str, float]:
+        """
+        Carga los modelos y lanza una inferencia en vacío para que la primera
+        petición real no pague carga, fusión de capas ni inicialización del
+        dispositivo. Devuelve los segundos de cada uno.
+        """
+        timings = {}
+        for weights in models or YOLO_WARMUP_MODELS:
+            started = time.perf_counter()
+            with self.use(weights) as model:
+                model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+            timings[weights] = time.perf_counter() - started
+        logger.info(f"🔥 Warm-up YOLO: {', '.join(f'{m} {s:.2f}s' for m, s in timings.items())}")
+        return timings
+
+    def loaded(self) -> Dict[str, int]:
+        with self._lock:
+            return {weights: entry.nbytes for weights, entry in self._models.items()}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(models=list(self._models), bytes=sum(e.nbytes for e in self._models.values()),
+                         max_bytes=self.max_bytes)
+        return stats
+
+    def unload(self, weights: Optional[str] = None):
+        """Descarta un modelo (o todos)"""
+        with self._lock:
+            if weights is None:
+                self._models.clear()
+            else:
+                self._models.pop(weights, None)
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Registro de modelos del proceso: se crea en el primer uso."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,103 @@
+"""
+Frame Sampling - Decodificación muestreada para inferencia
+ffmpeg decodifica el video una sola vez, se queda con uno de cada `stride`
+frames y los escala al tamaño de inferencia antes de pasarlos a Python.
+De esos frames solo se infieren los keyframes (cambio de escena o
+`max_gap` segundos sin inferir), agrupados en batches de tamaño fijo.
+"""
+import os
+import subprocess
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+YOLO_SAMPLE_FPS = float(os.getenv("YOLO_SAMPLE_FPS", "4"))  # Frames muestreados por segundo si no hay stride
+YOLO_IMGSZ = int(os.getenv("YOLO_IMGSZ", "640"))
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "16"))
+SCENE_THRESHOLD = float(os.getenv("YOLO_SCENE_THRESHOLD", "0.08"))  # Diferencia media (0-1) entre miniaturas
+MAX_GAP_SECONDS = float(os.getenv("YOLO_MAX_GAP_SECONDS", "2"))
+THUMB_STEP = 16  # Submuestreo de la miniatura usada para detectar cambios de escena
+
+
+def probe_video(path: str) -> Dict:
+    infos = ffmpeg_parse_infos(path)
+    return {"fps": infos.get("video_fps") or 25.0, "size": tuple(infos["video_size"]),
+            "duration": infos.get("duration") or 0.0}
+
+
+def inference_size(size: Tuple[int, int], imgsz: int = YOLO_IMGSZ) -> Tuple[int, int]:
+    """Tamaño (pares) con el lado mayor = imgsz, sin ampliar videos más pequeños"""
+    w, h = size
+    scale = min(1.0, imgsz / max(w, h))
+    return max(2, int(w * scale) // 2 * 2), max(2, int(h * scale) // 2 * 2)
+
+
+def iter_frames(path: str, stride: int, size: Tuple[int, int]) -> Iterator[np.ndarray]:
+    """Uno de cada `stride` frames, escalado a `size` (w, h), en BGR (el formato que espera Ultralytics)"""
+    w, h = size
+    cmd = [get_setting("FFMPEG_BINARY"), "-v", "error", "-an", "-sn", "-i", path,
+           "-vf", f"select='not(mod(n\\,{stride}))',scale={w}:{h}:flags=area", "-vsync", "0",
+           "-f", "rawvideo", "-pix_fmt", "bgr24", "-"]
+    frame_bytes = w * h * 3
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=frame_bytes)
+    try:
+        while True:
+            data = proc.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield np.frombuffer(data, dtype=np.uint8).reshape(h, w, 3)
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:  # El consumidor paró antes del final
+            proc.kill()
+        stderr = proc.stderr.read()
+        proc.wait()
+    if proc.returncode != 0:
+        raise IOError(f"ffmpeg falló decodificando {path}: {stderr.decode(errors='replace').strip()}")
+
+
+def thumbnail(frame: np.ndarray) -> np.ndarray:
+    """Miniatura en grises (0-1) para comparar frames"""
+    return frame[::THUMB_STEP, ::THUMB_STEP].mean(axis=2, dtype=np.float32) / 255.0
+
+
+def sample_frames(path: str, stride: Optional[int] = None, imgsz: int = YOLO_IMGSZ,
+                  scene_threshold: float = SCENE_THRESHOLD, max_gap: float = MAX_GAP_SECONDS) -> Iterator[Dict]:
+    """
+    Frames muestreados en orden: {"index", "time", "motion", "keyframe",
+    "frame"}. motion es la diferencia media con el frame muestreado
+    anterior; frame solo se conserva en los keyframes (el resto son None).
+    """
+    info = probe_video(path)
+    stride = stride or max(1, round(info["fps"] / YOLO_SAMPLE_FPS))
+    last_thumb, last_key_time = None, None
+    for i, frame in enumerate(iter_frames(path, stride, inference_size(info["size"], imgsz))):
+        index = i * stride
+        time = index / info["fps"]
+        thumb = thumbnail(frame)
+        motion = float(np.abs(thumb - last_thumb).mean()) if last_thumb is not None else 0.0
+        last_thumb = thumb
+        keyframe = last_key_time is None or motion >= scene_threshold or time - last_key_time >= max_gap
+        if keyframe:
+            last_key_time = time
+        yield {"index": index, "time": time, "motion": motion, "keyframe": keyframe,
+               "frame": frame if keyframe else None}
+
+
+def batched_keyframes(samples: Iterator[Dict], batch_size: int = YOLO_BATCH_SIZE,
+                      max_pending: int = 256) -> Iterator[List[Dict]]:
+    """
+    Agrupa las muestras en tandas con a lo sumo `batch_size` keyframes (y
+    `max_pending` muestras), en orden. En memoria solo hay una tanda.
+    """
+    pending, keyframes = [], 0
+    for sample in samples:
+        pending.append(sample)
+        keyframes += sample["keyframe"]
+        if keyframes >= batch_size or len(pending) >= max_pending:
+            yield pending
+            pending, keyframes = [], 0
+    if pending:
+        yield pending
@@ -0,0 +1,195 @@
+"""
+Timeline Scoring - Puntuación por segundo para encontrar clips virales
+Por cada segundo del video se acumulan densidad de detecciones y energía
+de movimiento (del stream de YOLOAnalyzer) y RMS / onsets del audio. Las
+features se normalizan (respecto al propio video, pero nunca por debajo de
+un mínimo absoluto), se combinan en un score y una ventana deslizante
+(sumas acumuladas, O(n)) elige los mejores clips de la duración pedida.
+"""
+import subprocess
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+from moviepy.config import get_setting
+
+AUDIO_SAMPLE_RATE = 22050
+ONSET_WINDOW = 1024
+ONSET_HOP = 512
+# Peso de cada feature en el score (suman 1)
+VIRAL_WEIGHTS = {"onset": 0.35, "rms": 0.2, "motion": 0.25, "detections": 0.2}
+FEATURE_REASONS = {
+    "onset": "Beat drop / golpes marcados",
+    "rms": "Energía de audio alta",
+    "motion": "Mucho movimiento en pantalla",
+    "detections": "Protagonistas en cuadro",
+}
+KEY_MOMENTS = {"onset": "beat_drop", "rms": "hook", "motion": "transition", "detections": "artist_closeup"}
+FEATURES = tuple(VIRAL_WEIGHTS)
+# Valor crudo que cuenta como 1.0 aunque el video no llegue: sin esto un tono continuo
+# (flujo espectral ~0.02) o un plano fijo se estiran hasta el máximo y parecen picos
+FEATURE_FLOORS = {
+    "onset": 2.0,       # Flujo espectral medio: un bombo a 120 BPM da ~2.7, un acorde sostenido ~0.5
+    "rms": 0.1,         # ~-20 dBFS
+    "motion": 0.02,     # Diferencia media entre miniaturas (un corte seco supera 0.08)
+    "detections": 1.0,  # Objetos por frame muestreado
+}
+
+
+def load_audio(path: str, sample_rate: int = AUDIO_SAMPLE_RATE) -> np.ndarray:
+    """Audio mono float32; vacío si el archivo no tiene pista de audio"""
+    cmd = [get_setting("FFMPEG_BINARY"), "-v", "error", "-i", path, "-vn", "-sn", "-ac", "1",
+           "-ar", str(sample_rate), "-f", "f32le", "-"]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def audio_features(samples: np.ndarray, seconds: int, sample_rate: int = AUDIO_SAMPLE_RATE) -> Dict[str, np.ndarray]:
+    """RMS y fuerza de onset (flujo espectral positivo) medios por segundo"""
+    rms = np.zeros(seconds, dtype=np.float32)
+    onset = np.zeros(seconds, dtype=np.float32)
+    usable = min(len(samples) // sample_rate, seconds)
+    if usable:
+        blocks = samples[:usable * sample_rate].reshape(usable, sample_rate)
+        rms[:usable] = np.sqrt(np.mean(blocks ** 2, axis=1))
+    if len(samples) >= ONSET_WINDOW + ONSET_HOP:
+        frames = np.lib.stride_tricks.sliding_window_view(samples, ONSET_WINDOW)[::ONSET_HOP]
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(ONSET_WINDOW).astype(np.float32), axis=1))
+        flux = np.maximum(np.diff(np.log1p(spectrum), axis=0), 0).sum(axis=1)
+        second = np.minimum((np.arange(1, len(frames)) * ONSET_HOP) // sample_rate, seconds - 1)
+        counts = np.bincount(second, minlength=seconds)[:seconds]
+        onset = (np.bincount(second, weights=flux, minlength=seconds)[:seconds] / np.maximum(counts, 1))
+        onset = onset.astype(np.float32)
+    return {"rms": rms, "onset": onset}
+
+
+def normalize(values: np.ndarray, floor: float = 0.0) -> np.ndarray:
+    """
+    0-1 relativo al propio video: el percentil 95 marca el máximo (robusto a
+    picos aislados), salvo que quede por debajo de `floor`.
+    """
+    top = max(float(np.percentile(values, 95)) if len(values) else 0.0, floor)
+    if top <= 0:
+        return np.zeros_like(values, dtype=np.float32)
+    return np.clip(values / top, 0.0, 1.0).astype(np.float32)
+
+
+def format_time(seconds: float) -> str:
+    return f"{int(seconds) // 60}:{int(seconds) % 60:02d}"
+
+
+class Timeline:
+    """Features por segundo de un video y su puntuación"""
+
+    def __init__(self, duration: float):
+        self.duration = duration
+        self.seconds = max(1, int(np.ceil(duration)))
+        self.detections = np.zeros(self.seconds, dtype=np.float32)
+        self.motion = np.zeros(self.seconds, dtype=np.float32)
+        self.samples = np.zeros(self.seconds, dtype=np.float32)
+        self.rms = np.zeros(self.seconds, dtype=np.float32)
+        self.onset = np.zeros(self.seconds, dtype=np.float32)
+        self.label_frames = Counter()
+        self.frames_sampled = 0
+        self.frames_inferred = 0
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Representación compacta (arrays NumPy) para guardar en disco"""
+        labels = list(self.label_frames)
+        return {
+            "duration": np.float64(self.duration),
+            "detections": self.detections, "motion": self.motion, "samples": self.samples,
+            "rms": self.rms, "onset": self.onset,
+            "labels": np.array(labels, dtype=str),
+            "label_frames": np.array([self.label_frames[label] for label in labels], dtype=np.int64),
+            "counts": np.array([self.frames_sampled, self.frames_inferred], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "Timeline":
+        timeline = cls(float(arrays["duration"]))
+        for name in ("detections", "motion", "samples", "rms", "onset"):
+            setattr(timeline, name, np.asarray(arrays[name], dtype=np.float32))
+        timeline.label_frames = Counter(dict(zip(arrays["labels"].tolist(), arrays["label_frames"].tolist())))
+        timeline.frames_sampled, timeline.frames_inferred = (int(v) for v in arrays["counts"])
+        return timeline
+
+    def add_frame(self, frame: Dict):
+        """Acumula un resultado de YOLOAnalyzer.stream_video"""
+        second = min(int(frame["time"]), self.seconds - 1)
+        self.detections[second] += len(frame["objects"])
+        self.motion[second] += frame["motion"]
+        self.samples[second] += 1
+        self.label_frames.update({obj["label"] for obj in frame["objects"]})
+        self.frames_sampled += 1
+        self.frames_inferred += frame["inferred"]
+
+    def set_audio(self, samples: np.ndarray, sample_rate: int = AUDIO_SAMPLE_RATE):
+        features = audio_features(samples, self.seconds, sample_rate)
+        self.rms, self.onset = features["rms"], features["onset"]
+
+    def features(self) -> Dict[str, np.ndarray]:
+        """Features normalizadas (0-1) por segundo"""
+        per_sample = np.maximum(self.samples, 1)
+        raw = {"onset": self.onset, "rms": self.rms, "motion": self.motion / per_sample,
+               "detections": self.detections / per_sample}
+        return {name: normalize(raw[name], FEATURE_FLOORS[name]) for name in FEATURES}
+
+    def scores(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        weights = weights or VIRAL_WEIGHTS
+        features = self.features()
+        return sum(weights[name] * features[name] for name in weights).astype(np.float32)
+
+    def _reason(self, features: Dict[str, np.ndarray], start: int, end: int) -> str:
+        contribution = {name: VIRAL_WEIGHTS[name] * float(features[name][start:end].mean()) for name in FEATURES}
+        top = sorted(contribution, key=contribution.get, reverse=True)[:2]
+        return " + ".join(FEATURE_REASONS[name] for name in top if contribution[name] > 0) or "Sin señales destacadas"
+
+    def best_windows(self, duration: int, top_k: int = 3, min_gap: int = 0) -> List[Dict]:
+        """
+        Los `top_k` clips de `duration` segundos con mayor score medio, sin
+        solaparse (separados al menos `min_gap` segundos).
+        """
+        scores = self.scores()
+        features = self.features()
+        window = max(1, min(int(duration), self.seconds))
+        cumulative = np.concatenate([[0.0], np.cumsum(scores, dtype=np.float64)])
+        sums = cumulative[window:] - cumulative[:-window]  # Suma de cada ventana en O(n)
+        clips = []
+        for _ in range(top_k):
+            start = int(np.argmax(sums))
+            if not np.isfinite(sums[start]):
+                break
+            end = start + window
+            clips.append({
+                "start_time": start,
+                "end_time": min(end, self.duration),
+                "viral_score": round(10 * float(sums[start]) / window, 2),
+                "reason": self._reason(features, start, end),
+                "features": {name: round(float(features[name][start:end].mean()), 3) for name in FEATURES},
+            })
+            sums[max(0, start - window - min_gap + 1):end + min_gap] = -np.inf
+        return clips
+
+    def moments(self, top_k: int = 3, min_distance: int = 5) -> List[Dict]:
+        """
+        Picos de score separados al menos `min_distance` segundos, como
+        timestamp_analysis ({"time", "key_moment", "engagement_potential"}).
+        """
+        scores = self.scores()
+        features = self.features()
+        peaks = []
+        for second in np.argsort(scores)[::-1]:
+            if len(peaks) == top_k or scores[second] <= 0:
+                break
+            if all(abs(int(second) - peak) >= min_distance for peak in peaks):
+                peaks.append(int(second))
+        moments = []
+        for second in sorted(peaks):
+            dominant = max(FEATURES, key=lambda name: VIRAL_WEIGHTS[name] * features[name][second])
+            score = float(scores[second])
+            potential = ("very_high" if score >= 0.75 else "high" if score >= 0.5
+                         else "medium" if score >= 0.3 else "low")
+            moments.append({"time": format_time(second), "key_moment": KEY_MOMENTS[dominant],
+                            "engagement_potential": potential, "score": round(score, 3)})
+        return moments
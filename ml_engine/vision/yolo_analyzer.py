@@ -1,56 +1,68 @@
 """
 YOLO v8 Analyzer - Análisis visual de contenido
 """
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
 import os
+import threading
+
+from .analysis_cache import ANALYSIS_CACHE_ENABLED, get_analysis_cache
+from .model_registry import YOLO_COCO_MODEL, YOLO_MODEL, get_model_registry
+from .sampling import (MAX_GAP_SECONDS, SCENE_THRESHOLD, YOLO_BATCH_SIZE, YOLO_IMGSZ, YOLO_SAMPLE_FPS,
+                       batched_keyframes, probe_video, sample_frames)
+from .timeline import AUDIO_SAMPLE_RATE, Timeline, load_audio
+
+YOLO_CONFIDENCE = float(os.getenv("YOLO_CONFIDENCE", "0.25"))
+
+# Respuestas fijas de dummy mode cuando el video no existe en disco (p.ej. URLs en demos)
+STATIC_MOMENTS = [
+    {"time": "0:05", "key_moment": "beat_drop", "engagement_potential": "high"},
+    {"time": "0:15", "key_moment": "hook", "engagement_potential": "very_high"},
+    {"time": "0:30", "key_moment": "transition", "engagement_potential": "medium"}
+]
+STATIC_VIRAL_CLIPS = [
+    {"start_time": 5, "end_time": 20, "viral_score": 9.2, "reason": "Beat drop + visual impact"},
+    {"start_time": 30, "end_time": 45, "viral_score": 8.5, "reason": "Hook con letra pegajosa"}
+]
 
 class YOLOAnalyzer:
     def __init__(self, use_coco: bool = False):
         self.dummy_mode = os.getenv("DUMMY_MODE", "true").lower() == "true"
         self.model = None
         self.use_coco = use_coco
+        # Permite elegir entre modelo nano o COCO preentrenado
+        self.model_path = YOLO_COCO_MODEL if use_coco else YOLO_MODEL
         if not self.dummy_mode:
             try:
-                from ultralytics import YOLO
-                # Permite elegir entre modelo nano o COCO preentrenado
-                model_path = 'yolov8n.pt'
-                if self.use_coco:
-                    model_path = 'yolov8n.pt'  # COCO es el dataset por defecto en YOLOv8
-                self.model = YOLO(model_path)
+                # Los pesos viven en el registro del proceso: crear analizadores no recarga el modelo
+                self.model = get_model_registry().get(self.model_path)
             except ImportError:
                 print("⚠️ Ultralytics no instalado, usando dummy mode")
                 self.dummy_mode = True
     
-    def analyze_video(self, video_path: str, use_coco: bool = False) -> Dict:
-        """Analizar video con YOLO v8"""
+    def analyze_video(self, video_path: str, use_coco: bool = False, streaming: bool = True, **sampling) -> Dict:
+        """
+        Analizar video con YOLO v8. Por defecto en modo streaming (frames
+        muestreados e inferidos por batches, ver stream_video); con
+        streaming=False se infiere el video completo, frame a frame.
+        """
         if self.dummy_mode:
-            return {
-                "video_path": video_path,
-                "detected_objects": ["person", "microphone", "studio", "lights"],
-                "scene_type": "music_video",
-                "visual_quality": 8.5,
-                "viral_elements": ["neon_lights", "urban_setting", "artist_closeup"],
-                "recommended_platforms": ["TikTok", "Instagram"],
-                "timestamp_analysis": [
-                    {"time": "0:05", "key_moment": "beat_drop", "engagement_potential": "high"},
-                    {"time": "0:15", "key_moment": "hook", "engagement_potential": "very_high"},
-                    {"time": "0:30", "key_moment": "transition", "engagement_potential": "medium"}
-                ]
-            }
-        # Permite forzar el uso de COCO si se requiere
-        if use_coco:
-            try:
-                from ultralytics import YOLO
-                self.model = YOLO('yolov8n.pt')  # COCO dataset por defecto
-            except Exception:
-                pass
-        results = self.model(video_path)
-        detected_objects = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                cls = int(box.cls[0])
-                detected_objects.append(self.model.names[cls])
+            # Sin modelo no hay detecciones, pero movimiento y audio sí dan momentos reales
+            timestamp_analysis = (self.timeline(video_path, **sampling).moments() if os.path.isfile(video_path)
+                                  else [dict(moment) for moment in STATIC_MOMENTS])
+            return self._dummy_analysis(video_path, timestamp_analysis)
+        if streaming:
+            return self._summarize(video_path, self.timeline(video_path, use_coco=use_coco, **sampling))
+        # Permite forzar el uso de COCO si se requiere (del registro, sin recargar pesos)
+        model_path = YOLO_COCO_MODEL if use_coco else self.model_path
+        with get_model_registry().use(model_path) as model:
+            results = model(video_path)
+            detected_objects = []
+            for result in results:
+                boxes = result.boxes
+                for box in boxes:
+                    cls = int(box.cls[0])
+                    detected_objects.append(model.names[cls])
         return {
             "video_path": video_path,
             "detected_objects": list(set(detected_objects)),
@@ -58,6 +70,121 @@ class YOLOAnalyzer:
             "visual_quality": self._assess_quality(results)
         }
     
+    def stream_video(
+        self,
+        video_path: str,
+        use_coco: bool = False,
+        stride: Optional[int] = None,
+        batch_size: int = YOLO_BATCH_SIZE,
+        scene_threshold: float = SCENE_THRESHOLD,
+        imgsz: int = YOLO_IMGSZ,
+        conf: float = YOLO_CONFIDENCE
+    ) -> Iterator[Dict]:
+        """
+        Genera un resultado por frame muestreado (uno de cada `stride`), en
+        orden: {"index", "time", "motion", "keyframe", "inferred", "objects"}.
+        Solo se infieren los keyframes (cambio de escena o demasiado tiempo
+        sin inferir), en batches de `batch_size`; el resto hereda las
+        detecciones del último keyframe. objects: [{"label", "confidence",
+        "box": [x1, y1, x2, y2] normalizado}]. En dummy mode no hay
+        detecciones, pero sí tiempos y movimiento.
+        """
+        model_path = YOLO_COCO_MODEL if use_coco else self.model_path
+        samples = sample_frames(video_path, stride=stride, imgsz=imgsz, scene_threshold=scene_threshold)
+        objects: List[Dict] = []
+        for batch in batched_keyframes(samples, batch_size):
+            keyframes = [sample for sample in batch if sample["keyframe"]]
+            detections = iter(self._detect([sample["frame"] for sample in keyframes], model_path, imgsz, conf)
+                              if keyframes and not self.dummy_mode else [])
+            for sample in batch:
+                if sample["keyframe"]:
+                    objects = next(detections, [])
+                sample["inferred"] = sample["keyframe"] and not self.dummy_mode
+                sample["objects"] = objects
+                del sample["frame"]
+                yield sample
+    
+    def _detect(self, frames: List, model_path: str, imgsz: int, conf: float) -> List[List[Dict]]:
+        """Una sola llamada al modelo para todo el batch"""
+        with get_model_registry().use(model_path) as model:
+            results = model(frames, imgsz=imgsz, conf=conf, verbose=False)
+            names = model.names
+        detections = []
+        for result in results:
+            boxes = result.boxes
+            detections.append([
+                {"label": names[int(cls)], "confidence": round(float(score), 3), "box": [round(v, 4) for v in box]}
+                for cls, score, box in zip(boxes.cls.tolist(), boxes.conf.tolist(), boxes.xyxyn.tolist())
+            ])
+        return detections
+    
+    def timeline(self, video_path: str, use_coco: bool = False, use_cache: bool = ANALYSIS_CACHE_ENABLED,
+                 **sampling) -> Timeline:
+        """
+        Features por segundo del video: detecciones y movimiento de
+        stream_video más RMS y onsets del audio, que se decodifica en
+        paralelo. Cada stream se decodifica una sola vez, y el resultado
+        queda en la caché de análisis (contenido + modelo + muestreo).
+        """
+        cache = get_analysis_cache() if use_cache else None
+        key = cache.key(video_path, self._model_version(use_coco), self._sampling_params(sampling)) if cache else None
+        if key:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
+        timeline = Timeline(probe_video(video_path)["duration"])
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio") as pool:
+            audio = pool.submit(load_audio, video_path)
+            for frame in self.stream_video(video_path, use_coco=use_coco, **sampling):
+                timeline.add_frame(frame)
+            timeline.set_audio(audio.result())
+        if key:
+            cache.put(key, timeline)
+        return timeline
+    
+    def _model_version(self, use_coco: bool) -> str:
+        if self.dummy_mode:
+            return "dummy"
+        return get_model_registry().version(YOLO_COCO_MODEL if use_coco else self.model_path)
+    
+    def _sampling_params(self, sampling: Dict) -> Dict:
+        """Todo lo que cambia el timeline (batch_size no: solo agrupa la inferencia)"""
+        return {
+            "stride": sampling.get("stride") or f"auto@{YOLO_SAMPLE_FPS}fps",
+            "imgsz": sampling.get("imgsz", YOLO_IMGSZ),
+            "scene_threshold": sampling.get("scene_threshold", SCENE_THRESHOLD),
+            "max_gap": MAX_GAP_SECONDS,
+            "conf": sampling.get("conf", YOLO_CONFIDENCE),
+            "audio_sample_rate": AUDIO_SAMPLE_RATE,
+        }
+    
+    def _dummy_analysis(self, video_path: str, timestamp_analysis: List[Dict]) -> Dict:
+        return {
+            "video_path": video_path,
+            "detected_objects": ["person", "microphone", "studio", "lights"],
+            "scene_type": "music_video",
+            "visual_quality": 8.5,
+            "viral_elements": ["neon_lights", "urban_setting", "artist_closeup"],
+            "recommended_platforms": ["TikTok", "Instagram"],
+            "timestamp_analysis": timestamp_analysis
+        }
+    
+    def _summarize(self, video_path: str, timeline: Timeline) -> Dict:
+        """Resumen del timeline con el mismo formato que analyze_video"""
+        detected_objects = list(timeline.label_frames)
+        sampled = max(timeline.frames_sampled, 1)
+        return {
+            "video_path": video_path,
+            "detected_objects": detected_objects,
+            "scene_type": self._classify_scene(detected_objects),
+            "visual_quality": self._assess_quality(None),
+            "object_presence": {label: count / sampled for label, count in timeline.label_frames.most_common()},
+            "frames_sampled": timeline.frames_sampled,
+            "frames_inferred": timeline.frames_inferred,
+            "timestamp_analysis": timeline.moments()
+        }
+    
     def _classify_scene(self, objects: List[str]) -> str:
         """Clasificar tipo de escena"""
         if "person" in objects and "microphone" in objects:
@@ -72,23 +199,36 @@ class YOLOAnalyzer:
         # Implementación simplificada
         return 8.0
     
-    def get_viral_clips(self, video_path: str, duration: int = 15) -> List[Dict]:
-        """Identificar clips con mayor potencial viral"""
-        
-        return [
-            {
-                "start_time": 5,
-                "end_time": 20,
-                "viral_score": 9.2,
-                "reason": "Beat drop + visual impact"
-            },
-            {
-                "start_time": 30,
-                "end_time": 45,
-                "viral_score": 8.5,
-                "reason": "Hook con letra pegajosa"
-            }
-        ]
+    def get_viral_clips(self, video_path: str, duration: int = 15, top_k: int = 3, min_gap: int = 0,
+                        use_coco: bool = False, **sampling) -> List[Dict]:
+        """
+        Identificar clips con mayor potencial viral: los `top_k` tramos de
+        `duration` segundos con mejor score del timeline, sin solaparse.
+        Cada clip: {"start_time", "end_time", "viral_score" (0-10), "reason",
+        "features"}; se pasan tal cual a VideoEditor.extract_clips.
+        """
+        if self.dummy_mode and not os.path.isfile(video_path):
+            return [dict(clip) for clip in STATIC_VIRAL_CLIPS]
+        return self.timeline(video_path, use_coco=use_coco, **sampling).best_windows(duration, top_k, min_gap)
+    
+    def extract_viral_clips(self, video_path: str, duration: int = 15, top_k: int = 3,
+                            output_dir: Optional[str] = None, exact: bool = True, **sampling) -> Dict:
+        """Puntúa el video y recorta sus mejores clips con VideoEditor.extract_clips"""
+        from video_generator.editor import VideoEditor
+        clips = self.get_viral_clips(video_path, duration=duration, top_k=top_k, **sampling)
+        return VideoEditor.extract_clips(video_path, clips, output_dir=output_dir, exact=exact)
 
 # Instancia global
 yolo_analyzer = YOLOAnalyzer()
+
+_analyzers: Dict[bool, YOLOAnalyzer] = {False: yolo_analyzer}
+_analyzers_lock = threading.Lock()
+
+
+def get_yolo_analyzer(use_coco: bool = False) -> YOLOAnalyzer:
+    """Analizador compartido del proceso (uno por variante de modelo)"""
+    if use_coco not in _analyzers:
+        with _analyzers_lock:
+            if use_coco not in _analyzers:
+                _analyzers[use_coco] = YOLOAnalyzer(use_coco=use_coco)
+    return _analyzers[use_coco]
@@ -0,0 +1,106 @@
+"""
+Cuenta transacciones, commits y sentencias SQL por campaña lanzada.
+
+Compara el patrón anterior (una sesión y un commit por cada helper CRUD)
+con campaign_launcher.launch_campaign sobre una única unidad de trabajo.
+Las etapas de IA/vídeo/publicación se sustituyen por no-ops para medir
+solo el acceso a datos.
+
+Uso:
+    python scripts/bench_campaign_commits.py [--campaigns 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from discografica_automator.core import database  # noqa: E402
+from discografica_automator.core.database import CampaignStatus  # noqa: E402
+
+LIFECYCLE = (
+    CampaignStatus.GENERATING_CAPTIONS,
+    CampaignStatus.GENERATING_VIDEO,
+    CampaignStatus.DISTRIBUTING,
+    CampaignStatus.COMPLETED,
+)
+
+
+class Counters:
+    def __init__(self, engine):
+        self.transactions = self.commits = self.statements = 0
+        event.listen(Session, "after_begin", self._on_begin)
+        event.listen(engine, "commit", self._on_commit)
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_begin(self, *args):
+        self.transactions += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def snapshot(self):
+        return self.transactions, self.commits, self.statements
+
+
+def legacy_launch(campaign_id: str) -> None:
+    """Secuencia de accesos del launcher original: un helper (sesión + commit) por paso."""
+    database.get_campaign_by_id(campaign_id)
+    for status in LIFECYCLE:
+        database.update_campaign_status(campaign_id, status)
+
+
+def uow_launch(campaign_id: str) -> None:
+    from discografica_automator.services import campaign_launcher
+    campaign_launcher.launch_campaign(campaign_id)
+
+
+def stub_stages() -> None:
+    from discografica_automator.services import campaign_launcher, distributor
+    campaign_launcher.copy_generator = type("Stub", (), {
+        "generate_captions": staticmethod(lambda track, artist: {"tiktok": "caption"})
+    })
+    campaign_launcher.video_generator = type("Stub", (), {
+        "generate_video": staticmethod(lambda prompt: "video.mp4")
+    })
+    distributor.tiktok_poster = type("Stub", (), {
+        "post_to_tiktok": staticmethod(lambda video_path, caption: None)
+    })
+
+
+def measure(label, launch, counters, n):
+    ids = [c for c in database.save_campaigns({"artist": "A", "track": f"T{i}"} for i in range(n))]
+    before = counters.snapshot()
+    start = time.perf_counter()
+    for campaign_id in ids:
+        launch(campaign_id)
+    elapsed = time.perf_counter() - start
+    transactions, commits, statements = (b - a for a, b in zip(before, counters.snapshot()))
+    print(f"{label:<22} | {transactions / n:>9.1f} | {commits / n:>8.1f} | {statements / n:>10.1f} | {n / elapsed:>8.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--campaigns", type=int, default=200)
+    args = parser.parse_args()
+
+    database.configure_database("sqlite://")
+    counters = Counters(database.get_engine())
+    stub_stages()
+
+    print(f"{'modo':<22} | {'transacc.':>9} | {'commits':>8} | {'sentencias':>10} | {'camp/s':>8}")
+    print("-" * 70)
+    measure("helpers (antes)", legacy_launch, counters, args.campaigns)
+    measure("unit of work (ahora)", uow_launch, counters, args.campaigns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark de core.database.DatabaseManager con 1, 4 y 16 hilos concurrentes.
+
+Uso:
+    python scripts/bench_database.py [--ops 2000] [--threads 1 4 16]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.database import DatabaseManager  # noqa: E402
+
+
+def _worker(db: DatabaseManager, thread_id: int, ops: int) -> None:
+    for i in range(ops):
+        campaign_id = f"BENCH_{thread_id}_{i}"
+        # Mezcla típica de la API: 1 escritura, 1 actualización, 2 lecturas
+        db.save_campaign({
+            "id": campaign_id,
+            "artist": f"Artist {thread_id}",
+            "track": f"Track {i}",
+            "genre": "trap",
+            "status": "PENDING",
+            "created_at": "2025-01-01T00:00:00",
+        })
+        db.update_campaign_status(campaign_id, "active")
+        db.get_campaign(campaign_id)
+        db.get_stats()
+
+
+def run(threads: int, total_ops: int) -> float:
+    """Devuelve operaciones/segundo (cada iteración cuenta como 4 operaciones)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), pool_size=max(threads, 1))
+        per_thread = max(1, total_ops // threads)
+        workers = [threading.Thread(target=_worker, args=(db, t, per_thread)) for t in range(threads)]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - start
+        db.close()
+    return (per_thread * threads * 4) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000, help="iteraciones totales repartidas entre hilos")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    print(f"{'hilos':>6} | {'ops/s':>10}")
+    print("-" * 20)
+    for n in args.threads:
+        print(f"{n:>6} | {run(n, args.ops):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark de recortes de VideoEditor: re-encode completo frente a smart cut
+(exact=True) y copia desde keyframe (exact=False).
+
+Uso:
+    python scripts/bench_video_cut.py [--video master.mp4] [--start 100.5] [--length 30]
+
+Sin --video se genera un master sintético de 5 minutos (720p, GOP de 2 s, con
+B-frames como los videos del preset por defecto).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from moviepy.config import get_setting  # noqa: E402
+
+from video_generator import smartcut  # noqa: E402
+
+
+def synthetic_master(path: str, duration: int = 300):
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-v", "error", "-y",
+                    "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30", "-f", "lavfi", "-i", "sine=frequency=440",
+                    "-t", str(duration), "-c:v", "libx264", "-g", "60", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+                    "-c:a", "aac", "-shortest", path], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video")
+    parser.add_argument("--start", type=float, default=100.5)
+    parser.add_argument("--length", type=float, default=30.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = args.video or os.path.join(tmp, "master.mp4")
+        if not args.video:
+            print("Generando master sintético...")
+            synthetic_master(video)
+        end = args.start + args.length
+
+        modes = (
+            ("re-encode", lambda out: smartcut.reencode_cut(video, args.start, end, out)),
+            ("smart cut", lambda out: smartcut.cut(video, args.start, end, out, exact=True)),
+            ("fast cut", lambda out: smartcut.cut(video, args.start, end, out, exact=False)),
+        )
+        print(f"{'modo':<12}{'segundos':>10}")
+        for name, run in modes:
+            start = time.perf_counter()
+            run(os.path.join(tmp, f"{name.replace(' ', '_')}.mp4"))
+            print(f"{name:<12}{time.perf_counter() - start:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
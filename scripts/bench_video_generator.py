@@ -0,0 +1,88 @@
+"""
+Benchmark del fondo con gradiente de VideoGenerator.
+
+Mide los frames por segundo de generación del fondo (bucle Python por fila
+frente a la versión vectorizada y cacheada) y, opcionalmente, el tiempo
+total de renderizar un track de 3 minutos a 1080x1920.
+
+Uso:
+    python scripts/bench_video_generator.py [--frames 48] [--render] [--duration 180] [--audio track.mp3]
+
+Con --audio también mide los estilos del visualizador (waveform, bars, circular).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from video_generator.generator import GRADIENT_BOTTOM_COLOR, GRADIENT_TOP_COLOR, VideoGenerator  # noqa: E402
+from video_generator.visualizer import STYLES, AudioVisualizer  # noqa: E402
+
+W, H, FPS = 1080, 1920, 24
+
+
+def legacy_frame(t):
+    """Implementación anterior: recalcula el gradiente fila a fila en cada frame."""
+    top_color = np.array(GRADIENT_TOP_COLOR)
+    bottom_color = np.array(GRADIENT_BOTTOM_COLOR)
+    gradient = np.zeros((H, W, 3), dtype=np.uint8)
+    for y in range(H):
+        ratio = y / H
+        gradient[y] = top_color * (1 - ratio) + bottom_color * ratio
+    return gradient
+
+
+def frames_per_second(get_frame, frames: int) -> float:
+    start = time.perf_counter()
+    for i in range(frames):
+        get_frame(i / FPS)
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=48)
+    parser.add_argument("--render", action="store_true", help="renderiza el video completo con write_videofile")
+    parser.add_argument("--duration", type=float, default=180.0)
+    parser.add_argument("--audio", help="audio para medir el visualizador")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = VideoGenerator(output_dir=tmp, use_cache=False)
+        static = generator._create_gradient_background(W, H, args.duration)
+        animated = generator._create_gradient_background(W, H, args.duration, cycle_frames=FPS * 4, fps=FPS)
+
+        legacy_fps = frames_per_second(legacy_frame, args.frames)
+        print(f"{'variante':<12}{'fps':>12}{'total (s)':>12}")
+        for name, fps in (("legacy", legacy_fps),
+                          ("estático", frames_per_second(static.get_frame, args.frames)),
+                          ("animado", frames_per_second(animated.get_frame, args.frames))):
+            print(f"{name:<12}{fps:>12.1f}{args.duration * FPS / fps:>12.1f}")
+
+        if args.audio:
+            for style in STYLES:
+                start = time.perf_counter()
+                visualizer = AudioVisualizer(args.audio, W, H, style=style, fps=FPS)
+                setup = time.perf_counter() - start
+                fps = frames_per_second(visualizer.make_frame, min(args.frames, visualizer.n_frames))
+                print(f"{style:<12}{fps:>12.1f}{visualizer.n_frames / fps + setup:>12.1f}"
+                      f"  (decode + STFT {setup:.2f}s, audio {visualizer.duration:.0f}s)")
+
+        if args.render:
+            output = os.path.join(tmp, "bench.mp4")
+            start = time.perf_counter()
+            static.write_videofile(output, fps=FPS, codec="libx264", audio=False, logger=None)
+            elapsed = time.perf_counter() - start
+            print(f"render {args.duration:.0f}s a {W}x{H}: {elapsed:.1f}s "
+                  f"({args.duration * FPS / elapsed:.1f} fps de encode)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de los backends de render de VideoGenerator (moviepy vs ffmpeg).
+
+Para cada tipo de video (lyric, visualizer, cover) mide el tiempo total de
+render con el writer de MoviePy y con el encode directo a ffmpeg (pipe de
+frames o `-loop 1` para la portada estática).
+
+Uso:
+    python scripts/bench_video_render.py [--duration 30] [--audio track.mp3] [--cover portada.jpg]
+                                         [--preset veryfast] [--crf 23] [--threads 0]
+
+Sin --audio/--cover se generan un tono y una portada sintéticos.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from video_generator.encoder import FFmpegEncoder  # noqa: E402
+from video_generator.generator import RENDER_BACKENDS, VideoGenerator  # noqa: E402
+
+LYRICS = "\n".join(f"[00:{s:02d}.00]Línea de prueba número {i + 1}" for i, s in enumerate(range(0, 60, 4)))
+
+
+def synthetic_audio(path: str, duration: float, sample_rate: int = 44100):
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    tone = 0.4 * np.sin(2 * np.pi * (110 + 330 * (t % 4) / 4) * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 2 * t))
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((tone * 32767).astype(np.int16).tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--audio")
+    parser.add_argument("--cover")
+    parser.add_argument("--preset", default="veryfast")
+    parser.add_argument("--crf", type=int, default=23)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio = args.audio or os.path.join(tmp, "tone.wav")
+        cover = args.cover or os.path.join(tmp, "cover.jpg")
+        if not args.audio:
+            synthetic_audio(audio, args.duration)
+        if not args.cover:
+            y, x = np.mgrid[0:1200, 0:1200] / 1200.0
+            art = np.dstack([255 * x, 255 * y, 255 * (1 - x * y)]) * (0.75 + 0.25 * np.sin(40 * x * y))[..., None]
+            Image.fromarray(art.astype(np.uint8)).save(cover)
+
+        encoder = FFmpegEncoder(preset=args.preset, crf=args.crf, threads=args.threads)
+        jobs = {
+            "lyric": lambda g, name: g.create_lyric_video(audio, LYRICS, "Bench", "Artist", output_name=name),
+            "visualizer": lambda g, name: g.create_visualizer_video(audio, "Bench", "Artist", "bars",
+                                                                    output_name=name),
+            "cover": lambda g, name: g.create_cover_video(audio, cover, "Bench", "Artist", output_name=name),
+        }
+
+        print(f"{'video':<12}" + "".join(f"{backend:>12}" for backend in RENDER_BACKENDS) + f"{'speedup':>10}")
+        for kind, job in jobs.items():
+            elapsed = {}
+            for backend in RENDER_BACKENDS:
+                generator = VideoGenerator(output_dir=tmp, backend=backend, encoder=encoder, use_cache=False)
+                start = time.perf_counter()
+                try:
+                    job(generator, f"{kind}_{backend}.mp4")
+                    elapsed[backend] = time.perf_counter() - start
+                except Exception as e:
+                    print(f"  {kind}/{backend} falló: {e}")
+            cells = "".join(f"{elapsed[b]:>11.1f}s" if b in elapsed else f"{'error':>12}" for b in RENDER_BACKENDS)
+            speedup = (f"{elapsed['moviepy'] / elapsed['ffmpeg']:>9.1f}x" if len(elapsed) == len(RENDER_BACKENDS)
+                       else f"{'-':>10}")
+            print(f"{kind:<12}{cells}{speedup}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
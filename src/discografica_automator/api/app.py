@@ -1,26 +1,66 @@
 import logging
-from flask import Flask, jsonify, request
-from threading import Thread
+from datetime import datetime
+from flask import Flask, Response, jsonify, request
 
 # Rutas de importación actualizadas
 from discografica_automator.core.database import (
-    get_all_campaigns, get_campaign_by_id, save_campaign, update_campaign_status
+    CampaignStatus, get_campaigns_page, save_campaign, unit_of_work
 )
-from discografica_automator.services import campaign_launcher
+from discografica_automator.services.job_queue import LAUNCH_CAMPAIGN, get_job_queue
 
 # Configuración del logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 app = Flask(__name__)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+def _campaign_json(campaign) -> str:
+    data = campaign.to_dict()
+    data['status'] = data['status'].value if data['status'] else None
+    return app.json.dumps(data)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "message": "API is running"}), 200
 
 @app.route('/api/campaigns', methods=['GET'])
 def list_campaigns():
-    campaigns = get_all_campaigns()
-    return jsonify([campaign.to_dict() for campaign in campaigns])
+    """
+    Lista paginada de campañas (más recientes primero).
+    Query params: limit, cursor, status, artist, created_from, created_to (ISO 8601).
+    El cursor de la página siguiente se devuelve en la cabecera X-Next-Cursor.
+    """
+    args = request.args
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+        if not 0 < limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit debe estar entre 1 y {MAX_PAGE_SIZE}")
+        campaigns, next_cursor = get_campaigns_page(
+            limit=limit,
+            cursor=args.get('cursor'),
+            status=CampaignStatus(args['status']) if args.get('status') else None,
+            artist=args.get('artist'),
+            created_from=_parse_datetime(args.get('created_from')),
+            created_to=_parse_datetime(args.get('created_to')),
+        )
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    def generate():
+        yield '['
+        for i, campaign in enumerate(campaigns):
+            yield (',' if i else '') + _campaign_json(campaign)
+        yield ']'
+
+    response = Response(generate(), mimetype='application/json')
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @app.route('/api/campaign/create', methods=['POST'])
 def create_campaign():
@@ -37,19 +77,24 @@ def create_campaign():
 
 @app.route('/api/campaign/<campaign_id>/launch', methods=['POST'])
 def launch_campaign_endpoint(campaign_id):
-    campaign = get_campaign_by_id(campaign_id)
-    if not campaign:
-        return jsonify({"status": "error", "message": "Campaign not found"}), 404
+    with unit_of_work() as uow:
+        campaign = uow.get(campaign_id)
+        if not campaign:
+            return jsonify({"status": "error", "message": "Campaign not found"}), 404
 
-    if campaign.status not in ["PENDING", "FAILED"]:
-        return jsonify({"status": "error", "message": f"Campaign already {campaign.status}"}), 409
+        if campaign.status not in (CampaignStatus.PENDING, CampaignStatus.FAILED):
+            return jsonify({"status": "error", "message": f"Campaign already {campaign.status.value}"}), 409
 
-    # Lanzar en un hilo para no bloquear la respuesta de la API
-    thread = Thread(target=campaign_launcher.launch_campaign, args=(campaign_id,))
-    thread.start()
-    
-    update_campaign_status(campaign_id, "QUEUED")
-    return jsonify({"status": "success", "message": f"Campaign {campaign_id} queued for launch."})
+        # QUEUED se confirma antes de encolar para que no pise los estados del launcher
+        uow.set_status(campaign, CampaignStatus.QUEUED)
+
+    # La cola persistente ejecuta el lanzamiento en su pool de workers
+    job_id = get_job_queue().enqueue(LAUNCH_CAMPAIGN, {"campaign_id": campaign_id}, key=campaign_id)
+    return jsonify({"status": "success", "message": f"Campaign {campaign_id} queued for launch.", "job_id": job_id})
+
+@app.route('/api/queue/metrics', methods=['GET'])
+def queue_metrics():
+    return jsonify(get_job_queue().metrics())
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080, debug=True)
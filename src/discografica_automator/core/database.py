@@ -1,16 +1,45 @@
 import os
 import uuid
 import enum
-from datetime import datetime
-from sqlalchemy import create_engine, Column, String, DateTime, Enum as SQLAlchemyEnum
-from sqlalchemy.orm import sessionmaker, declarative_base
+import base64
+import logging
+import threading
+import json
+import math
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from sqlalchemy import (
+    create_engine, event, Column, String, DateTime, Enum as SQLAlchemyEnum, Float, ForeignKey, Index, Integer, Text,
+    and_, delete, insert, or_,
+)
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, StaticPool
 from sqlalchemy.sql import func
 
+logger = logging.getLogger(__name__)
+
 # --- Definiciones del Modelo ---
 
-DATABASE_URL = "sqlite:///data/stakazo.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/stakazo.db")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
 Base = declarative_base()
 
+# En SQLite se guarda con el mismo formato que CURRENT_TIMESTAMP (server_default)
+# para que las comparaciones de la paginación por cursor sean exactas.
+_SQLITE_TIMESTAMP_FORMAT = "%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format=_SQLITE_TIMESTAMP_FORMAT), "sqlite"
+)
+
+def _new_campaign_id() -> str:
+    return f"CAMP_{uuid.uuid4().hex[:10].upper()}"
+
 class CampaignStatus(enum.Enum):
     PENDING = "PENDING"
     QUEUED = "QUEUED"
@@ -20,69 +49,658 @@ class CampaignStatus(enum.Enum):
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
 
+# Estados de las etapas del pipeline de lanzamiento. Las etapas se solapan
+# (captions y video corren a la vez), así que el tiempo entre transiciones de
+# estado no mide su duración: cada etapa se cronometra en campaign_stage_runs.
+STAGE_STATUSES = frozenset({
+    CampaignStatus.GENERATING_CAPTIONS, CampaignStatus.GENERATING_VIDEO, CampaignStatus.DISTRIBUTING,
+})
+
 class Campaign(Base):
     __tablename__ = "campaigns"
-    id = Column(String, primary_key=True, default=lambda: f"CAMP_{uuid.uuid4().hex[:10].upper()}")
-    artist = Column(String, nullable=False)
+    id = Column(String, primary_key=True, default=_new_campaign_id)
+    artist = Column(String, nullable=False, index=True)
     track = Column(String, nullable=False)
     video_prompt = Column(String)
-    status = Column(SQLAlchemyEnum(CampaignStatus), default=CampaignStatus.PENDING)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    status = Column(SQLAlchemyEnum(CampaignStatus), default=CampaignStatus.PENDING, index=True)
+    created_at = Column(Timestamp, server_default=func.now(), index=True)
+    updated_at = Column(Timestamp, onupdate=func.now())
+
+    # Recupera created_at/updated_at en el propio INSERT/UPDATE (RETURNING) para
+    # que los objetos sigan siendo legibles tras cerrar la sesión
+    __mapper_args__ = {"eager_defaults": True}
 
     def to_dict(self):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
 
+class CampaignEvent(Base):
+    """
+    Historial append-only de transiciones de estado. duration_seconds es el
+    tiempo que la campaña pasó en from_status antes de esta transición.
+    """
+    __tablename__ = "campaign_events"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String, ForeignKey("campaigns.id"), nullable=False)
+    from_status = Column(SQLAlchemyEnum(CampaignStatus), nullable=True)
+    to_status = Column(SQLAlchemyEnum(CampaignStatus), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    duration_seconds = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_campaign_events_campaign", "campaign_id", "id"),
+        Index("ix_campaign_events_created_stage", "created_at", "from_status"),
+    )
+
+    def to_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+class CampaignPost(Base):
+    """Resultado de publicar una campaña en una plataforma (uno por intento)."""
+    __tablename__ = "campaign_posts"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String, ForeignKey("campaigns.id"), nullable=False, index=True)
+    platform = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    result = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    def to_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+class CampaignCheckpoint(Base):
+    """
+    Salidas de una etapa ya completada de un lanzamiento (captions, ruta y hash
+    del video...), para que un relanzamiento reanude en la primera etapa
+    pendiente en lugar de repetir llamadas al LLM o renders.
+    """
+    __tablename__ = "campaign_checkpoints"
+    campaign_id = Column(String, ForeignKey("campaigns.id"), primary_key=True)
+    stage = Column(String, primary_key=True)
+    outputs = Column(Text, nullable=False)
+    artifact_hash = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+class CampaignStageRun(Base):
+    """Ejecución cronometrada de una etapa del lanzamiento (una por intento completado)."""
+    __tablename__ = "campaign_stage_runs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String, ForeignKey("campaigns.id"), nullable=False, index=True)
+    stage = Column(String, nullable=False)
+    status = Column(SQLAlchemyEnum(CampaignStatus), nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    ended_at = Column(DateTime, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_campaign_stage_runs_ended_status", "ended_at", "status"),
+    )
+
+    def to_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+def _utcnow() -> datetime:
+    # Naive en UTC, igual que los CURRENT_TIMESTAMP que devuelve SQLite
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _transition_event(campaign_id: str, from_status, to_status, entered_at, now) -> Dict:
+    return {
+        "campaign_id": campaign_id,
+        "from_status": from_status,
+        "to_status": to_status,
+        "created_at": now,
+        # Sin duración para los estados de etapa: se miden en campaign_stage_runs
+        "duration_seconds": ((now - entered_at).total_seconds()
+                             if entered_at and from_status not in STAGE_STATUSES else None),
+    }
+
+def _chunked(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _as_status(status) -> CampaignStatus:
+    return status if isinstance(status, CampaignStatus) else CampaignStatus(status)
+
 # --- Conexión y Sesión de Base de Datos ---
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# El engine se crea la primera vez que se usa (una vez por proceso), no al
+# importar el módulo: importar no toca el disco ni la base de datos.
+# expire_on_commit=False: tras un commit los objetos conservan sus atributos y
+# no se recargan perezosamente (ni fallan si ya están desligados de la sesión)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+_engine_options: Dict = {}
+
+def configure_database(url: Optional[str] = None, **engine_options) -> None:
+    """
+    Cambia la URL y/o las opciones del engine (pool_size, max_overflow,
+    pool_pre_ping, poolclass...). Si el engine ya existía se descarta y se
+    recrea en el siguiente uso.
+    """
+    global DATABASE_URL, _engine
+    with _engine_lock:
+        if url is not None:
+            DATABASE_URL = url
+        _engine_options.clear()
+        _engine_options.update(engine_options)
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
 
-def init_db():
-    os.makedirs("data", exist_ok=True)
-    Base.metadata.create_all(bind=engine)
-    print(f"✅ Database initialized: {DATABASE_URL.split('///')[1]}")
+def _build_engine(url: str) -> Engine:
+    parsed = make_url(url)
+    options = {"pool_pre_ping": True}
+    if parsed.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            # Una base en memoria solo existe dentro de su conexión: compartir una
+            options["poolclass"] = StaticPool
+        else:
+            options.update(poolclass=QueuePool, pool_size=DATABASE_POOL_SIZE,
+                           max_overflow=DATABASE_MAX_OVERFLOW)
+    else:
+        options.update(pool_size=DATABASE_POOL_SIZE, max_overflow=DATABASE_MAX_OVERFLOW,
+                       pool_recycle=DATABASE_POOL_RECYCLE)
+    options.update(_engine_options)
+    engine = create_engine(url, **options)
+    if parsed.get_backend_name() == "sqlite":
+        # pysqlite abre la transacción al primer INSERT/UPDATE: un SAVEPOINT
+        # anterior (begin_nested) se confirmaría por su cuenta. La transacción
+        # se abre explícitamente al empezar, como recomienda SQLAlchemy.
+        event.listen(engine, "connect", _sqlite_manual_transactions)
+        event.listen(engine, "begin", _sqlite_begin)
+    if parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:"):
+        # Varios procesos (workers de gunicorn y sus colas) comparten el archivo:
+        # con WAL los sondeos de la cola no bloquean a los escritores
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return engine
+
+def _sqlite_manual_transactions(dbapi_connection, connection_record) -> None:
+    dbapi_connection.isolation_level = None
+
+def _sqlite_begin(conn) -> None:
+    conn.exec_driver_sql("BEGIN")
+
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+def get_engine() -> Engine:
+    """Devuelve el engine del proceso, creándolo e inicializando el esquema la primera vez."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = _build_engine(DATABASE_URL)
+                init_db(engine)
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+def get_session() -> Session:
+    """Nueva sesión ligada al engine del proceso."""
+    get_engine()
+    return SessionLocal()
+
+def _reset_engine_after_fork() -> None:
+    # Los hijos de un fork (workers de gunicorn con preload) no deben reutilizar
+    # las conexiones del padre: se abandonan sin cerrarlas y se abren nuevas.
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_engine_after_fork)
+
+def init_db(bind: Optional[Engine] = None):
+    bind = bind or get_engine()
+    database = bind.url.database if bind.url.get_backend_name() == "sqlite" else None
+    if database and database != ":memory:":
+        dirpath = os.path.dirname(database)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+    Base.metadata.create_all(bind=bind)
+    # create_all no añade índices a tablas ya existentes
+    for table in (Campaign.__table__, CampaignEvent.__table__, CampaignPost.__table__, CampaignCheckpoint.__table__,
+                  CampaignStageRun.__table__):
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    logger.info(f"✅ Database initialized: {bind.url.render_as_string(hide_password=True)}")
 
 # --- Funciones de Acceso a Datos (CRUD) ---
 
 def get_db():
-    db = SessionLocal()
+    db = get_session()
     try:
         yield db
     finally:
         db.close()
 
+class CampaignUnitOfWork:
+    """
+    Unidad de trabajo sobre una única sesión, pensada para compartirse durante
+    todo el ciclo de vida de una campaña (API + launcher). Los cambios de estado
+    se acumulan en la sesión y se escriben juntos en commit(), junto con sus
+    eventos en campaign_events (un único INSERT por lotes); al salir del bloque
+    with se hace commit, o rollback si hubo una excepción.
+    """
+
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session or get_session()
+        self._events: List[Dict] = []
+        self._posts: List[Dict] = []
+        self._stage_runs: List[Dict] = []
+        # Campañas cuyos checkpoints ya están en la sesión (get_checkpoints)
+        self._checkpoints_loaded: set = set()
+        # Momento (ya confirmado) en que cada campaña entró en su estado actual
+        self._entered_at: Dict[str, datetime] = {}
+
+    def __enter__(self) -> "CampaignUnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+        return False
+
+    def get(self, campaign_id: str) -> Optional[Campaign]:
+        # session.get consulta primero el identity map: sin SELECT repetidos
+        return self.session.get(Campaign, campaign_id)
+
+    def add(self, artist: str, track: str, video_prompt: str = "") -> Campaign:
+        campaign = Campaign(id=_new_campaign_id(), artist=artist, track=track, video_prompt=video_prompt)
+        self.session.add(campaign)
+        return campaign
+
+    def set_status(self, campaign, status) -> bool:
+        """Registra una transición (no se escribe hasta commit). Acepta objeto o id."""
+        if not isinstance(campaign, Campaign):
+            campaign = self.get(campaign)
+            if campaign is None:
+                return False
+        status = _as_status(status)
+        if campaign.status != status:
+            now = _utcnow()
+            self._events.append(_transition_event(
+                campaign.id, campaign.status, status, self._entered_at_for(campaign), now
+            ))
+        campaign.status = status
+        return True
+
+    def add_posts(self, campaign_id: str, results: Dict[str, Dict]) -> None:
+        """Registra el resultado por plataforma de una distribución (se escribe en commit)."""
+        now = _utcnow()
+        self._posts.extend(
+            {"campaign_id": campaign_id, "platform": platform, "created_at": now,
+             **{k: outcome.get(k) for k in ("status", "result", "error", "duration_seconds")}}
+            for platform, outcome in results.items()
+        )
+
+    def record_stage(self, campaign_id: str, stage: str, status, started_at: datetime,
+                     duration_seconds: float) -> None:
+        """Registra cuánto duró una etapa del lanzamiento (se escribe en commit)."""
+        self._stage_runs.append({
+            "campaign_id": campaign_id, "stage": stage, "status": _as_status(status), "started_at": started_at,
+            "ended_at": started_at + timedelta(seconds=duration_seconds), "duration_seconds": duration_seconds,
+        })
+
+    def get_checkpoints(self, campaign_id: str) -> Dict[str, CampaignCheckpoint]:
+        rows = self.session.query(CampaignCheckpoint).filter(CampaignCheckpoint.campaign_id == campaign_id)
+        checkpoints = {row.stage: row for row in rows}
+        self._checkpoints_loaded.add(campaign_id)
+        return checkpoints
+
+    def save_checkpoint(self, campaign_id: str, stage: str, outputs: Dict,
+                        artifact_hash: Optional[str] = None) -> None:
+        """Guarda (o reemplaza) las salidas de una etapa; se escribe en commit."""
+        checkpoint = CampaignCheckpoint(
+            campaign_id=campaign_id, stage=stage, outputs=json.dumps(outputs),
+            artifact_hash=artifact_hash, created_at=_utcnow(),
+        )
+        if campaign_id in self._checkpoints_loaded:
+            # merge encuentra los existentes en el identity map; si no está, es nuevo: sin SELECT
+            key = self.session.identity_key(CampaignCheckpoint, (campaign_id, stage))
+            if key not in self.session.identity_map:
+                self.session.add(checkpoint)
+                return
+        self.session.merge(checkpoint)
+
+    def clear_checkpoints(self, campaign_id: str) -> None:
+        self.session.execute(delete(CampaignCheckpoint).where(CampaignCheckpoint.campaign_id == campaign_id))
+
+    def successful_posts(self, campaign_id: str) -> Dict[str, str]:
+        """{plataforma: resultado} de las publicaciones que ya tuvieron éxito."""
+        rows = (
+            self.session.query(CampaignPost.platform, CampaignPost.result)
+            .filter(CampaignPost.campaign_id == campaign_id, CampaignPost.status == "success")
+            .order_by(CampaignPost.id)
+        )
+        return {platform: result for platform, result in rows}
+
+    def _entered_at_for(self, campaign: Campaign) -> Optional[datetime]:
+        for event in reversed(self._events):
+            if event["campaign_id"] == campaign.id:
+                return event["created_at"]
+        return self._entered_at.get(campaign.id) or campaign.updated_at or campaign.created_at
+
+    def commit(self) -> None:
+        if self._events or self._posts or self._stage_runs:
+            # Flush antes del INSERT para que la campaña nueva exista (FK)
+            self.session.flush()
+        # render_nulls: las filas con algún None van en el mismo executemany que el resto
+        if self._events:
+            self.session.execute(insert(CampaignEvent).execution_options(render_nulls=True), self._events)
+        if self._posts:
+            self.session.execute(insert(CampaignPost).execution_options(render_nulls=True), self._posts)
+        if self._stage_runs:
+            self.session.execute(insert(CampaignStageRun), self._stage_runs)
+        self.session.commit()
+        for event in self._events:
+            self._entered_at[event["campaign_id"]] = event["created_at"]
+        self._events = []
+        self._posts = []
+        self._stage_runs = []
+
+    def rollback(self) -> None:
+        self.session.rollback()
+        self._events = []
+        self._posts = []
+        self._stage_runs = []
+
+    def close(self) -> None:
+        self.session.close()
+
+def unit_of_work(session: Optional[Session] = None) -> CampaignUnitOfWork:
+    return CampaignUnitOfWork(session)
+
 def get_all_campaigns():
-    db = SessionLocal()
+    db = get_session()
     campaigns = db.query(Campaign).all()
     db.close()
     return campaigns
 
+def _filtered_campaigns(db, status=None, artist=None, created_from=None, created_to=None):
+    query = db.query(Campaign)
+    if status is not None:
+        query = query.filter(Campaign.status == _as_status(status))
+    if artist is not None:
+        query = query.filter(Campaign.artist == artist)
+    if created_from is not None:
+        query = query.filter(Campaign.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(Campaign.created_at < created_to)
+    return query.order_by(Campaign.created_at.desc(), Campaign.id.desc())
+
+def encode_cursor(campaign: Campaign) -> str:
+    raw = f"{campaign.created_at:%Y-%m-%d %H:%M:%S}|{campaign.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Devuelve (created_at, id) del cursor; ValueError si está mal formado."""
+    try:
+        created_at, campaign_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S"), campaign_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+def iter_campaigns(status=None, artist=None, created_from=None, created_to=None,
+                   batch_size: int = 500) -> Iterator[Campaign]:
+    """
+    Recorre las campañas filtradas (más recientes primero) cargándolas en
+    páginas de batch_size en lugar de materializar la tabla completa. Cada
+    página abre y cierra su sesión: un consumidor lento no retiene conexiones.
+    """
+    cursor = None
+    while True:
+        campaigns, cursor = get_campaigns_page(batch_size, cursor, status, artist, created_from, created_to)
+        yield from campaigns
+        if cursor is None:
+            return
+
+def get_campaigns_page(limit: int = 50, cursor: Optional[str] = None, status=None, artist=None,
+                       created_from=None, created_to=None) -> Tuple[List[Campaign], Optional[str]]:
+    """
+    Página de campañas con paginación por cursor (keyset sobre created_at, id).
+    Devuelve (campañas, next_cursor); next_cursor es None en la última página.
+    """
+    db = get_session()
+    try:
+        query = _filtered_campaigns(db, status, artist, created_from, created_to)
+        if cursor:
+            created_at, campaign_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                Campaign.created_at < created_at,
+                and_(Campaign.created_at == created_at, Campaign.id < campaign_id),
+            ))
+        campaigns = query.limit(limit + 1).all()
+    finally:
+        db.close()
+    next_cursor = encode_cursor(campaigns[limit - 1]) if len(campaigns) > limit else None
+    return campaigns[:limit], next_cursor
+
 def get_campaign_by_id(campaign_id: str):
-    db = SessionLocal()
-    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
-    db.close()
-    return campaign
+    with unit_of_work() as uow:
+        return uow.get(campaign_id)
 
 def save_campaign(artist: str, track: str, video_prompt: str = ""):
-    db = SessionLocal()
-    new_campaign = Campaign(artist=artist, track=track, video_prompt=video_prompt)
-    db.add(new_campaign)
-    db.commit()
-    db.refresh(new_campaign)
-    db.close()
-    return new_campaign
+    with unit_of_work() as uow:
+        return uow.add(artist, track, video_prompt)
 
 def update_campaign_status(campaign_id: str, status: CampaignStatus):
-    db = SessionLocal()
-    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
-    if campaign:
-        campaign.status = status
+    with unit_of_work() as uow:
+        return uow.set_status(campaign_id, status)
+
+# --- Operaciones masivas ---
+
+BULK_CHUNK_SIZE = 500
+
+def _write_chunk(db: Session, write, mappings: List[Dict]) -> List[bool]:
+    """
+    Escribe un lote dentro de un savepoint. Si falla, se deshace y se
+    reintenta fila a fila para saber exactamente qué filas son inválidas,
+    sin abortar la transacción. Devuelve un bool por fila.
+    """
+    if not mappings:
+        return []
+    try:
+        with db.begin_nested():
+            write(mappings)
+        return [True] * len(mappings)
+    except SQLAlchemyError:
+        pass
+    results = []
+    for mapping in mappings:
+        try:
+            with db.begin_nested():
+                write([mapping])
+            results.append(True)
+        except SQLAlchemyError:
+            results.append(False)
+    return results
+
+def save_campaigns(campaigns: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> List[Optional[str]]:
+    """
+    Inserta muchas campañas en una sola transacción con bulk_insert_mappings.
+    Devuelve, por cada entrada, el id asignado o None si la fila es inválida
+    o la base la rechaza (id duplicado, restricción...).
+    """
+    results: List[Optional[str]] = []
+    db = get_session()
+    try:
+        for chunk in _chunked(campaigns, chunk_size):
+            mappings = []
+            for data in chunk:
+                try:
+                    if not data.get("artist") or not data.get("track"):
+                        raise ValueError("artist y track son obligatorios")
+                    mapping = {
+                        "id": data.get("id") or _new_campaign_id(),
+                        "artist": data["artist"],
+                        "track": data["track"],
+                        "video_prompt": data.get("video_prompt", ""),
+                        "status": _as_status(data.get("status", CampaignStatus.PENDING)),
+                    }
+                except (AttributeError, ValueError):
+                    mappings.append(None)
+                    continue
+                mappings.append(mapping)
+            valid = [mapping for mapping in mappings if mapping is not None]
+            inserted = iter(_write_chunk(db, lambda rows: db.bulk_insert_mappings(Campaign, rows), valid))
+            results.extend(mapping["id"] if mapping is not None and next(inserted) else None
+                           for mapping in mappings)
         db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
         db.close()
-        return True
-    db.close()
-    return False
+    return results
+
+def update_statuses(statuses: Mapping[str, CampaignStatus], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, bool]:
+    """
+    Aplica varias transiciones de estado en una sola transacción.
+    Devuelve {campaign_id: bool}; False si no existe, el estado es inválido
+    o la actualización falló.
+    """
+    results: Dict[str, bool] = {}
+    db = get_session()
+    try:
+        for chunk in _chunked(statuses.items(), chunk_size):
+            ids = [campaign_id for campaign_id, _ in chunk]
+            existing = {
+                row.id: row
+                for row in db.query(Campaign.id, Campaign.status, Campaign.updated_at, Campaign.created_at)
+                .filter(Campaign.id.in_(ids))
+            }
+            mappings, transitions = [], []
+            now = _utcnow()
+            for campaign_id, status in chunk:
+                try:
+                    status = _as_status(status)
+                except ValueError:
+                    results[campaign_id] = False
+                    continue
+                current = existing.get(campaign_id)
+                results[campaign_id] = current is not None
+                if current is not None:
+                    mappings.append({"id": campaign_id, "status": status})
+                    transitions.append(None if current.status == status else _transition_event(
+                        campaign_id, current.status, status, current.updated_at or current.created_at, now
+                    ))
+            updated = _write_chunk(db, lambda rows: db.bulk_update_mappings(Campaign, rows), mappings)
+            events = []
+            for mapping, transition, ok in zip(mappings, transitions, updated):
+                results[mapping["id"]] = ok
+                if ok and transition is not None:
+                    events.append(transition)
+            if events:
+                db.execute(insert(CampaignEvent), events)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return results
+
+
+# --- Historial de estados y latencias por etapa ---
+
+def get_campaign_posts(campaign_id: str) -> List[CampaignPost]:
+    """Resultados de publicación por plataforma, en orden cronológico."""
+    db = get_session()
+    try:
+        return (
+            db.query(CampaignPost)
+            .filter(CampaignPost.campaign_id == campaign_id)
+            .order_by(CampaignPost.id)
+            .all()
+        )
+    finally:
+        db.close()
+
+def get_campaign_history(campaign_id: str) -> List[CampaignEvent]:
+    """Transiciones de una campaña en orden cronológico."""
+    db = get_session()
+    try:
+        return (
+            db.query(CampaignEvent)
+            .filter(CampaignEvent.campaign_id == campaign_id)
+            .order_by(CampaignEvent.id)
+            .all()
+        )
+    finally:
+        db.close()
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    # Método nearest-rank
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def get_campaign_stage_runs(campaign_id: str) -> List[CampaignStageRun]:
+    """Etapas cronometradas de una campaña, en orden de inicio."""
+    db = get_session()
+    try:
+        return (
+            db.query(CampaignStageRun)
+            .filter(CampaignStageRun.campaign_id == campaign_id)
+            .order_by(CampaignStageRun.started_at, CampaignStageRun.id)
+            .all()
+        )
+    finally:
+        db.close()
+
+def get_stage_latencies(days: int = 7, now: Optional[datetime] = None) -> Dict[str, Dict[str, Dict]]:
+    """
+    Latencias p50/p95 (segundos) del tiempo pasado en cada estado, por día UTC:
+    {"2025-01-01": {"GENERATING_VIDEO": {"count": 12, "p50": 41.2, "p95": 88.0}}}
+    Las etapas del pipeline (STAGE_STATUSES) salen de campaign_stage_runs; el
+    resto de estados, del tiempo entre transiciones en campaign_events.
+    """
+    since = (now or _utcnow()) - timedelta(days=days)
+    db = get_session()
+    try:
+        rows = (
+            db.query(CampaignEvent.created_at, CampaignEvent.from_status, CampaignEvent.duration_seconds)
+            .filter(
+                CampaignEvent.created_at >= since,
+                CampaignEvent.from_status.isnot(None),
+                CampaignEvent.from_status.notin_(STAGE_STATUSES),
+                CampaignEvent.duration_seconds.isnot(None),
+            )
+            .all()
+        )
+        rows += (
+            db.query(CampaignStageRun.ended_at, CampaignStageRun.status, CampaignStageRun.duration_seconds)
+            .filter(CampaignStageRun.ended_at >= since)
+            .all()
+        )
+    finally:
+        db.close()
+
+    samples: Dict[Tuple[str, str], List[float]] = {}
+    for created_at, stage, duration in rows:
+        samples.setdefault((created_at.date().isoformat(), stage.value), []).append(duration)
 
-# Inicializar la base de datos al importar el módulo
-init_db()
+    latencies: Dict[str, Dict[str, Dict]] = {}
+    for (day, stage), durations in sorted(samples.items()):
+        durations.sort()
+        latencies.setdefault(day, {})[stage] = {
+            "count": len(durations),
+            "p50": _percentile(durations, 50),
+            "p95": _percentile(durations, 95),
+        }
+    return latencies
@@ -11,6 +11,8 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 # URL de nuestra API de backend
 API_URL = "http://localhost:8080/api/campaigns"
+# La tabla solo muestra la primera página; la API pagina por cursor
+PAGE_SIZE = 100
 
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
 app.title = "Panel de Control de Campañas"
@@ -55,7 +57,7 @@ app.layout = html.Div(children=[
 )
 def update_table(n_intervals, n_clicks):
     try:
-        response = requests.get(API_URL)
+        response = requests.get(API_URL, params={'limit': PAGE_SIZE})
         response.raise_for_status()
         data = response.json()
         df = pd.DataFrame(data)
@@ -1,57 +1,144 @@
+import hashlib
+import json
 import logging
 import time
 import os
+from datetime import datetime, timedelta, timezone
 
 # --- Importaciones Corregidas ---
 # Se importan las funciones específicas en lugar de un objeto 'db'
-from discografica_automator.core.database import get_campaign_by_id, update_campaign_status, CampaignStatus
-from discografica_automator.services import copy_generator, video_generator
-from discografica_automator.integrations import meta_poster, tiktok_poster, youtube_uploader
+from discografica_automator.core.database import unit_of_work, CampaignStatus
+from discografica_automator.services import copy_generator, distributor, pipeline, video_generator
 
 # Configuración del logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 DUMMY_MODE = os.getenv('DUMMY_MODE', 'false').lower() in ('true', '1', 't')
 
-def launch_campaign(campaign_id: str):
+def build_launch_stages():
+    """Etapas del lanzamiento con sus entradas/salidas declaradas."""
+    return [
+        pipeline.Stage("captions", copy_generator.generate_captions,
+                       inputs=("track", "artist"), outputs=("captions",),
+                       status=CampaignStatus.GENERATING_CAPTIONS),
+        pipeline.Stage("video", lambda video_prompt: video_generator.generate_video(video_prompt),
+                       inputs=("video_prompt",), outputs=("video_path",),
+                       status=CampaignStatus.GENERATING_VIDEO),
+        pipeline.Stage("distribute", _distribute_pending,
+                       inputs=("video_path", "captions", "title", "already_posted"), outputs=("post_results",),
+                       status=CampaignStatus.DISTRIBUTING),
+    ]
+
+def _distribute_pending(video_path: str, captions: dict, title: str, already_posted: dict) -> dict:
+    """Publica solo en las plataformas que aún no tienen una publicación con éxito."""
+    pending = {platform: caption for platform, caption in captions.items() if platform not in already_posted}
+    if len(pending) < len(captions):
+        logging.info(f"Ya publicado en {', '.join(sorted(already_posted))}; se omite")
+    return distributor.distribute(video_path, pending, title)
+
+def _file_sha256(path: str):
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except (OSError, TypeError):
+        return None
+    return digest.hexdigest()
+
+def _load_checkpoints(uow, campaign_id: str) -> dict:
+    """Salidas de etapas ya completadas; el video solo cuenta si el archivo sigue intacto."""
+    completed = {}
+    for stage, checkpoint in uow.get_checkpoints(campaign_id).items():
+        outputs = json.loads(checkpoint.outputs)
+        if checkpoint.artifact_hash and _file_sha256(outputs.get("video_path")) != checkpoint.artifact_hash:
+            logging.warning(f"Campaña {campaign_id}: el artefacto de '{stage}' falta o cambió; se regenera")
+            continue
+        completed[stage] = outputs
+    return completed
+
+def launch_campaign(campaign_id: str, raise_errors: bool = False):
     """
     Orquesta el ciclo de vida completo de una campaña.
+    Usa una única unidad de trabajo (una sesión) para todo el lanzamiento.
+    Con raise_errors=True la excepción se propaga tras marcar FAILED (la cola
+    de trabajos la usa para decidir si reintenta).
     """
     logging.info(f"Iniciando lanzamiento de campaña: {campaign_id}")
-    campaign = get_campaign_by_id(campaign_id)
-    if not campaign:
-        logging.error(f"Campaña {campaign_id} no encontrada al iniciar el lanzamiento.")
-        return
+    with unit_of_work() as uow:
+        campaign = uow.get(campaign_id)
+        if not campaign:
+            logging.error(f"Campaña {campaign_id} no encontrada al iniciar el lanzamiento.")
+            return
 
-    try:
-        # 1. Generar copys
-        update_campaign_status(campaign_id, CampaignStatus.GENERATING_CAPTIONS)
-        logging.info(f"Generando captions para la campaña {campaign_id}...")
-        captions = copy_generator.generate_captions(campaign.track, campaign.artist)
-        logging.info(f"Captions generados para {campaign_id}: {captions}")
-
-        # 2. Generar video
-        update_campaign_status(campaign_id, CampaignStatus.GENERATING_VIDEO)
-        logging.info(f"Generando video para la campaña {campaign_id}...")
-        video_path = video_generator.generate_video(campaign.video_prompt)
-        logging.info(f"Video generado para {campaign_id} en: {video_path}")
-
-        # 3. Distribuir en plataformas
-        update_campaign_status(campaign_id, CampaignStatus.DISTRIBUTING)
-        for platform, caption in captions.items():
-            logging.info(f"Distribuyendo en la plataforma: {platform}")
-            if platform == "instagram" or platform == "facebook":
-                meta_poster.post_to_meta(platform, video_path, caption)
-            elif platform == "tiktok":
-                tiktok_poster.post_to_tiktok(video_path, caption)
-            elif platform == "youtube":
-                youtube_uploader.upload_video(video_path, f"{campaign.artist} - {campaign.track}", caption)
-        
-        # 4. Marcar como completado
-        update_campaign_status(campaign_id, CampaignStatus.COMPLETED)
-        logging.info(f"Lanzamiento de campaña '{campaign_id}' completado exitosamente.")
-
-    except Exception as e:
-        logging.error(f"Error catastrófico durante el lanzamiento de la campaña {campaign_id}: {e}", exc_info=True)
-        update_campaign_status(campaign_id, CampaignStatus.FAILED)
+        def on_stage_start(stage):
+            # Sin commit propio: el estado se escribe con el checkpoint de la próxima etapa que termine
+            uow.set_status(campaign, stage.status)
+            logging.info(f"Campaña {campaign_id}: iniciando etapa '{stage.name}'")
+
+        stage_timings = {}
+
+        def record_stage_timings():
+            # Las etapas se solapan: su duración sale del pipeline, no de las transiciones de estado.
+            # Se escriben juntas con el commit final (no suman sentencias a cada checkpoint)
+            for stage, timing in stage_timings.items():
+                uow.record_stage(campaign_id, stage.name, stage.status,
+                                 launched_at + timedelta(seconds=timing["start"]), timing["duration"])
+            stage_timings.clear()
+
+        def on_stage_complete(stage, outputs, timing):
+            stage_timings[stage] = timing
+            # Checkpoint por etapa, en el mismo commit que los estados y tiempos pendientes;
+            # la distribución queda registrada en campaign_posts con el estado final
+            if stage.name == "distribute":
+                return
+            artifact_hash = _file_sha256(outputs["video_path"]) if stage.name == "video" else None
+            uow.save_checkpoint(campaign_id, stage.name, outputs, artifact_hash)
+            uow.commit()
+
+        try:
+            # Captions y video son independientes y se generan a la vez;
+            # la distribución espera a ambos. Un relanzamiento reanuda desde
+            # la primera etapa sin checkpoint.
+            already_posted = uow.successful_posts(campaign_id)
+            launched_at = datetime.now(timezone.utc).replace(tzinfo=None)  # UTC naive, como en la base
+            run = pipeline.run_pipeline(
+                build_launch_stages(),
+                initial={
+                    "track": campaign.track,
+                    "artist": campaign.artist,
+                    "video_prompt": campaign.video_prompt,
+                    "title": f"{campaign.artist} - {campaign.track}",
+                    "already_posted": already_posted,
+                },
+                on_stage_start=on_stage_start,
+                on_stage_complete=on_stage_complete,
+                completed=_load_checkpoints(uow, campaign_id),
+            )
+            results = run["outputs"]["post_results"]
+            uow.add_posts(campaign_id, results)
+            failed = [p for p, r in results.items() if r["status"] in (distributor.FAILED, distributor.TIMEOUT)]
+            succeeded = already_posted or any(r["status"] == distributor.SUCCESS for r in results.values())
+            record_stage_timings()
+            if failed and not succeeded:
+                # Los intentos fallidos se registran igualmente (el rollback de abajo no los descarta)
+                uow.set_status(campaign, CampaignStatus.FAILED)
+                uow.commit()
+                raise RuntimeError(f"La distribución falló en todas las plataformas: {', '.join(failed)}")
+            if failed:
+                logging.warning(f"Campaña {campaign_id}: distribución incompleta, fallaron: {', '.join(failed)}")
+
+            # 4. Marcar como completado (un único commit al salir, con publicaciones y tiempos).
+            # Los checkpoints solo sirven para reanudar: un relanzamiento posterior empieza de cero
+            uow.clear_checkpoints(campaign_id)
+            uow.set_status(campaign, CampaignStatus.COMPLETED)
+            logging.info(f"Lanzamiento de campaña '{campaign_id}' completado exitosamente.")
 
+        except Exception as e:
+            logging.error(f"Error catastrófico durante el lanzamiento de la campaña {campaign_id}: {e}", exc_info=True)
+            uow.rollback()
+            record_stage_timings()
+            uow.set_status(campaign, CampaignStatus.FAILED)
+            if raise_errors:
+                uow.commit()
+                raise
@@ -64,3 +64,7 @@ class CopyGenerator:
             return ["#music", "#newmusic", f"#{genre}", "#viral"]
 
 copy_generator = CopyGenerator()
+
+def generate_captions(track: str, artist: str, genre: str = "trap") -> dict:
+    """Atajo a nivel de módulo usado por el launcher."""
+    return copy_generator.generate_captions(track, artist, genre)
@@ -0,0 +1,103 @@
+"""
+Distribución de un video en varias plataformas en paralelo.
+
+Cada plataforma tiene su propio pool de hilos, cuyo tamaño es el límite de
+subidas simultáneas a esa plataforma en todo el proceso (compartido entre
+campañas). Cada subida tiene un timeout y su resultado se registra por
+separado: el fallo de una plataforma no afecta al resto.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Dict
+
+from discografica_automator.integrations import meta_poster, tiktok_poster, youtube_uploader
+
+logger = logging.getLogger(__name__)
+
+# Subidas simultáneas por plataforma (por proceso)
+PLATFORM_CONCURRENCY = {
+    "instagram": int(os.getenv("INSTAGRAM_MAX_CONCURRENCY", "2")),
+    "facebook": int(os.getenv("FACEBOOK_MAX_CONCURRENCY", "2")),
+    "tiktok": int(os.getenv("TIKTOK_MAX_CONCURRENCY", "2")),
+    "youtube": int(os.getenv("YOUTUBE_MAX_CONCURRENCY", "1")),
+}
+DISTRIBUTION_TIMEOUT = float(os.getenv("DISTRIBUTION_TIMEOUT", "600"))
+
+SUCCESS = "success"
+FAILED = "failed"
+TIMEOUT = "timeout"
+SKIPPED = "skipped"
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _executor_for(platform: str) -> ThreadPoolExecutor:
+    with _executors_lock:
+        if platform not in _executors:
+            _executors[platform] = ThreadPoolExecutor(
+                max_workers=max(1, PLATFORM_CONCURRENCY.get(platform, 1)),
+                thread_name_prefix=f"upload-{platform}",
+            )
+        return _executors[platform]
+
+
+def _post(platform: str, video_path: str, caption: str, title: str):
+    if platform in ("instagram", "facebook"):
+        return meta_poster.post_to_meta(platform, video_path, caption)
+    if platform == "tiktok":
+        return tiktok_poster.post_to_tiktok(video_path, caption)
+    if platform == "youtube":
+        return youtube_uploader.upload_video(video_path, title, caption)
+    raise LookupError(platform)
+
+
+def _timed_post(platform: str, video_path: str, caption: str, title: str):
+    start = time.monotonic()
+    result = _post(platform, video_path, caption, title)
+    return result, time.monotonic() - start
+
+
+def _serialize(result) -> str:
+    return result if isinstance(result, str) else json.dumps(result, default=str)
+
+
+def distribute(video_path: str, captions: Dict[str, str], title: str,
+               timeout: float = DISTRIBUTION_TIMEOUT) -> Dict[str, Dict]:
+    """
+    Publica el video en todas las plataformas de `captions` a la vez.
+
+    Devuelve {plataforma: {"status", "result", "error", "duration_seconds"}}
+    con status success/failed/timeout/skipped. El timeout es el plazo total
+    desde el envío, incluida la espera por el límite de concurrencia.
+    """
+    submitted = time.monotonic()
+    futures, results = {}, {}
+    for platform, caption in captions.items():
+        if platform not in PLATFORM_CONCURRENCY:
+            logger.warning(f"Plataforma desconocida, se omite: {platform}")
+            results[platform] = {"status": SKIPPED, "result": None, "error": None, "duration_seconds": 0.0}
+            continue
+        logger.info(f"Distribuyendo en la plataforma: {platform}")
+        futures[platform] = _executor_for(platform).submit(_timed_post, platform, video_path, caption, title)
+
+    for platform, future in futures.items():
+        remaining = max(0.0, timeout - (time.monotonic() - submitted))
+        try:
+            result, duration = future.result(timeout=remaining)
+            results[platform] = {"status": SUCCESS, "result": _serialize(result), "error": None,
+                                 "duration_seconds": duration}
+        except FuturesTimeout:
+            future.cancel()
+            logger.error(f"Timeout publicando en {platform} tras {timeout:.0f}s")
+            results[platform] = {"status": TIMEOUT, "result": None, "error": f"timeout tras {timeout:.0f}s",
+                                 "duration_seconds": time.monotonic() - submitted}
+        except Exception as e:
+            logger.error(f"Error publicando en {platform}: {e}")
+            results[platform] = {"status": FAILED, "result": None, "error": str(e),
+                                 "duration_seconds": time.monotonic() - submitted}
+    return results
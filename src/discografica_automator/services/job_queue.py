@@ -0,0 +1,469 @@
+"""
+Cola de trabajos persistente (SQLite/SQLAlchemy) con un pool acotado de workers.
+
+Sustituye al "un hilo por lanzamiento": los trabajos se guardan en la tabla
+jobs antes de ejecutarse, así que sobreviven a reinicios del proceso.
+
+- Concurrencia configurable (JOB_QUEUE_CONCURRENCY).
+- Visibility timeout: un trabajo reclamado que no termina ni renueva su
+  visibilidad vuelve a ser reclamable por cualquier worker.
+- Reintentos con backoff exponencial hasta max_attempts; al fallar
+  definitivamente se avisa al handler de fallo del tipo (el lanzamiento
+  marca la campaña FAILED).
+- Sondeo con espera creciente mientras la cola está vacía.
+- recover(): reencola los trabajos de procesos muertos y las campañas que
+  quedaron en QUEUED/GENERATING_*/DISTRIBUTING sin trabajo activo (ni un
+  último trabajo fallido). Al arrancar la ejecuta un solo proceso: el que
+  toma el lease "recover".
+"""
+import enum
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import (
+    Column, DateTime, Enum as SQLAlchemyEnum, Index, Integer, String, Text, func, insert, or_, select, text, update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from discografica_automator.core.database import Base, Campaign, CampaignStatus, get_engine
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_CONCURRENCY = int(os.getenv("JOB_QUEUE_CONCURRENCY", "4"))
+VISIBILITY_TIMEOUT = float(os.getenv("JOB_QUEUE_VISIBILITY_TIMEOUT", "900"))
+POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = float(os.getenv("JOB_QUEUE_MAX_POLL_INTERVAL", "10"))
+# Los workers de gunicorn arrancan a la vez: solo el primero en este plazo recupera
+RECOVERY_LEASE_SECONDS = float(os.getenv("JOB_QUEUE_RECOVERY_LEASE", "60"))
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 300.0
+
+LAUNCH_CAMPAIGN = "launch_campaign"
+
+# Estados de campaña que indican un lanzamiento en curso
+IN_FLIGHT_STATUSES = (
+    CampaignStatus.QUEUED,
+    CampaignStatus.GENERATING_CAPTIONS,
+    CampaignStatus.GENERATING_VIDEO,
+    CampaignStatus.DISTRIBUTING,
+)
+
+
+class JobStatus(enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+ACTIVE_JOB_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    # Clave de deduplicación: como mucho un trabajo activo por (kind, key)
+    key = Column(String, nullable=True)
+    payload = Column(Text, nullable=False, default="{}")
+    status = Column(SQLAlchemyEnum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=MAX_ATTEMPTS)
+    # Un trabajo es reclamable cuando visible_at <= ahora (cola, backoff o timeout)
+    visible_at = Column(DateTime, nullable=False)
+    worker_id = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_jobs_status_visible", "status", "visible_at"),
+        # Garantiza la deduplicación también entre procesos
+        Index(
+            "ux_jobs_active_key", "kind", "key", unique=True,
+            sqlite_where=text("status IN ('QUEUED', 'RUNNING')"),
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')"),
+        ),
+    )
+
+
+class JobLease(Base):
+    """Lock con caducidad entre procesos (p.ej. quién ejecuta recover)."""
+    __tablename__ = "job_leases"
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(1.0, 1.1)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    Cola persistente + pool de `concurrency` hilos worker.
+    Los handlers se registran por tipo de trabajo y reciben el payload (dict);
+    si lanzan una excepción el trabajo se reintenta con backoff. Los
+    failure_handlers(payload, error) se llaman cuando un trabajo falla
+    definitivamente.
+    """
+
+    def __init__(
+        self,
+        handlers: Optional[Dict[str, Callable[[Dict], None]]] = None,
+        concurrency: int = JOB_QUEUE_CONCURRENCY,
+        visibility_timeout: float = VISIBILITY_TIMEOUT,
+        poll_interval: float = POLL_INTERVAL,
+        failure_handlers: Optional[Dict[str, Callable[[Dict, str], None]]] = None,
+        max_poll_interval: float = MAX_POLL_INTERVAL,
+    ):
+        self.handlers: Dict[str, Callable[[Dict], None]] = dict(handlers or {})
+        self.failure_handlers: Dict[str, Callable[[Dict, str], None]] = dict(failure_handlers or {})
+        self.concurrency = max(1, concurrency)
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(poll_interval, max_poll_interval)
+        self.engine = get_engine()
+        for table in (Job.__table__, JobLease.__table__):
+            table.create(bind=self.engine, checkfirst=True)
+        for index in Job.__table__.indexes:
+            index.create(bind=self.engine, checkfirst=True)
+
+        self._host = socket.gethostname()
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Condition()
+        self._lock = threading.Lock()
+        self._running: Dict[int, str] = {}  # job_id -> worker_id
+        self._busy_seconds = 0.0
+        self._started_at: Optional[float] = None
+        self._counters = {"processed": 0, "succeeded": 0, "retried": 0, "failed": 0}
+
+    # --- API pública ---
+
+    def register(self, kind: str, handler: Callable[[Dict], None],
+                 on_failure: Optional[Callable[[Dict, str], None]] = None) -> None:
+        self.handlers[kind] = handler
+        if on_failure:
+            self.failure_handlers[kind] = on_failure
+
+    def enqueue(self, kind: str, payload: Optional[Dict] = None, key: Optional[str] = None,
+                max_attempts: int = MAX_ATTEMPTS, delay: float = 0.0) -> int:
+        """Encola un trabajo y devuelve su id (el existente si ya hay uno activo con la misma key)."""
+        now = _utcnow()
+        try:
+            with self.engine.begin() as conn:
+                job_id = conn.execute(
+                    Job.__table__.insert().values(
+                        kind=kind, key=key, payload=json.dumps(payload or {}), status=JobStatus.QUEUED,
+                        attempts=0, max_attempts=max_attempts, visible_at=now + timedelta(seconds=delay),
+                        created_at=now, updated_at=now,
+                    )
+                ).inserted_primary_key[0]
+        except IntegrityError:
+            with self.engine.connect() as conn:
+                existing = conn.execute(
+                    select(Job.id).where(Job.kind == kind, Job.key == key, Job.status.in_(ACTIVE_JOB_STATUSES))
+                ).scalar()
+            if existing is None:
+                raise
+            return existing
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def start(self) -> "JobQueue":
+        if self._threads:
+            return self
+        self._stop.clear()
+        self._started_at = time.monotonic()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._worker_loop, args=(i,), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        logger.info(f"JobQueue iniciada con {self.concurrency} workers")
+        return self
+
+    def stop(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join(timeout)
+        self._threads = []
+
+    def try_lease(self, name: str, ttl: float) -> bool:
+        """
+        Toma el lease `name` durante `ttl` segundos si está libre, caducado o
+        ya era de este proceso. Entre procesos solo uno lo consigue.
+        """
+        now = _utcnow()
+        holder = f"{self._host}:{os.getpid()}"
+        expires_at = now + timedelta(seconds=ttl)
+        with self.engine.begin() as conn:
+            taken = conn.execute(
+                update(JobLease)
+                .where(JobLease.name == name, or_(JobLease.expires_at <= now, JobLease.holder == holder))
+                .values(holder=holder, expires_at=expires_at)
+            ).rowcount
+        if taken:
+            return True
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(JobLease).values(name=name, holder=holder, expires_at=expires_at))
+        except IntegrityError:
+            return False
+        return True
+
+    def recover(self) -> Dict[str, int]:
+        """
+        Recuperación tras caída: devuelve a la cola los trabajos RUNNING de
+        procesos de este host que ya no existen y encola un lanzamiento para
+        cada campaña en curso que no tenga trabajo activo. Las campañas cuyo
+        último lanzamiento falló definitivamente no se relanzan: los
+        reintentos los decide max_attempts, no cada arranque.
+        """
+        requeued = 0
+        now = _utcnow()
+        with self.engine.begin() as conn:
+            running = conn.execute(
+                select(Job.id, Job.worker_id).where(Job.status == JobStatus.RUNNING)
+            ).all()
+            dead = []
+            for job_id, worker_id in running:
+                host, _, rest = (worker_id or "").partition(":")
+                pid = rest.split(":", 1)[0]
+                if host == self._host and pid.isdigit() and not _pid_alive(int(pid)):
+                    dead.append(job_id)
+            if dead:
+                requeued = conn.execute(
+                    update(Job).where(Job.id.in_(dead), Job.status == JobStatus.RUNNING)
+                    .values(status=JobStatus.QUEUED, visible_at=now, worker_id=None, updated_at=now)
+                ).rowcount
+
+            active_keys = select(Job.key).where(Job.kind == LAUNCH_CAMPAIGN, Job.status.in_(ACTIVE_JOB_STATUSES))
+            newer = aliased(Job)
+            failed_keys = select(Job.key).where(
+                Job.kind == LAUNCH_CAMPAIGN, Job.status == JobStatus.FAILED,
+                ~select(newer.id).where(newer.kind == Job.kind, newer.key == Job.key, newer.id > Job.id).exists(),
+            )
+            orphans = conn.execute(
+                select(Campaign.id).where(
+                    Campaign.status.in_(IN_FLIGHT_STATUSES),
+                    Campaign.id.notin_(active_keys),
+                    Campaign.id.notin_(failed_keys),
+                )
+            ).scalars().all()
+        for campaign_id in orphans:
+            self.enqueue(LAUNCH_CAMPAIGN, {"campaign_id": campaign_id}, key=campaign_id)
+        if requeued or orphans:
+            logger.warning(f"JobQueue recover: {requeued} trabajos reencolados, {len(orphans)} campañas relanzadas")
+        return {"requeued_jobs": requeued, "relaunched_campaigns": len(orphans)}
+
+    def metrics(self) -> Dict:
+        """Profundidad de la cola por estado y utilización del pool de workers."""
+        with self.engine.connect() as conn:
+            by_status = dict(conn.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+            ready = conn.execute(
+                select(func.count()).where(Job.status == JobStatus.QUEUED, Job.visible_at <= _utcnow())
+            ).scalar()
+        with self._lock:
+            busy = len(self._running)
+            busy_seconds = self._busy_seconds
+            counters = dict(self._counters)
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "depth": {status.value: by_status.get(status, 0) for status in JobStatus},
+            "ready": ready,
+            "workers": self.concurrency,
+            "busy_workers": busy,
+            "utilization": busy_seconds / (elapsed * self.concurrency) if elapsed else 0.0,
+            **counters,
+        }
+
+    # --- Internos ---
+
+    def _claim(self, worker_id: str) -> Optional[Dict]:
+        now = _utcnow()
+        candidate = (
+            select(Job.id)
+            .where(Job.status.in_(ACTIVE_JOB_STATUSES), Job.visible_at <= now)
+            .order_by(Job.visible_at, Job.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(Job)
+            .where(Job.id == candidate)
+            .values(
+                status=JobStatus.RUNNING, attempts=Job.attempts + 1, worker_id=worker_id,
+                visible_at=now + timedelta(seconds=self.visibility_timeout), updated_at=now,
+            )
+            .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+        )
+        with self.engine.begin() as conn:
+            row = conn.execute(stmt).first()
+        return dict(row._mapping) if row else None
+
+    def _finish(self, job: Dict, worker_id: str, status: JobStatus, error: Optional[str] = None,
+                delay: float = 0.0) -> None:
+        now = _utcnow()
+        with self.engine.begin() as conn:
+            # Solo si el trabajo sigue siendo nuestro (no lo ha reclamado otro tras un timeout)
+            conn.execute(
+                update(Job)
+                .where(Job.id == job["id"], Job.worker_id == worker_id, Job.attempts == job["attempts"])
+                .values(status=status, last_error=error, updated_at=now,
+                        visible_at=now + timedelta(seconds=delay),
+                        worker_id=worker_id if status != JobStatus.QUEUED else None)
+            )
+
+    def _fail(self, job: Dict, worker_id: str, error: str) -> None:
+        self._finish(job, worker_id, JobStatus.FAILED, error)
+        with self._lock:
+            self._counters["failed"] += 1
+        on_failure = self.failure_handlers.get(job["kind"])
+        if on_failure:
+            try:
+                on_failure(json.loads(job["payload"]), error)
+            except Exception as e:
+                logger.error(f"Trabajo {job['id']} ({job['kind']}): error en el handler de fallo: {e}")
+
+    def _run(self, job: Dict, worker_id: str) -> None:
+        if job["attempts"] > job["max_attempts"]:
+            # Reclamado de nuevo tras agotar visibilidad demasiadas veces
+            self._fail(job, worker_id, "visibility timeout excedido")
+            return
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            # Reintentar no sirve de nada: ningún worker de este proceso sabe ejecutarlo
+            error = f"Sin handler para el tipo de trabajo '{job['kind']}'"
+            logger.error(f"Trabajo {job['id']}: {error}")
+            self._fail(job, worker_id, error)
+            return
+        try:
+            handler(json.loads(job["payload"]))
+        except Exception as e:
+            if job["attempts"] < job["max_attempts"]:
+                delay = _backoff(job["attempts"])
+                logger.warning(f"Trabajo {job['id']} ({job['kind']}) falló, reintento en {delay:.0f}s: {e}")
+                self._finish(job, worker_id, JobStatus.QUEUED, str(e), delay)
+                with self._lock:
+                    self._counters["retried"] += 1
+            else:
+                logger.error(f"Trabajo {job['id']} ({job['kind']}) falló definitivamente: {e}")
+                self._fail(job, worker_id, str(e))
+        else:
+            self._finish(job, worker_id, JobStatus.DONE)
+            with self._lock:
+                self._counters["succeeded"] += 1
+
+    def _worker_loop(self, index: int) -> None:
+        worker_id = f"{self._host}:{os.getpid()}:{index}"
+        idle_wait = self.poll_interval
+        while not self._stop.is_set():
+            try:
+                job = self._claim(worker_id)
+            except Exception as e:
+                logger.error(f"JobQueue: error reclamando trabajo: {e}")
+                job = None
+            if job is None:
+                # Cola vacía: se sondea cada vez menos (enqueue en este proceso despierta al momento)
+                with self._wakeup:
+                    self._wakeup.wait(idle_wait)
+                idle_wait = min(idle_wait * 2, self.max_poll_interval)
+                continue
+            idle_wait = self.poll_interval
+            started = time.monotonic()
+            with self._lock:
+                self._running[job["id"]] = worker_id
+            try:
+                self._run(job, worker_id)
+            finally:
+                with self._lock:
+                    self._running.pop(job["id"], None)
+                    self._busy_seconds += time.monotonic() - started
+                    self._counters["processed"] += 1
+
+    def _heartbeat_loop(self) -> None:
+        # Renueva la visibilidad de los trabajos en curso para que un
+        # lanzamiento largo no se considere abandonado
+        interval = self.visibility_timeout / 3
+        while not self._stop.wait(interval):
+            with self._lock:
+                running = dict(self._running)
+            if not running:
+                continue
+            visible_at = _utcnow() + timedelta(seconds=self.visibility_timeout)
+            try:
+                with self.engine.begin() as conn:
+                    for job_id, worker_id in running.items():
+                        conn.execute(
+                            update(Job).where(Job.id == job_id, Job.worker_id == worker_id,
+                                              Job.status == JobStatus.RUNNING)
+                            .values(visible_at=visible_at)
+                        )
+            except Exception as e:
+                logger.error(f"JobQueue: error renovando visibilidad: {e}")
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def _launch_campaign_handler(payload: Dict) -> None:
+    from discografica_automator.services import campaign_launcher
+    campaign_launcher.launch_campaign(payload["campaign_id"], raise_errors=True)
+
+
+def _launch_campaign_failed(payload: Dict, error: str) -> None:
+    # Sin esto una campaña cuyo trabajo agotó los intentos seguiría "en curso"
+    from discografica_automator.core.database import unit_of_work
+    with unit_of_work() as uow:
+        campaign = uow.get(payload["campaign_id"])
+        if campaign is not None and campaign.status in IN_FLIGHT_STATUSES:
+            uow.set_status(campaign, CampaignStatus.FAILED)
+
+
+def get_job_queue() -> JobQueue:
+    """Cola del proceso: se crea y arranca en el primer uso (y recupera, si es el líder)."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                queue = JobQueue(
+                    handlers={LAUNCH_CAMPAIGN: _launch_campaign_handler},
+                    failure_handlers={LAUNCH_CAMPAIGN: _launch_campaign_failed},
+                )
+                if queue.try_lease("recover", RECOVERY_LEASE_SECONDS):
+                    queue.recover()
+                _queue = queue.start()
+    return _queue
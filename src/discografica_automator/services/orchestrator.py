@@ -39,8 +39,8 @@ class MLOrchestrator:
         """
         Analiza el video con YOLO/Ultralytics y genera un prompt y metadatos adaptados al estilo detectado.
         """
-        from ml_engine.vision.yolo_analyzer import YOLOAnalyzer
-        analyzer = YOLOAnalyzer(use_coco=use_coco)
+        from ml_engine.vision.yolo_analyzer import get_yolo_analyzer
+        analyzer = get_yolo_analyzer(use_coco=use_coco)
         analysis = analyzer.analyze_video(video_path, use_coco=use_coco)
         style = analysis.get("scene_type", "general")
         viral_elements = analysis.get("viral_elements", [])
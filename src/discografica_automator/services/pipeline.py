@@ -0,0 +1,185 @@
+"""
+Ejecutor de pipelines como DAG.
+
+Cada etapa declara qué valores necesita (inputs) y cuáles produce (outputs);
+el ejecutor lanza en paralelo todas las etapas cuyas entradas ya están
+disponibles y, al terminar, calcula el camino crítico a partir de los
+tiempos reales de cada etapa.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    """Error de definición del pipeline o fallo de una etapa (ver `stage`)."""
+
+    def __init__(self, message: str, stage: Optional[str] = None):
+        super().__init__(message)
+        self.stage = stage
+
+
+class Stage:
+    """
+    Etapa del pipeline. `func` recibe las entradas como argumentos por nombre
+    y devuelve un dict con las salidas (o el valor directamente si declara
+    una única salida). `status` es opcional y se pasa a on_stage_start.
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str] = (),
+                 outputs: Sequence[str] = (), status=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.status = status
+
+    def run(self, values: Dict) -> Dict:
+        result = self.func(**{name: values[name] for name in self.inputs})
+        if len(self.outputs) == 1 and not (isinstance(result, dict) and self.outputs[0] in result):
+            return {self.outputs[0]: result}
+        missing = [name for name in self.outputs if name not in (result or {})]
+        if missing:
+            raise PipelineError(f"La etapa '{self.name}' no produjo: {', '.join(missing)}", self.name)
+        return {name: result[name] for name in self.outputs}
+
+
+def _dependencies(stages: Sequence[Stage], initial: Iterable[str]) -> Dict[str, List[str]]:
+    """Valida el DAG y devuelve, por etapa, las etapas de las que depende."""
+    producers: Dict[str, str] = {name: None for name in initial}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise PipelineError(f"'{output}' tiene más de un productor", stage.name)
+            producers[output] = stage.name
+    deps = {}
+    for stage in stages:
+        missing = [name for name in stage.inputs if name not in producers]
+        if missing:
+            raise PipelineError(f"La etapa '{stage.name}' necesita entradas sin productor: {', '.join(missing)}",
+                                stage.name)
+        deps[stage.name] = sorted({producers[name] for name in stage.inputs if producers[name]})
+
+    # Detección de ciclos (Kahn)
+    pending = {name: set(d) for name, d in deps.items()}
+    while pending:
+        ready = [name for name, d in pending.items() if not d]
+        if not ready:
+            raise PipelineError(f"Ciclo entre etapas: {', '.join(sorted(pending))}")
+        for name in ready:
+            del pending[name]
+        for d in pending.values():
+            d.difference_update(ready)
+    return deps
+
+
+def _critical_path(deps: Dict[str, List[str]], timings: Dict[str, Dict]) -> List[str]:
+    """Desde la etapa que termina última, retrocede por la dependencia que terminó más tarde."""
+    if not timings:
+        return []
+    current = max(timings, key=lambda name: timings[name]["end"])
+    path = [current]
+    while deps[current]:
+        current = max(deps[current], key=lambda name: timings[name]["end"])
+        path.append(current)
+    return path[::-1]
+
+
+def _reusable(stages: Sequence[Stage], deps: Dict[str, List[str]], completed: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Salidas ya calculadas que se pueden reutilizar: solo si todas sus dependencias también lo son."""
+    reusable: Dict[str, Dict] = {}
+    remaining = [stage for stage in stages if stage.name in completed]
+    progress = True
+    while progress:
+        progress = False
+        for stage in list(remaining):
+            if all(d in reusable for d in deps[stage.name]):
+                outputs = completed[stage.name] or {}
+                if all(name in outputs for name in stage.outputs):
+                    reusable[stage.name] = {name: outputs[name] for name in stage.outputs}
+                remaining.remove(stage)
+                progress = True
+    return reusable
+
+
+def run_pipeline(stages: Sequence[Stage], initial: Optional[Dict] = None, max_workers: Optional[int] = None,
+                 on_stage_start: Optional[Callable[[Stage], None]] = None,
+                 completed: Optional[Dict[str, Dict]] = None,
+                 on_stage_complete: Optional[Callable[[Stage, Dict, Dict], None]] = None) -> Dict:
+    """
+    Ejecuta las etapas respetando sus dependencias, en paralelo cuando es posible.
+
+    on_stage_start y on_stage_complete(stage, outputs, timing) se invocan en el
+    hilo que llama a run_pipeline (no en los workers), así que pueden usar
+    objetos no thread-safe como una sesión. timing es la entrada de la etapa
+    en timings (ver abajo).
+
+    `completed` permite reanudar: {etapa: salidas} de una ejecución anterior.
+    Esas etapas no se vuelven a ejecutar, salvo que dependan de otra que sí
+    haya que ejecutar (sus salidas estarían obsoletas).
+
+    Devuelve {"outputs", "timings", "critical_path", "duration_seconds", "skipped"};
+    timings[etapa] = {"start", "end", "duration"} en segundos relativos al inicio.
+    Si una etapa falla no se lanzan más etapas, pero las que ya estaban en
+    marcha terminan y sus salidas pasan por on_stage_complete (para poder
+    guardarlas como checkpoint); después se propaga la excepción.
+    """
+    values = dict(initial or {})
+    deps = _dependencies(stages, values)
+    by_name = {stage.name: stage for stage in stages}
+    timings: Dict[str, Dict] = {}
+    running = {}
+    reused = _reusable(stages, deps, completed or {})
+    for name, outputs in reused.items():
+        values.update(outputs)
+        timings[name] = {"start": 0.0, "end": 0.0, "duration": 0.0}
+    done: set = set(reused)
+    if reused:
+        logger.info(f"Pipeline: reanudando, etapas ya completadas: {', '.join(sorted(reused))}")
+    t0 = time.monotonic()
+
+    def timed(stage: Stage, inputs: Dict):
+        start = time.monotonic() - t0
+        outputs = stage.run(inputs)
+        return outputs, start, time.monotonic() - t0
+
+    failure: Optional[Exception] = None
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1, thread_name_prefix="pipeline") as pool:
+        while running or (failure is None and len(done) < len(stages)):
+            for name, stage in by_name.items():
+                if failure is not None:
+                    break
+                if name in done or name in running.values() or not all(d in done for d in deps[name]):
+                    continue
+                if on_stage_start:
+                    on_stage_start(stage)
+                running[pool.submit(timed, stage, dict(values))] = name
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    outputs, start, end = future.result()
+                except Exception as e:
+                    # No se lanzan más etapas; las que siguen en marcha se esperan
+                    logger.error(f"Pipeline: la etapa '{name}' falló")
+                    failure = failure or e
+                    continue
+                timings[name] = {"start": start, "end": end, "duration": end - start}
+                values.update(outputs)
+                done.add(name)
+                if on_stage_complete:
+                    on_stage_complete(by_name[name], outputs, timings[name])
+    if failure is not None:
+        raise failure
+
+    critical_path = _critical_path(deps, timings)
+    duration = time.monotonic() - t0
+    logger.info(
+        f"Pipeline completado en {duration:.2f}s; camino crítico: "
+        + " -> ".join(f"{name} ({timings[name]['duration']:.2f}s)" for name in critical_path)
+    )
+    return {"outputs": values, "timings": timings, "critical_path": critical_path, "duration_seconds": duration,
+            "skipped": sorted(reused)}
@@ -0,0 +1,59 @@
+"""Tests para la API Flask de campañas"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from discografica_automator.api.app import app
+from discografica_automator.core import database
+from discografica_automator.core.database import Campaign
+
+
+@pytest.fixture
+def client():
+    """Cliente de test sobre una base SQLite en memoria"""
+    original = database.DATABASE_URL
+    database.configure_database("sqlite://")
+    yield app.test_client()
+    database.configure_database(original)
+
+
+def _seed(count):
+    ids = database.save_campaigns([{"artist": "A", "track": str(i)} for i in range(count)])
+    with database.get_engine().begin() as conn:
+        conn.execute(update(Campaign).values(created_at=datetime(2025, 1, 1, 12)))
+    return ids
+
+
+def test_list_campaigns_pages_with_next_cursor_header(client):
+    """Test la cabecera X-Next-Cursor encadena las páginas y desaparece en la última"""
+    ids = _seed(5)
+
+    first = client.get("/api/campaigns?limit=2")
+    assert first.status_code == 200
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/api/campaigns?limit=2&cursor={cursor}")
+    last = client.get(f"/api/campaigns?limit=2&cursor={second.headers['X-Next-Cursor']}")
+
+    assert "X-Next-Cursor" not in last.headers
+    pages = [first.get_json(), second.get_json(), last.get_json()]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [c["id"] for page in pages for c in page] == sorted(ids, reverse=True)
+    assert pages[0][0]["status"] == "PENDING"
+
+
+def test_list_campaigns_exact_last_page_has_no_cursor(client):
+    """Test una página que llena justo el límite y es la última no devuelve cursor"""
+    _seed(2)
+    response = client.get("/api/campaigns?limit=2")
+    assert len(response.get_json()) == 2
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.parametrize("query", ["cursor=%25%25%25", "cursor=bm8tcGlwZQ==", "limit=0", "status=NOPE",
+                                   "created_from=ayer"])
+def test_list_campaigns_bad_params_are_400(client, query):
+    """Test un cursor mal formado (u otro parámetro inválido) responde 400, no 500"""
+    response = client.get(f"/api/campaigns?{query}")
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
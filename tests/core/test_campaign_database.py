@@ -0,0 +1,184 @@
+"""Tests para la base de campañas SQLAlchemy (discografica_automator.core.database)"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, update
+
+from discografica_automator.core import database
+from discografica_automator.core.database import Campaign, CampaignEvent, CampaignStatus, unit_of_work
+
+
+@pytest.fixture
+def db():
+    """Base SQLite en memoria, nueva en cada test"""
+    original = database.DATABASE_URL
+    database.configure_database("sqlite://")
+    yield database
+    database.configure_database(original)
+
+
+def test_import_is_side_effect_free(tmp_path):
+    """Test importar el módulo no crea data/ ni el engine; la primera sesión sí"""
+    env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    env["PYTHONPATH"] = str(Path(database.__file__).parents[2])
+    script = (
+        "import os\n"
+        "from discografica_automator.core import database\n"
+        "assert database._engine is None and not os.path.exists('data')\n"
+        "database.get_session().close()\n"
+        "assert database._engine is not None and os.path.isfile('data/stakazo.db')\n"
+        "assert database.get_engine() is database._engine\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env, check=True)
+
+
+def test_save_campaigns_reports_each_row(db):
+    """Test inserción masiva: las filas inválidas o rechazadas por la base no tumban el lote"""
+    db.save_campaigns([{"id": "DUP", "artist": "A", "track": "Uno"}])
+    rows = [
+        {"artist": "A", "track": "Dos"},
+        {"id": "DUP", "artist": "B", "track": "Repetida"},
+        {"artist": "", "track": "Sin artista"},
+        "no es un dict",
+        {"id": "NEW", "artist": "C", "track": "Tres", "status": "QUEUED"},
+        {"id": "NEW", "artist": "C", "track": "Duplicada en el lote"},
+    ]
+    results = db.save_campaigns(rows, chunk_size=4)
+
+    assert results[0].startswith("CAMP_")
+    assert results[1:] == [None, None, None, "NEW", None]
+    assert {c.id for c in db.get_all_campaigns()} == {"DUP", "NEW", results[0]}
+    assert db.get_campaign_by_id("DUP").track == "Uno"
+    assert db.get_campaign_by_id("NEW").status == CampaignStatus.QUEUED
+
+
+def test_save_campaigns_rolls_back_on_unexpected_error(db):
+    """Test que un error fuera de la base deshace también los lotes ya escritos"""
+    def rows():
+        yield {"id": "FIRST", "artist": "A", "track": "Uno"}
+        raise RuntimeError("origen roto")
+
+    with pytest.raises(RuntimeError):
+        db.save_campaigns(rows(), chunk_size=1)
+    assert db.get_all_campaigns() == []
+
+
+def test_update_statuses_sets_updated_at_and_event_durations(db):
+    """Test transiciones masivas: resultado por id, updated_at y eventos con duración"""
+    ids = db.save_campaigns([{"artist": "A", "track": str(i)} for i in range(3)])
+    results = db.update_statuses({ids[0]: CampaignStatus.QUEUED, ids[1]: "COMPLETED", ids[2]: "NO_EXISTE",
+                                  "MISSING": CampaignStatus.QUEUED}, chunk_size=2)
+
+    assert results == {ids[0]: True, ids[1]: True, ids[2]: False, "MISSING": False}
+    queued = db.get_campaign_by_id(ids[0])
+    assert queued.status == CampaignStatus.QUEUED and queued.updated_at is not None
+    assert db.get_campaign_by_id(ids[2]).updated_at is None
+
+    (event,) = db.get_campaign_history(ids[0])
+    assert (event.from_status, event.to_status) == (CampaignStatus.PENDING, CampaignStatus.QUEUED)
+    assert event.duration_seconds is not None and event.duration_seconds >= 0
+
+    # Repetir el mismo estado no genera evento; el siguiente mide desde updated_at
+    assert db.update_statuses({ids[0]: CampaignStatus.QUEUED, ids[1]: CampaignStatus.FAILED}) == {
+        ids[0]: True, ids[1]: True}
+    assert len(db.get_campaign_history(ids[0])) == 1
+    first, second = db.get_campaign_history(ids[1])
+    assert second.from_status == CampaignStatus.COMPLETED and second.duration_seconds is not None
+
+
+def _campaigns_at(db, created_at):
+    """Crea campañas con los created_at dados (los empates son intencionados)"""
+    ids = db.save_campaigns([{"artist": "A" if i % 2 else "B", "track": str(i)} for i in range(len(created_at))])
+    with db.get_engine().begin() as conn:
+        for campaign_id, at in zip(ids, created_at):
+            conn.execute(update(Campaign).where(Campaign.id == campaign_id).values(created_at=at))
+    return ids
+
+
+def test_campaigns_page_walks_ties_without_gaps(db):
+    """Test recorrer todas las páginas con created_at empatados: sin duplicados ni huecos"""
+    early, late = datetime(2025, 1, 1, 10), datetime(2025, 1, 2, 10)
+    ids = _campaigns_at(db, [early] * 3 + [late] * 4)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        campaigns, cursor = db.get_campaigns_page(limit=2, cursor=cursor)
+        seen += [c.id for c in campaigns]
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 4
+    assert seen == sorted(ids[3:], reverse=True) + sorted(ids[:3], reverse=True)
+    assert [c.id for c in db.iter_campaigns(batch_size=3)] == seen
+
+    filtered = [c.id for c in db.iter_campaigns(artist="A", created_to=late, batch_size=1)]
+    assert filtered == [ids[1]]
+
+
+def test_cursor_round_trip_and_malformed(db):
+    """Test el cursor codifica (created_at, id) y uno mal formado lanza ValueError"""
+    (campaign_id,) = _campaigns_at(db, [datetime(2025, 1, 1, 10, 30, 5)])
+    cursor = db.encode_cursor(db.get_campaign_by_id(campaign_id))
+    assert db.decode_cursor(cursor) == (datetime(2025, 1, 1, 10, 30, 5), campaign_id)
+
+    for bad in ("%%%", "bm8tcGlwZQ==", "MjAyNXxY"):
+        with pytest.raises(ValueError):
+            db.decode_cursor(bad)
+
+
+def test_campaign_history_records_transitions(db):
+    """Test cada cambio de estado deja un evento con origen, destino y tiempo en el estado anterior"""
+    with unit_of_work() as uow:
+        campaign_id = uow.add("A", "Track").id
+    with unit_of_work() as uow:
+        uow.set_status(campaign_id, CampaignStatus.QUEUED)
+        uow.set_status(campaign_id, CampaignStatus.QUEUED)  # Sin cambio: sin evento
+        uow.set_status(campaign_id, CampaignStatus.GENERATING_VIDEO)
+    with unit_of_work() as uow:
+        uow.set_status(campaign_id, CampaignStatus.COMPLETED)
+
+    history = db.get_campaign_history(campaign_id)
+    assert [(e.from_status, e.to_status) for e in history] == [
+        (CampaignStatus.PENDING, CampaignStatus.QUEUED),
+        (CampaignStatus.QUEUED, CampaignStatus.GENERATING_VIDEO),
+        (CampaignStatus.GENERATING_VIDEO, CampaignStatus.COMPLETED),
+    ]
+    assert history[0].duration_seconds >= 0 and history[1].duration_seconds >= 0
+    # El tiempo en una etapa del pipeline se mide en campaign_stage_runs
+    assert history[2].duration_seconds is None
+
+
+def test_stage_latencies_per_day(db):
+    """Test p50/p95 por día y estado con duraciones conocidas; etapas desde campaign_stage_runs"""
+    (campaign_id,) = db.save_campaigns([{"artist": "A", "track": "Track"}])
+    day1, day2 = datetime(2025, 1, 1, 12), datetime(2025, 1, 2, 12)
+
+    def event(from_status, duration, at):
+        return {"campaign_id": campaign_id, "from_status": from_status, "to_status": CampaignStatus.FAILED,
+                "created_at": at, "duration_seconds": duration}
+
+    events = [event(CampaignStatus.QUEUED, d, day2) for d in (4, 1, 10, 3, 2)]
+    events += [
+        event(CampaignStatus.PENDING, 5, day1),
+        event(CampaignStatus.QUEUED, 100, day1 - timedelta(days=30)),  # Fuera de la ventana
+        event(CampaignStatus.GENERATING_VIDEO, 99, day2),  # Las etapas no salen de los eventos
+    ]
+    with db.get_engine().begin() as conn:
+        conn.execute(insert(CampaignEvent), events)
+    with unit_of_work() as uow:
+        for duration in (30, 50):
+            uow.record_stage(campaign_id, "video", CampaignStatus.GENERATING_VIDEO, day2, duration)
+
+    latencies = db.get_stage_latencies(days=7, now=datetime(2025, 1, 3))
+    assert latencies == {
+        "2025-01-01": {"PENDING": {"count": 1, "p50": 5, "p95": 5}},
+        "2025-01-02": {
+            "QUEUED": {"count": 5, "p50": 3, "p95": 10},
+            "GENERATING_VIDEO": {"count": 2, "p50": 30, "p95": 50},
+        },
+    }
@@ -2,6 +2,7 @@
 import pytest
 import os
 import tempfile
+import threading
 from core.database import DatabaseManager
 
 @pytest.fixture
@@ -14,8 +15,10 @@ def db():
     yield db_manager
     
     # Cleanup
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    db_manager.close()
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
 
 def test_db_initialization(db):
     """Test inicialización de la DB"""
@@ -93,3 +96,174 @@ def test_get_stats(db):
     assert 'active_campaigns' in stats
     assert isinstance(stats['total_campaigns'], int)
 
+
+def test_wal_mode_enabled(db):
+    """Test que las conexiones del pool usan WAL"""
+    with db._pool.connection() as conn:
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode.lower() == "wal"
+
+def test_concurrent_writes(db):
+    """Test escrituras concurrentes desde varios hilos"""
+    errors = []
+
+    def writer(thread_id):
+        for i in range(25):
+            ok = db.save_campaign({
+                "id": f"T{thread_id}_{i}", "artist": "A", "track": "T",
+                "genre": "trap", "status": "active", "created_at": "2025-01-01T00:00:00"
+            })
+            if not ok:
+                errors.append((thread_id, i))
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert db.get_stats()['total_campaigns'] == 200
+
+def test_save_campaigns_bulk(db):
+    """Test inserción masiva con resultado por fila"""
+    campaigns = [
+        {"id": f"BULK{i}", "artist": f"Artist {i}", "track": f"Track {i}",
+         "genre": "trap", "status": "active", "created_at": "2025-01-01T00:00:00"}
+        for i in range(25)
+    ]
+    # Fila inválida: sqlite3 no puede enlazar una lista como parámetro
+    campaigns[7]["artist"] = ["no", "valido"]
+
+    results = db.save_campaigns(campaigns, chunk_size=10)
+
+    assert len(results) == 25
+    assert results[7] is False
+    assert all(ok for i, ok in enumerate(results) if i != 7)
+    assert db.get_campaign("BULK7") is None
+    assert db.get_stats()['total_campaigns'] == 24
+
+def test_update_statuses_bulk(db):
+    """Test transiciones de estado masivas"""
+    db.save_campaigns(
+        {"id": f"UPD{i}", "artist": "A", "track": "T", "status": "active"}
+        for i in range(5)
+    )
+
+    results = db.update_statuses({"UPD0": "paused", "UPD3": "completed", "MISSING": "paused"}, chunk_size=2)
+
+    assert results == {"UPD0": True, "UPD3": True, "MISSING": False}
+    assert db.get_campaign("UPD0")['status'] == "paused"
+    assert db.get_campaign("UPD3")['status'] == "completed"
+    assert db.get_campaign("UPD1")['status'] == "active"
+
+def test_campaign_indexes_created(db):
+    """Test que existen los índices de filtrado"""
+    with db._pool.connection() as conn:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_campaigns_status", "idx_campaigns_artist", "idx_campaigns_created_at"} <= names
+
+def test_get_campaigns_page_keyset(db):
+    """Test paginación por cursor con filtros"""
+    db.save_campaigns(
+        {"id": f"PAGE{i:02d}", "artist": "A" if i % 2 else "B", "track": "T",
+         "status": "active", "created_at": f"2025-01-{i + 1:02d}T00:00:00"}
+        for i in range(10)
+    )
+
+    seen, cursor = [], None
+    while True:
+        page = db.get_campaigns_page(limit=2, cursor=cursor, artist="A")
+        seen.extend(c["id"] for c in page["campaigns"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == ["PAGE09", "PAGE07", "PAGE05", "PAGE03", "PAGE01"]
+
+    ranged = db.get_campaigns_page(limit=10, created_from="2025-01-03", created_to="2025-01-05")
+    assert [c["id"] for c in ranged["campaigns"]] == ["PAGE03", "PAGE02"]
+    assert ranged["next_cursor"] is None
+
+def test_iter_campaigns_streams(db):
+    """Test iterador de campañas filtrado"""
+    db.save_campaigns(
+        {"id": f"IT{i}", "artist": "A", "track": "T", "status": "paused" if i < 3 else "active"}
+        for i in range(7)
+    )
+
+    paused = list(db.iter_campaigns(status="paused", batch_size=2))
+
+    assert sorted(c["id"] for c in paused) == ["IT0", "IT1", "IT2"]
+    assert "_rowid" not in paused[0]
+
+def test_iter_campaigns_releases_connection():
+    """Test que el iterador no retiene la conexión mientras el consumidor procesa"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, "iter.db"), pool_size=1)
+        manager.save_campaigns(
+            {"id": f"REL{i}", "artist": "A", "track": "T", "status": "active"} for i in range(5)
+        )
+        seen = []
+        for campaign in manager.iter_campaigns(batch_size=2):
+            # Con pool_size=1 esto se bloquearía si el iterador tuviera la conexión
+            assert manager.update_campaign_status(campaign["id"], "done")
+            seen.append(campaign["id"])
+        manager.close()
+
+    assert seen == ["REL4", "REL3", "REL2", "REL1", "REL0"]
+
+def test_upsert_keeps_rowid(db):
+    """Test que actualizar una campaña no la mueve al final de la paginación"""
+    db.save_campaigns(
+        {"id": f"ROW{i}", "artist": "A", "track": "T", "status": "active"} for i in range(3)
+    )
+    db.save_campaign({"id": "ROW0", "artist": "A", "track": "T2", "status": "paused"})
+
+    page = db.get_campaigns_page(limit=10)
+    assert [c["id"] for c in page["campaigns"]] == ["ROW2", "ROW1", "ROW0"]
+    assert db.get_campaign("ROW0")["track"] == "T2"
+    assert db.get_stats()["campaigns_by_status"] == {"active": 2, "paused": 1}
+
+def test_stats_counters_follow_writes(db):
+    """Test contadores materializados tras inserciones, upserts y cambios de estado"""
+    db.save_campaigns(
+        {"id": f"ST{i}", "artist": "A" if i < 3 else "B", "track": "T", "genre": "trap",
+         "status": "active", "created_at": "2025-01-01T10:15:00"}
+        for i in range(5)
+    )
+    # Re-guardar la misma campaña (upsert) no debe duplicar el total
+    db.save_campaign({"id": "ST0", "artist": "A", "track": "T", "genre": "reggaeton",
+                      "status": "active", "created_at": "2025-01-01T11:00:00"})
+    db.update_campaign_status("ST1", "paused")
+
+    stats = db.get_stats()
+    assert stats['total_campaigns'] == 5
+    assert stats['active_campaigns'] == 4
+    assert stats['campaigns_by_status'] == {"active": 4, "paused": 1}
+
+    detailed = db.get_detailed_stats(top_n=1)
+    assert detailed['by_genre'] == {"trap": 4, "reggaeton": 1}
+    assert detailed['top_artists'] == {"A": 3}
+    assert detailed['created_per_hour'] == {"2025-01-01T10": 4, "2025-01-01T11": 1}
+    assert sum(detailed['transitions_per_hour'].values()) == 1
+
+def test_stats_backfilled_for_existing_db():
+    """Test que una base previa sin contadores se rellena al abrirla"""
+    import sqlite3
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE campaigns (id TEXT PRIMARY KEY, artist TEXT, track TEXT, "
+                     "genre TEXT, status TEXT, created_at TEXT)")
+        conn.executemany("INSERT INTO campaigns VALUES (?, 'A', 'T', 'trap', ?, NULL)",
+                         [("L1", "ACTIVE"), ("L2", "active"), ("L3", "done")])
+        conn.commit()
+        conn.close()
+
+        manager = DatabaseManager(db_path)
+        stats = manager.get_stats()
+        manager.close()
+
+    assert stats['total_campaigns'] == 3
+    assert stats['active_campaigns'] == 2
@@ -0,0 +1,99 @@
+"""Tests para el registro de modelos YOLO (loader inyectado, sin Ultralytics)"""
+import threading
+import time
+
+import analytics_engine
+from ml_engine.vision import model_registry
+from ml_engine.vision.model_registry import ModelRegistry
+
+
+class FakeModel:
+    """Modelo con la interfaz mínima que usa el registro: se llama con una imagen"""
+
+    def __init__(self, weights: str):
+        self.weights = weights
+        self.calls = []
+
+    def __call__(self, image, **kwargs):
+        self.calls.append((image.shape, kwargs))
+        return []
+
+
+def _weights(tmp_path, name: str, size: int) -> str:
+    path = tmp_path / name
+    path.write_bytes(name.encode().ljust(size, b"\0"))
+    return str(path)
+
+
+def test_concurrent_get_loads_once():
+    """Test varios hilos piden el mismo modelo a la vez: se carga una sola vez y todos reciben el mismo"""
+    loads = []
+
+    def loader(weights):
+        loads.append(weights)
+        time.sleep(0.1)
+        return FakeModel(weights)
+
+    registry = ModelRegistry(loader=loader)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("a.pt"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ["a.pt"]
+    assert len(models) == 8 and all(model is models[0] for model in models)
+    assert registry.stats()["loads"] == 1 and registry.stats()["hits"] == 7
+
+
+def test_lru_eviction_by_bytes(tmp_path):
+    """Test al superar max_bytes sale el menos usado recientemente, no el más antiguo en cargarse"""
+    a, b, c = (_weights(tmp_path, name, 40) for name in ("a.pt", "b.pt", "c.pt"))
+    registry = ModelRegistry(max_bytes=100, loader=FakeModel)
+    registry.get(a)
+    registry.get(b)
+    registry.get(a)  # a pasa a ser el más reciente
+    registry.get(c)
+
+    assert registry.loaded() == {a: 40, c: 40}
+    assert registry.stats()["evictions"] == 1
+    registry.get(b)  # Descartado: se vuelve a cargar
+    assert registry.stats()["loads"] == 4
+
+
+def test_version_follows_checkpoint_content(tmp_path):
+    """Test version() identifica los pesos por contenido: cambia si cambia el checkpoint"""
+    weights = _weights(tmp_path, "a.pt", 64)
+    registry = ModelRegistry(loader=FakeModel)
+    before = registry.version(weights)
+    assert before.startswith(f"{weights}:") and registry.version(weights) == before
+
+    (tmp_path / "a.pt").write_bytes(b"otros pesos")
+    registry.unload(weights)
+    assert registry.version(weights) != before
+
+
+def test_warm_up_runs_a_blank_inference():
+    """Test warm_up carga cada modelo y lanza una inferencia en vacío del tamaño pedido"""
+    registry = ModelRegistry(loader=FakeModel)
+    timings = registry.warm_up(["a.pt", "b.pt"], imgsz=32)
+
+    assert set(timings) == {"a.pt", "b.pt"}
+    assert registry.get("a.pt").calls == [((32, 32, 3), {"imgsz": 32, "verbose": False})]
+
+
+def test_analytics_engine_startup_warms_up_registry(monkeypatch):
+    """Test el arranque del ML engine precarga los modelos fuera de dummy mode"""
+    registry = ModelRegistry(loader=FakeModel)
+    monkeypatch.setattr(model_registry, "_registry", registry)
+    monkeypatch.setenv("DUMMY_MODE", "false")
+    monkeypatch.setenv("YOLO_WARMUP", "true")
+
+    analytics_engine.warm_up_models()
+    assert set(registry.loaded()) == set(model_registry.YOLO_WARMUP_MODELS)
+
+    monkeypatch.setenv("DUMMY_MODE", "true")
+    registry.unload()
+    analytics_engine.warm_up_models()
+    assert registry.loaded() == {}
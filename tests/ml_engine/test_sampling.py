@@ -0,0 +1,107 @@
+"""Tests para el muestreo de frames y el streaming por batches de YOLOAnalyzer"""
+import subprocess
+
+import numpy as np
+import pytest
+from moviepy.config import get_setting
+
+from ml_engine.vision import model_registry
+from ml_engine.vision.model_registry import ModelRegistry
+from ml_engine.vision.sampling import batched_keyframes, sample_frames
+from ml_engine.vision.yolo_analyzer import YOLOAnalyzer
+
+FPS = 24
+# Planos fijos de distinto brillo (el detector compara miniaturas en grises) con cortes secos en 1 s
+# y 4.5 s; el segundo plano dura más que max_gap
+SHOTS = (((230, 230, 230), 1.0), ((20, 20, 120), 3.5), ((120, 200, 120), 1.5))
+
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("sampling") / "shots.mp4")
+    frames = b"".join(np.full((48, 64, 3), color, np.uint8).tobytes() * round(seconds * FPS)
+                      for color, seconds in SHOTS)
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-v", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                    "-s", "64x48", "-r", str(FPS), "-i", "-", "-c:v", "libx264", "-preset", "ultrafast",
+                    "-pix_fmt", "yuv420p", path], input=frames, check=True)
+    return path
+
+
+def _keyframe_times(samples):
+    return [sample["time"] for sample in samples if sample["keyframe"]]
+
+
+def test_stride_sets_sample_times(clip):
+    """Test uno de cada `stride` frames, con su índice y tiempo; sin stride se deduce de YOLO_SAMPLE_FPS (4)"""
+    samples = list(sample_frames(clip, stride=12))
+    assert [s["index"] for s in samples] == list(range(0, 6 * FPS, 12))
+    assert [s["time"] for s in samples] == [i / FPS for i in range(0, 6 * FPS, 12)]
+    assert [s["index"] for s in sample_frames(clip)] == list(range(0, 6 * FPS, 6))
+
+
+def test_keyframes_at_hard_cuts_and_max_gap(clip):
+    """Test keyframe en el primer frame, en cada corte seco y tras max_gap segundos sin inferir"""
+    samples = list(sample_frames(clip, stride=6))
+    assert _keyframe_times(samples) == [0.0, 1.0, 3.0, 4.5]
+    assert all((s["frame"] is not None) == s["keyframe"] for s in samples)
+    assert samples[4]["motion"] > 0.08 and samples[5]["motion"] < 0.01  # Corte en 1 s, luego plano fijo
+
+    assert _keyframe_times(sample_frames(clip, stride=6, max_gap=1.0)) == [0.0, 1.0, 2.0, 3.0, 4.0, 4.5, 5.5]
+
+
+def test_batched_keyframes_caps_keyframes_and_pending():
+    """Test cada tanda cierra al llegar a batch_size keyframes o a max_pending muestras, sin perder orden"""
+    samples = [{"index": i, "keyframe": i % 3 == 0} for i in range(20)]  # Keyframes: 0, 3, 6, ..., 18
+    batches = list(batched_keyframes(iter(samples), batch_size=2, max_pending=5))
+
+    assert [[s["index"] for s in batch] for batch in batches][:2] == [[0, 1, 2, 3], [4, 5, 6, 7, 8]]
+    assert [s for batch in batches for s in batch] == samples
+    assert all(sum(s["keyframe"] for s in batch) <= 2 and len(batch) <= 5 for batch in batches)
+
+
+class StubBoxes:
+    def __init__(self, cls):
+        self.cls = np.array([cls], np.float32)
+        self.conf = np.array([0.9], np.float32)
+        self.xyxyn = np.array([[0.1, 0.2, 0.5, 0.6]], np.float32)
+
+
+class StubResult:
+    def __init__(self, cls):
+        self.boxes = StubBoxes(cls)
+
+
+class StubModel:
+    """Detecta un objeto por frame, numerado en orden de inferencia; anota el tamaño de cada batch"""
+
+    def __init__(self, weights):
+        self.batches = []
+        self.names = {i: f"obj{i}" for i in range(100)}
+
+    def __call__(self, frames, **kwargs):
+        first = sum(self.batches)
+        self.batches.append(len(frames))
+        return [StubResult(first + i) for i in range(len(frames))]
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.setenv("DUMMY_MODE", "false")
+    monkeypatch.setattr(model_registry, "_registry", ModelRegistry(loader=StubModel))
+    analyzer = YOLOAnalyzer()
+    assert not analyzer.dummy_mode
+    return analyzer
+
+
+def test_stream_video_infers_keyframes_in_batches(clip, analyzer):
+    """Test solo se infieren los keyframes, en batches de batch_size; el resto hereda el último keyframe"""
+    results = list(analyzer.stream_video(clip, stride=6, batch_size=3))
+
+    assert analyzer.model.batches == [3, 1]
+    assert [r["time"] for r in results if r["inferred"]] == [0.0, 1.0, 3.0, 4.5]
+    assert all("frame" not in r for r in results)
+    labels = [r["objects"][0]["label"] for r in results]
+    times = [r["time"] for r in results]
+    expected = ["obj0" if t < 1 else "obj1" if t < 3 else "obj2" if t < 4.5 else "obj3" for t in times]
+    assert labels == expected
+    assert results[0]["objects"][0] == {"label": "obj0", "confidence": 0.9, "box": [0.1, 0.2, 0.5, 0.6]}
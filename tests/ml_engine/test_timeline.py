@@ -0,0 +1,76 @@
+"""Tests para la puntuación del timeline y la elección de clips"""
+import numpy as np
+
+from ml_engine.vision.timeline import AUDIO_SAMPLE_RATE, Timeline
+
+
+def _tone(seconds: int, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(seconds * AUDIO_SAMPLE_RATE) / AUDIO_SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def _kicks(audio: np.ndarray, start: int, end: int, every: float = 0.5) -> np.ndarray:
+    n = int(0.1 * AUDIO_SAMPLE_RATE)
+    kick = (0.8 * np.sin(2 * np.pi * 60 * np.arange(n) / AUDIO_SAMPLE_RATE) * np.exp(-np.arange(n) / n * 3))
+    for beat in np.arange(start, end, every):
+        i = int(beat * AUDIO_SAMPLE_RATE)
+        audio[i:i + n] += kick.astype(np.float32)
+    return audio
+
+
+def _with_scores(scores) -> Timeline:
+    timeline = Timeline(float(len(scores)))
+    timeline.scores = lambda: np.asarray(scores, dtype=np.float32)
+    return timeline
+
+
+def test_steady_tone_is_not_a_beat_drop():
+    """Test un tono continuo no puntúa onsets: el suelo absoluto evita estirar el ruido hasta 1"""
+    timeline = Timeline(10.0)
+    timeline.set_audio(_tone(10))
+
+    assert timeline.features()["onset"].max() < 0.05
+    assert all(moment["key_moment"] != "beat_drop" for moment in timeline.moments())
+
+
+def test_real_beats_still_score_onset():
+    """Test los golpes de verdad sí llegan al máximo y marcan el momento"""
+    timeline = Timeline(10.0)
+    timeline.set_audio(_kicks(_tone(10, 0.1), 6, 8))
+
+    onset = timeline.features()["onset"]
+    assert onset[6] == 1.0 and onset[7] > 0.5 and onset[:5].max() < 0.1
+    moment = timeline.moments(top_k=1)[0]
+    assert (moment["time"], moment["key_moment"]) == ("0:06", "beat_drop")
+
+
+def test_best_windows_ranks_by_mean_score():
+    """Test las ventanas salen ordenadas por score medio, con su tramo y score 0-10"""
+    scores = np.zeros(20)
+    scores[2:5], scores[8:11], scores[13:16] = 0.9, 0.3, 0.6
+    clips = _with_scores(scores).best_windows(3, top_k=3)
+
+    assert [(clip["start_time"], clip["end_time"]) for clip in clips] == [(2, 5), (13, 16), (8, 11)]
+    assert [clip["viral_score"] for clip in clips] == [9.0, 6.0, 3.0]
+
+
+def test_best_windows_min_gap_bounds():
+    """Test tras elegir un clip se excluyen justo los inicios a menos de min_gap de él (ni uno más)"""
+    scores = 1 - 0.04 * np.abs(np.arange(30) - 11)  # Pico en 11: la mejor ventana de 3 s empieza en 10
+    timeline = _with_scores(scores)
+
+    assert [clip["start_time"] for clip in timeline.best_windows(3, top_k=3)] == [10, 7, 13]
+    clips = timeline.best_windows(3, top_k=3, min_gap=2)
+    assert [clip["start_time"] for clip in clips] == [10, 5, 15]
+    assert clips[0]["start_time"] - clips[1]["end_time"] == 2
+    assert clips[2]["start_time"] - clips[0]["end_time"] == 2
+
+
+def test_best_windows_longer_than_video():
+    """Test con duration mayor que el video sale un único clip con el video entero"""
+    timeline = Timeline(9.5)
+    timeline.set_audio(_tone(9))
+
+    clips = timeline.best_windows(30, top_k=3)
+    assert len(clips) == 1
+    assert (clips[0]["start_time"], clips[0]["end_time"]) == (0, 9.5)
@@ -0,0 +1,148 @@
+"""Tests para el lanzamiento de campañas"""
+import time
+
+import pytest
+from sqlalchemy import event
+
+from discografica_automator.core import database
+from discografica_automator.core.database import CampaignStatus, unit_of_work
+from discografica_automator.services import campaign_launcher, distributor
+
+
+@pytest.fixture
+def db():
+    """Base SQLite en memoria, nueva en cada test"""
+    original = database.DATABASE_URL
+    database.configure_database("sqlite://")
+    yield database
+    database.configure_database(original)
+
+
+@pytest.fixture
+def stages(monkeypatch, tmp_path):
+    """Sustituye IA, render y publicación por funciones locales que cuentan llamadas"""
+    calls = {"captions": 0, "video": 0, "fail_captions": False, "captions_delay": 0.0}
+
+    def generate_captions(track, artist):
+        calls["captions"] += 1
+        time.sleep(calls["captions_delay"])
+        if calls["fail_captions"]:
+            raise RuntimeError("LLM no disponible")
+        return {"tiktok": f"{artist} - {track}"}
+
+    def generate_video(prompt):
+        calls["video"] += 1
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"fake mp4")
+        return str(path)
+
+    monkeypatch.setattr(campaign_launcher.copy_generator, "generate_captions", generate_captions)
+    monkeypatch.setattr(campaign_launcher.video_generator, "generate_video", generate_video)
+    monkeypatch.setattr(distributor, "distribute", lambda video_path, captions, title: {
+        platform: {"status": distributor.SUCCESS, "result": "ok", "error": None, "duration_seconds": 0.0}
+        for platform in captions
+    })
+    return calls
+
+
+def _new_campaign():
+    with unit_of_work() as uow:
+        return uow.add("Artist", "Track", "prompt").id
+
+
+def test_launch_completes(db, stages):
+    """Test lanzamiento completo"""
+    campaign_id = _new_campaign()
+    campaign_launcher.launch_campaign(campaign_id)
+
+    assert db.get_campaign_by_id(campaign_id).status == CampaignStatus.COMPLETED
+    assert [post.platform for post in db.get_campaign_posts(campaign_id)] == ["tiktok"]
+
+
+def test_relaunch_reuses_video_rendered_while_captions_failed(db, stages):
+    """Test que el video terminado en paralelo a un fallo de captions queda en checkpoint"""
+    campaign_id = _new_campaign()
+    stages["fail_captions"] = True
+    campaign_launcher.launch_campaign(campaign_id)
+    assert db.get_campaign_by_id(campaign_id).status == CampaignStatus.FAILED
+
+    stages["fail_captions"] = False
+    campaign_launcher.launch_campaign(campaign_id)
+
+    assert db.get_campaign_by_id(campaign_id).status == CampaignStatus.COMPLETED
+    assert stages["video"] == 1
+    assert stages["captions"] == 2
+
+
+def test_completed_launch_clears_checkpoints(db, stages):
+    """Test que al completar se borran los checkpoints y un relanzamiento no reutiliza salidas viejas"""
+    campaign_id = _new_campaign()
+    stages["fail_captions"] = True
+    campaign_launcher.launch_campaign(campaign_id)
+    with unit_of_work() as uow:
+        assert set(uow.get_checkpoints(campaign_id)) == {"video"}
+
+    stages["fail_captions"] = False
+    campaign_launcher.launch_campaign(campaign_id)
+    with unit_of_work() as uow:
+        assert uow.get_checkpoints(campaign_id) == {}
+
+    campaign_launcher.launch_campaign(campaign_id)
+    assert db.get_campaign_by_id(campaign_id).status == CampaignStatus.COMPLETED
+    assert stages["video"] == 2 and stages["captions"] == 3
+
+
+def test_stage_latencies_measured_per_stage(db, stages):
+    """Test que con etapas solapadas cada una mide su propia duración"""
+    stages["captions_delay"] = 0.3  # El LLM tarda más que el render
+    campaign_id = _new_campaign()
+    campaign_launcher.launch_campaign(campaign_id)
+
+    runs = {run.stage: run for run in db.get_campaign_stage_runs(campaign_id)}
+    assert set(runs) == {"captions", "video", "distribute"}
+    assert runs["captions"].duration_seconds >= 0.3
+    assert runs["video"].duration_seconds < 0.3
+
+    (latencies,) = db.get_stage_latencies().values()
+    assert latencies["GENERATING_CAPTIONS"]["p50"] >= 0.3
+    assert latencies["GENERATING_VIDEO"]["p50"] < 0.3
+    # Las transiciones entre estados de etapa no llevan duración
+    history = db.get_campaign_history(campaign_id)
+    assert all(event.duration_seconds is None for event in history if event.from_status in db.STAGE_STATUSES)
+
+
+def _count_round_trips(launch, campaign_id):
+    """(commits, sentencias SQL) de un lanzamiento; como scripts/bench_campaign_commits.py"""
+    engine = database.get_engine()
+    counts = {"commits": 0, "statements": 0}
+
+    def on_commit(conn):
+        counts["commits"] += 1
+
+    def on_execute(*args):
+        counts["statements"] += 1
+
+    event.listen(engine, "commit", on_commit)
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        launch(campaign_id)
+    finally:
+        event.remove(engine, "commit", on_commit)
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return counts["commits"], counts["statements"]
+
+
+def test_launch_round_trips_below_legacy_helpers(db, stages):
+    """Test que la unidad de trabajo hace menos commits y sentencias que los helpers CRUD"""
+    def legacy_launch(campaign_id):
+        database.get_campaign_by_id(campaign_id)
+        for status in (CampaignStatus.GENERATING_CAPTIONS, CampaignStatus.GENERATING_VIDEO,
+                       CampaignStatus.DISTRIBUTING, CampaignStatus.COMPLETED):
+            database.update_campaign_status(campaign_id, status)
+
+    legacy_commits, legacy_statements = _count_round_trips(legacy_launch, _new_campaign())
+    commits, statements = _count_round_trips(campaign_launcher.launch_campaign, _new_campaign())
+
+    # Un commit por checkpoint (captions, video) más el final con publicaciones, estados y tiempos
+    assert commits == 3 < legacy_commits
+    assert statements < legacy_statements
@@ -0,0 +1,75 @@
+"""Tests para la distribución en paralelo por plataforma"""
+import threading
+import time
+
+import pytest
+
+from discografica_automator.services import distributor
+
+
+@pytest.fixture
+def platforms(monkeypatch):
+    """Pools nuevos por test y una subida simulada que registra la concurrencia por plataforma"""
+    monkeypatch.setattr(distributor, "_executors", {})
+    monkeypatch.setattr(distributor, "PLATFORM_CONCURRENCY", {"tiktok": 1, "instagram": 2, "youtube": 1})
+    state = {"active": {}, "peak": {}, "overall": 0, "delay": 0.05, "fail": set()}
+    lock = threading.Lock()
+
+    def post(platform, video_path, caption, title):
+        with lock:
+            state["active"][platform] = state["active"].get(platform, 0) + 1
+            state["peak"][platform] = max(state["peak"].get(platform, 0), state["active"][platform])
+            state["overall"] = max(state["overall"], sum(state["active"].values()))
+        try:
+            time.sleep(state["delay"])
+            if platform in state["fail"]:
+                raise ConnectionError(f"{platform} caído")
+            return {"id": f"{platform}-{caption}"}
+        finally:
+            with lock:
+                state["active"][platform] -= 1
+
+    monkeypatch.setattr(distributor, "_post", post)
+    yield state
+    for executor in distributor._executors.values():
+        executor.shutdown(wait=True)
+
+
+def test_platforms_run_in_parallel(platforms):
+    """Test que las plataformas se publican a la vez"""
+    results = distributor.distribute("v.mp4", {"tiktok": "a", "instagram": "b", "youtube": "c"}, "T")
+
+    assert platforms["overall"] == 3
+    assert {r["status"] for r in results.values()} == {distributor.SUCCESS}
+    assert results["tiktok"]["result"] == '{"id": "tiktok-a"}'
+
+
+def test_per_platform_concurrency_cap(platforms):
+    """Test que el límite por plataforma se respeta entre campañas simultáneas"""
+    threads = [
+        threading.Thread(target=distributor.distribute, args=("v.mp4", {"tiktok": str(i), "instagram": str(i)}, "T"))
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert platforms["peak"]["tiktok"] == 1
+    assert platforms["peak"]["instagram"] == 2
+
+
+def test_failures_and_timeouts_are_isolated(platforms):
+    """Test que el fallo o timeout de una plataforma no afecta al resto"""
+    platforms["fail"] = {"instagram"}
+    platforms["delay"] = 0.2
+    results = distributor.distribute("v.mp4", {"tiktok": "a", "instagram": "b", "myspace": "c"}, "T", timeout=0.3)
+
+    assert results["tiktok"]["status"] == distributor.SUCCESS
+    assert results["instagram"]["status"] == distributor.FAILED
+    assert "caído" in results["instagram"]["error"]
+    assert results["myspace"]["status"] == distributor.SKIPPED
+
+    platforms["delay"] = 0.5
+    results = distributor.distribute("v.mp4", {"youtube": "a"}, "T", timeout=0.1)
+    assert results["youtube"]["status"] == distributor.TIMEOUT
@@ -0,0 +1,162 @@
+"""Tests para la cola de trabajos persistente"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import select, update
+
+from discografica_automator.core import database
+from discografica_automator.core.database import CampaignStatus, unit_of_work
+from discografica_automator.services import job_queue
+from discografica_automator.services.job_queue import LAUNCH_CAMPAIGN, Job, JobQueue, JobStatus
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Base SQLite en archivo (los workers usan varias conexiones)"""
+    original = database.DATABASE_URL
+    database.configure_database(f"sqlite:///{tmp_path / 'queue.db'}")
+    yield database
+    database.configure_database(original)
+
+
+def _job(queue, job_id):
+    with queue.engine.connect() as conn:
+        return conn.execute(select(Job).where(Job.id == job_id)).first()
+
+
+def _campaign(status):
+    with unit_of_work() as uow:
+        campaign = uow.add("Artist", "Track")
+        uow.set_status(campaign, status)
+        return campaign.id
+
+
+def test_claim_order_and_dedup(db):
+    """Test reclamo en orden de llegada y un solo trabajo activo por key"""
+    queue = JobQueue()
+    first = queue.enqueue("kind", {"n": 1}, key="a")
+    second = queue.enqueue("kind", {"n": 2}, key="b")
+    assert queue.enqueue("kind", {"n": 3}, key="a") == first
+
+    claimed = queue._claim("w1")
+    assert claimed["id"] == first and claimed["attempts"] == 1
+    assert queue._claim("w2")["id"] == second
+    assert queue._claim("w3") is None
+    assert _job(queue, first).status == JobStatus.RUNNING
+
+
+def test_visibility_timeout_reclaims_and_fences_old_worker(db):
+    """Test que un trabajo sin renovar vuelve a ser reclamable y el worker anterior ya no lo cierra"""
+    queue = JobQueue(visibility_timeout=0.1)
+    job_id = queue.enqueue("kind")
+    stale = queue._claim("w1")
+    assert queue._claim("w2") is None
+
+    time.sleep(0.15)
+    fresh = queue._claim("w2")
+    assert fresh["id"] == job_id and fresh["attempts"] == 2
+
+    queue._finish(stale, "w1", JobStatus.DONE)
+    assert _job(queue, job_id).status == JobStatus.RUNNING
+    queue._finish(fresh, "w2", JobStatus.DONE)
+    assert _job(queue, job_id).status == JobStatus.DONE
+
+
+def test_heartbeat_keeps_long_job_claimed(db):
+    """Test que el heartbeat renueva la visibilidad de un trabajo largo"""
+    release = threading.Event()
+    queue = JobQueue(handlers={"slow": lambda payload: release.wait(5)}, concurrency=1,
+                     visibility_timeout=0.3, poll_interval=0.01)
+    job_id = queue.enqueue("slow")
+    queue.start()
+    try:
+        time.sleep(1.0)  # Más de tres veces el visibility timeout
+        assert queue._claim("intruso") is None
+        assert _job(queue, job_id).attempts == 1
+    finally:
+        release.set()
+        queue.stop()
+    assert _job(queue, job_id).status == JobStatus.DONE
+
+
+def test_retry_then_fail_calls_failure_handler(db, monkeypatch):
+    """Test reintentos hasta max_attempts y aviso al fallar definitivamente"""
+    monkeypatch.setattr(job_queue, "_backoff", lambda attempts: 0.0)
+    failures = []
+
+    def boom(payload):
+        raise RuntimeError("falla siempre")
+
+    queue = JobQueue(handlers={"boom": boom}, failure_handlers={"boom": lambda p, e: failures.append((p, e))})
+    job_id = queue.enqueue("boom", {"x": 1}, max_attempts=2)
+    for _ in range(2):
+        queue._run(queue._claim("w1"), "w1")
+
+    assert _job(queue, job_id).status == JobStatus.FAILED
+    assert failures == [({"x": 1}, "falla siempre")]
+    assert queue.metrics()["retried"] == 1
+
+
+def test_handler_lookup_errors_are_retried(db, monkeypatch):
+    """Test que un KeyError dentro del handler se reintenta y un tipo sin handler falla sin reintentos"""
+    monkeypatch.setattr(job_queue, "_backoff", lambda attempts: 0.0)
+
+    def missing_field(payload):
+        return payload["campaign_id"]
+
+    queue = JobQueue(handlers={"lookup": missing_field})
+    job_id = queue.enqueue("lookup", {}, max_attempts=2)
+    queue._run(queue._claim("w1"), "w1")
+    job = _job(queue, job_id)
+    assert job.status == JobStatus.QUEUED and job.last_error == "'campaign_id'"
+    queue._run(queue._claim("w1"), "w1")
+    assert _job(queue, job_id).status == JobStatus.FAILED
+
+    unknown = queue.enqueue("desconocido", max_attempts=3)
+    queue._run(queue._claim("w1"), "w1")
+    job = _job(queue, unknown)
+    assert job.status == JobStatus.FAILED and job.attempts == 1
+    assert queue.metrics()["retried"] == 1
+
+
+def test_failed_launch_marks_campaign_failed(db):
+    """Test que un lanzamiento sin más intentos deja la campaña en FAILED, no en curso"""
+    campaign_id = _campaign(CampaignStatus.GENERATING_VIDEO)
+    job_queue._launch_campaign_failed({"campaign_id": campaign_id}, "visibility timeout excedido")
+
+    assert database.get_campaign_by_id(campaign_id).status == CampaignStatus.FAILED
+
+
+def test_recover_requeues_dead_workers_and_skips_failed_launches(db):
+    """Test recuperación: trabajos de procesos muertos y campañas huérfanas"""
+    queue = JobQueue()
+    dead_job = queue.enqueue("kind")
+    queue._claim(f"{queue._host}:999999999:0")  # PID inexistente en este host
+
+    orphan = _campaign(CampaignStatus.GENERATING_VIDEO)
+    exhausted = _campaign(CampaignStatus.DISTRIBUTING)
+    failed_job = queue.enqueue(LAUNCH_CAMPAIGN, {"campaign_id": exhausted}, key=exhausted)
+    with queue.engine.begin() as conn:
+        conn.execute(update(Job).where(Job.id == failed_job).values(status=JobStatus.FAILED))
+
+    assert queue.recover() == {"requeued_jobs": 1, "relaunched_campaigns": 1}
+    assert _job(queue, dead_job).status == JobStatus.QUEUED
+    with queue.engine.connect() as conn:
+        keys = conn.execute(select(Job.key).where(Job.kind == LAUNCH_CAMPAIGN,
+                                                  Job.status == JobStatus.QUEUED)).scalars().all()
+    assert keys == [orphan]
+    # Idempotente: la segunda pasada no encola nada nuevo
+    assert queue.recover() == {"requeued_jobs": 0, "relaunched_campaigns": 0}
+
+
+def test_recovery_lease_single_holder(db, monkeypatch):
+    """Test que solo un proceso toma el lease de recuperación hasta que caduca"""
+    leader, follower = JobQueue(), JobQueue()
+    monkeypatch.setattr(follower, "_host", "otro-host")
+
+    assert leader.try_lease("recover", ttl=0.2)
+    assert not follower.try_lease("recover", ttl=0.2)
+    assert leader.try_lease("recover", ttl=0.2)  # El titular puede renovarlo
+    time.sleep(0.25)
+    assert follower.try_lease("recover", ttl=0.2)
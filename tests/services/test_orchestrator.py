@@ -0,0 +1,12 @@
+"""Tests para el orquestador ML"""
+from discografica_automator.services.orchestrator import MLOrchestrator
+
+
+def test_satellite_video_prompt_uses_video_analysis(monkeypatch):
+    """Test sin OPENAI_API_KEY el prompt se construye con el análisis del vídeo (ml_engine importable)"""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    result = MLOrchestrator().generate_satellite_video_prompt("no_existe.mp4", {"name": "Main"})
+
+    assert result["analysis"]["scene_type"] == "music_video"
+    assert "estilo 'music_video'" in result["prompt"] and "Canal principal: Main" in result["prompt"]
+    assert result["metadatos"] == {}
@@ -0,0 +1,79 @@
+"""Tests para el ejecutor de pipelines (DAG)"""
+import threading
+import time
+
+import pytest
+
+from discografica_automator.services.pipeline import PipelineError, Stage, run_pipeline
+
+
+def test_independent_stages_run_in_parallel():
+    """Test que dos etapas sin dependencias se solapan y la tercera las espera"""
+    started = threading.Barrier(2, timeout=2)
+
+    def slow(name):
+        started.wait()  # Solo pasa si ambas están en marcha a la vez
+        return name.upper()
+
+    stages = [
+        Stage("a", lambda x: slow("a"), inputs=("x",), outputs=("a",)),
+        Stage("b", lambda x: slow("b"), inputs=("x",), outputs=("b",)),
+        Stage("c", lambda a, b: a + b, inputs=("a", "b"), outputs=("c",)),
+    ]
+    run = run_pipeline(stages, initial={"x": 1})
+
+    assert run["outputs"]["c"] == "AB"
+    assert run["critical_path"][-1] == "c"
+    assert set(run["timings"]) == {"a", "b", "c"}
+
+
+def test_invalid_dag_rejected():
+    """Test entradas sin productor y ciclos"""
+    with pytest.raises(PipelineError):
+        run_pipeline([Stage("a", lambda missing: 1, inputs=("missing",), outputs=("a",))])
+    with pytest.raises(PipelineError):
+        run_pipeline([
+            Stage("a", lambda b: 1, inputs=("b",), outputs=("a",)),
+            Stage("b", lambda a: 1, inputs=("a",), outputs=("b",)),
+        ])
+
+
+def test_failure_drains_running_stages():
+    """Test que si una etapa falla, las hermanas en marcha terminan y se notifican"""
+    completed, started = {}, []
+
+    def fail(x):
+        raise ValueError("captions caídas")
+
+    def render(x):
+        time.sleep(0.2)
+        return "video.mp4"
+
+    stages = [
+        Stage("captions", fail, inputs=("x",), outputs=("captions",)),
+        Stage("video", render, inputs=("x",), outputs=("video_path",)),
+        Stage("distribute", lambda captions, video_path: {}, inputs=("captions", "video_path"),
+              outputs=("post_results",)),
+    ]
+    with pytest.raises(ValueError, match="captions caídas"):
+        run_pipeline(stages, initial={"x": 1}, on_stage_start=lambda stage: started.append(stage.name),
+                     on_stage_complete=lambda stage, outputs, timing: completed.update({stage.name: outputs}))
+
+    assert completed == {"video": {"video_path": "video.mp4"}}
+    assert "distribute" not in started
+
+
+def test_resume_skips_completed_stages():
+    """Test que las etapas con checkpoint no se repiten (salvo si dependen de otra pendiente)"""
+    calls = []
+    stages = [
+        Stage("a", lambda x: calls.append("a") or 1, inputs=("x",), outputs=("a",)),
+        Stage("b", lambda a: calls.append("b") or 2, inputs=("a",), outputs=("b",)),
+        Stage("c", lambda x: calls.append("c") or 3, inputs=("x",), outputs=("c",)),
+    ]
+    run = run_pipeline(stages, initial={"x": 0}, completed={"b": {"b": 9}, "c": {"c": 7}})
+
+    # b depende de a, que no tenía checkpoint: su salida guardada estaría obsoleta
+    assert sorted(calls) == ["a", "b"]
+    assert run["outputs"]["c"] == 7
+    assert run["skipped"] == ["c"]
@@ -0,0 +1,53 @@
+"""Tests para la API ejecutiva (FastAPI)"""
+import subprocess
+
+import pytest
+from fastapi.testclient import TestClient
+from moviepy.config import get_setting
+
+import executive_api
+from ml_engine.vision import analysis_cache
+from ml_engine.vision.analysis_cache import AnalysisCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = AnalysisCache(str(tmp_path / "analysis"))
+    monkeypatch.setattr(analysis_cache, "_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def video(tmp_path):
+    """Clip de 3 s con audio"""
+    path = str(tmp_path / "longcat.mp4")
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-v", "error", "-y",
+                    "-f", "lavfi", "-i", "testsrc2=size=160x120:rate=24", "-f", "lavfi", "-i", "sine=frequency=440",
+                    "-t", "3", "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", path],
+                   check=True)
+    return path
+
+
+def test_longcat_upload_serves_repeat_uploads_from_cache(cache, video):
+    """Test la primera subida analiza el vídeo y la segunda sale de la caché de análisis"""
+    client = TestClient(executive_api.app)
+    body = {"video_file_path": video, "channel_id": "main"}
+
+    first = client.post("/longcat_upload", json=body).json()
+    assert first["channel_id"] == "main"
+    assert first["yolo_analysis"]["video_path"] == video
+    assert first["yolo_analysis"]["timestamp_analysis"]
+    assert cache.stats()["stores"] == 1
+
+    again = client.post("/longcat_upload", json=body).json()["yolo_analysis"]
+    assert again == first["yolo_analysis"]
+    assert cache.stats()["stores"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_longcat_upload_missing_file_is_dummy(cache):
+    """Test un vídeo que no existe en local no se analiza"""
+    client = TestClient(executive_api.app)
+    response = client.post("/longcat_upload", json={"video_file_path": "no_existe.mp4", "channel_id": "main"})
+
+    assert response.json()["yolo_analysis"] == "dummy_result"
+    assert cache.stats()["misses"] == 0
@@ -0,0 +1,45 @@
+"""Fixtures de medios sintéticos para los tests de video_generator"""
+import subprocess
+import wave
+
+import numpy as np
+import pytest
+from moviepy.config import get_setting
+
+FFMPEG = get_setting("FFMPEG_BINARY")
+
+
+def _write_tone(path, duration: float, sample_rate: int = 22050, freq: float = 440.0):
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((0.3 * np.sin(2 * np.pi * freq * t) * 32767).astype(np.int16).tobytes())
+    return str(path)
+
+
+def _decode_frames(path, size=(32, 32)) -> np.ndarray:
+    """Todos los frames del video, reescalados a `size`, como array (n, h, w, 3)"""
+    w, h = size
+    out = subprocess.run([FFMPEG, "-v", "error", "-i", str(path), "-vf", f"scale={w}:{h}", "-f", "rawvideo",
+                          "-pix_fmt", "rgb24", "-"], stdout=subprocess.PIPE, check=True).stdout
+    return np.frombuffer(out, np.uint8).reshape(-1, h, w, 3)
+
+
+@pytest.fixture
+def write_tone():
+    """write_tone(path, duration, sample_rate=22050, freq=440.0): WAV mono con un tono"""
+    return _write_tone
+
+
+@pytest.fixture
+def decode_frames():
+    """decode_frames(path, size=(32, 32)): frames del video como array (n, h, w, 3)"""
+    return _decode_frames
+
+
+@pytest.fixture
+def tone(tmp_path):
+    """Tono de 2 s"""
+    return _write_tone(tmp_path / "tone.wav", 2.0)
@@ -0,0 +1,88 @@
+"""Tests para la extracción de clips de VideoEditor"""
+import subprocess
+
+import pytest
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from video_generator import smartcut
+from video_generator.editor import VideoEditor, _segment_bounds
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    """Video de 6 s a 24 fps con GOP de 1 s"""
+    path = str(tmp_path_factory.mktemp("editor") / "source.mp4")
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-v", "error", "-y",
+                    "-f", "lavfi", "-i", "testsrc2=size=160x120:rate=24",
+                    "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100",
+                    "-t", "6", "-c:v", "libx264", "-preset", "ultrafast", "-g", "24",
+                    "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path], check=True)
+    return path
+
+
+def test_segment_bounds_formats():
+    """Test que se aceptan segmentos de get_viral_clips, dicts start/end y tuplas"""
+    assert _segment_bounds({"start_time": 1, "end_time": 2.5, "score": 0.9}) == (1.0, 2.5)
+    assert _segment_bounds({"start": 0.5, "end": 1}) == (0.5, 1.0)
+    assert _segment_bounds((3, 4)) == (3.0, 4.0)
+    for segment in ({"start": 2}, (2, 2), {"start_time": 3, "end_time": 1}):
+        with pytest.raises(ValueError):
+            _segment_bounds(segment)
+
+
+def test_extract_clips_keeps_segment_fields(source, tmp_path):
+    """Test que cada clip conserva los campos del segmento, se recorta a la duración y dura lo pedido"""
+    segments = [{"start_time": 1.0, "end_time": 2.5, "score": 0.9}, (4.0, 10.0)]
+    result = VideoEditor.extract_clips(source, segments, output_dir=str(tmp_path / "clips"))
+
+    first, second = result["clips"]
+    assert first["score"] == 0.9 and first["start"] == 1.0 and first["end"] == 2.5
+    assert second["end"] == pytest.approx(6.0, abs=0.05)
+    assert first["path"].endswith("source_clip01_1-2s.mp4")
+    assert ffmpeg_parse_infos(first["path"])["duration"] == pytest.approx(1.5, abs=0.1)
+    assert ffmpeg_parse_infos(second["path"])["duration"] == pytest.approx(2.0, abs=0.1)
+    assert result["stats"]["count"] == 2 and result["stats"]["failed"] == 0
+    assert result["stats"]["clip_seconds"] == pytest.approx(3.5, abs=0.05)
+
+
+def test_extract_clips_probes_source_once(source, tmp_path, monkeypatch):
+    """Test que los cortes exactos comparten una sola inspección de keyframes y B-frames"""
+    calls = {"probe_keyframes": 0, "reorder_delay": 0}
+    for name in calls:
+        original = getattr(smartcut, name)
+
+        def counted(*args, _name=name, _original=original):
+            calls[_name] += 1
+            return _original(*args)
+        monkeypatch.setattr(smartcut, name, counted)
+
+    result = VideoEditor.extract_clips(source, [(0.5, 1.5), (2.5, 3.5), (3.2, 5.8)], output_dir=str(tmp_path))
+
+    assert result["stats"]["failed"] == 0
+    assert calls == {"probe_keyframes": 1, "reorder_delay": 1}
+
+
+def test_extract_clips_isolates_failures_and_reports_progress(source, tmp_path):
+    """Test que un corte fallido no afecta al resto y el progreso llega a 1"""
+    progress = []
+    result = VideoEditor.extract_clips(source, [(0.0, 1.0), (8.0, 9.0), (2.0, 3.0)], output_dir=str(tmp_path),
+                                       exact=False, max_workers=2, progress=progress.append)
+
+    ok, failed, last = result["clips"]
+    assert failed["path"] is None and "error" in failed
+    assert ok["path"] and last["path"] and "error" not in ok
+    assert result["stats"]["failed"] == 1
+    assert result["stats"]["clip_seconds"] == pytest.approx(2.0)
+    assert progress == pytest.approx([1 / 3, 2 / 3, 1.0])
+
+
+def test_extract_clips_progress_can_cancel(source, tmp_path):
+    """Test que una excepción en progress se propaga y cancela los cortes pendientes"""
+    def cancel(fraction):
+        raise RuntimeError("cancelado")
+
+    with pytest.raises(RuntimeError):
+        VideoEditor.extract_clips(source, [(0, 1), (1, 2), (2, 3), (3, 4)], output_dir=str(tmp_path),
+                                  exact=False, max_workers=1, progress=cancel)
+    assert len(list(tmp_path.glob("*.mp4"))) < 4
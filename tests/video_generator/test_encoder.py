@@ -0,0 +1,40 @@
+"""Tests para el encoder directo a ffmpeg"""
+import numpy as np
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from PIL import Image
+
+from video_generator.encoder import FFmpegEncoder
+
+
+def test_encode_frames_pipes_every_frame(tmp_path, tone, decode_frames):
+    """Test que cada frame enviado por el pipe acaba en el MP4, con audio"""
+    frames = (np.full((64, 64, 3), 10 * i, np.uint8) for i in range(24))
+    progress = []
+    encoder = FFmpegEncoder(preset="ultrafast", progress=progress.append)
+    output = encoder.encode_frames(frames, (64, 64), 24, str(tmp_path / "out.mp4"), audio_path=tone,
+                                   total_frames=24)
+
+    decoded = decode_frames(output)
+    assert len(decoded) == 24
+    assert abs(int(decoded[12].mean()) - 120) <= 3
+    assert progress[-1] == 1.0
+    assert ffmpeg_parse_infos(output)["audio_found"]
+
+
+def test_encode_still_overlay_timing(tmp_path, tone, decode_frames):
+    """Test imagen fija: número de frames exacto y overlay solo hasta overlay_until"""
+    image = tmp_path / "cover.png"
+    overlay = tmp_path / "title.png"
+    Image.new("RGB", (80, 80), (0, 0, 255)).save(image)
+    Image.new("RGBA", (32, 32), (255, 255, 255, 255)).save(overlay)
+
+    output = FFmpegEncoder(preset="ultrafast").encode_still(
+        str(image), (64, 64), 2.0, str(tmp_path / "still.mp4"), audio_path=tone,
+        overlay_path=str(overlay), overlay_position=(0, 0), overlay_until=1.5, fps=24
+    )
+
+    frames = decode_frames(output)
+    assert len(frames) == 48
+    # Esquina superior izquierda: blanca con el overlay, azul sin él (frame 36 = 1.5 s)
+    assert frames[35, 2, 2].min() > 200
+    assert frames[36, 2, 2, 2] > 200 and frames[36, 2, 2, 0] < 60
@@ -0,0 +1,114 @@
+"""Tests para VideoGenerator"""
+import numpy as np
+import pytest
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from PIL import Image
+
+from video_generator.encoder import FFmpegEncoder
+from video_generator.generator import VideoGenerator, _gradient_cycle, _gradient_frame
+from video_generator.render_cache import RenderCache
+
+TOP, BOTTOM = (138, 43, 226), (0, 0, 0)
+
+
+@pytest.fixture
+def generator(tmp_path):
+    return VideoGenerator(output_dir=str(tmp_path / "videos"), use_cache=False)
+
+
+def test_gradient_frame_matches_per_pixel_formula():
+    """Test el gradiente vectorizado da lo mismo que interpolar fila a fila, igual en todo el ancho"""
+    frame = _gradient_frame(8, 50, TOP, BOTTOM)
+
+    rows = [tuple(int(c * (1 - y / 50) + b * y / 50) for c, b in zip(TOP, BOTTOM)) for y in range(50)]
+    assert frame.shape == (50, 8, 3) and frame.dtype == np.uint8
+    assert np.array_equal(frame[:, 0], np.array(rows, np.uint8))
+    assert (frame == frame[:, :1]).all()
+
+
+def test_gradient_frame_is_cached_and_read_only():
+    """Test un solo frame por tamaño y colores, compartido y protegido contra escrituras"""
+    frame = _gradient_frame(8, 50, TOP, BOTTOM)
+    assert _gradient_frame(8, 50, TOP, BOTTOM) is frame
+    assert _gradient_frame(8, 60, TOP, BOTTOM) is not frame
+    with pytest.raises(ValueError):
+        frame[0, 0] = 0
+
+
+def test_gradient_cycle_shifts_and_loops():
+    """Test el ciclo empieza en el gradiente base, baja un 25% a mitad y vuelve simétrico"""
+    cycle = _gradient_cycle(8, 40, TOP, BOTTOM, 12)
+    base = _gradient_frame(8, 40, TOP, BOTTOM)
+
+    assert len(cycle) == 12
+    assert np.array_equal(cycle[0], base)
+    assert (cycle[6][:10] == base[0]).all() and np.array_equal(cycle[6][10:], base[:30])
+    for i in range(1, 12):
+        assert np.array_equal(cycle[i], cycle[12 - i])
+
+
+def test_gradient_background_static_and_animated(generator):
+    """Test fondo estático: un frame para toda la duración; animado: el frame del ciclo que toca"""
+    static = generator._create_gradient_background(8, 40, 2.0)
+    assert static.duration == 2.0
+    assert np.array_equal(static.get_frame(1.5), _gradient_frame(8, 40, TOP, BOTTOM))
+
+    animated = generator._create_gradient_background(8, 40, 2.0, cycle_frames=12, fps=24)
+    cycle = _gradient_cycle(8, 40, TOP, BOTTOM, 12)
+    assert np.array_equal(animated.get_frame(0.0), cycle[0])
+    assert np.array_equal(animated.get_frame(15 / 24), cycle[3])
+
+
+@pytest.fixture
+def cover(tmp_path):
+    path = tmp_path / "cover.png"
+    Image.new("RGB", (64, 64), (200, 30, 30)).save(path)
+    return str(path)
+
+
+@pytest.fixture
+def cached_generator(tmp_path):
+    """Generador rápido (ultrafast) con caché de renders propia en tmp_path"""
+    progress = []
+    generator = VideoGenerator(output_dir=str(tmp_path / "videos"), cache=RenderCache(str(tmp_path / "cache")),
+                               use_cache=True, encoder=FFmpegEncoder(preset="ultrafast", progress=progress.append))
+    generator.progress_calls = progress
+    return generator
+
+
+def test_render_variants_sizes_and_progress(cached_generator, tone, cover):
+    """Test que cada variante sale con su tamaño y nombre, y el progreso agregado llega a 1"""
+    outputs = cached_generator.render_variants("cover", tone, "Song", "Artist", cover_image_path=cover,
+                                               variants=("1:1", {"aspect": "16:9", "name": "wide", "crf": 30}))
+
+    assert set(outputs) == {"1x1", "wide"}
+    assert outputs["wide"].endswith("Song_cover_wide.mp4")
+    assert ffmpeg_parse_infos(outputs["1x1"])["video_size"] == [1080, 1080]
+    assert ffmpeg_parse_infos(outputs["wide"])["video_size"] == [1920, 1080]
+    assert cached_generator.progress_calls[-1] == pytest.approx(1.0)
+
+
+def test_render_variants_served_from_cache(cached_generator, tone, cover, monkeypatch):
+    """Test que las variantes ya renderizadas salen de la caché y solo se renderiza la que cambia"""
+    cached_generator.render_variants("cover", tone, "Song", "Artist", cover_image_path=cover, variants=("1:1",))
+
+    rendered = []
+    original = cached_generator._render_cover
+    monkeypatch.setattr(cached_generator, "_render_cover",
+                        lambda *args, **kwargs: rendered.append(args[5]) or original(*args, **kwargs))
+    outputs = cached_generator.render_variants("cover", tone, "Song", "Artist", cover_image_path=cover,
+                                               variants=("1:1", {"aspect": "1:1", "name": "hq", "crf": 18}),
+                                               output_prefix="again")
+
+    assert rendered == [(1080, 1080)]
+    assert outputs["1x1"].endswith("again_1x1.mp4")
+    assert ffmpeg_parse_infos(outputs["1x1"])["video_size"] == [1080, 1080]
+    assert cached_generator.cache.stats()["entries"] == 2
+
+
+def test_render_variants_rejects_unknown_kind_and_aspect(generator, tone):
+    """Test que un tipo o aspect ratio desconocido lanza ValueError antes de renderizar"""
+    with pytest.raises(ValueError):
+        generator.render_variants("karaoke", tone, "Song", "Artist")
+    with pytest.raises(ValueError):
+        generator.render_variants("cover", tone, "Song", "Artist", variants=("3:2",))
@@ -0,0 +1,83 @@
+"""Tests de las letras sincronizadas (LRC) y la caché de glifos"""
+import numpy as np
+import pytest
+
+from video_generator.lyrics import LyricsRenderer, blend, parse_lrc, rasterize_line, timed_lines
+
+
+def test_parse_lrc_multiple_stamps_and_metadata():
+    """Test que se admiten varias marcas por línea y se ignoran los metadatos"""
+    text = "[ar:Artista]\n[00:12.00][01:30.50]Estribillo\n[00:01.5]Intro"
+    assert parse_lrc(text) == [(1.5, "Intro"), (12.0, "Estribillo"), (90.5, "Estribillo")]
+
+
+def test_timed_lines_from_lrc_file(tmp_path):
+    """Test que un fichero .lrc se lee y cada línea termina donde empieza la siguiente"""
+    path = tmp_path / "song.lrc"
+    path.write_text("[00:00.00]Uno\n[00:02.00]\n[00:03.00]Tres\n", encoding="utf-8")
+    assert timed_lines(str(path), 5.0) == [(0.0, 2.0, "Uno"), (3.0, 5.0, "Tres")]
+
+
+def test_timed_lines_plain_text_split_evenly():
+    """Test que el texto sin marcas se reparte a partes iguales"""
+    assert timed_lines("Uno\n\nDos\nTres\n", 6.0) == [(0.0, 2.0, "Uno"), (2.0, 4.0, "Dos"), (4.0, 6.0, "Tres")]
+
+
+def test_rasterize_line_is_cached_and_read_only():
+    """Test que cada línea se rasteriza una vez y los arrays compartidos no se pueden modificar"""
+    rgb, alpha = rasterize_line("Hola caché", size=24, stroke=1)
+    assert rasterize_line("Hola caché", size=24, stroke=1)[0] is rgb
+    assert rgb.dtype == np.uint8 and rgb.shape[2] == 3
+    assert alpha.dtype == np.uint16 and alpha.shape == rgb.shape[:2] + (1,)
+    assert alpha.max() == 255
+    with pytest.raises(ValueError):
+        rgb[0, 0] = 0
+
+    other, _ = rasterize_line("Hola caché", size=32, stroke=1)
+    assert other is not rgb and other.shape[0] > rgb.shape[0]
+
+
+def test_rasterize_line_wraps_long_text():
+    """Test que las líneas más anchas que max_width se parten en varias filas"""
+    single, _ = rasterize_line("palabra", size=24, stroke=0)
+    wrapped, _ = rasterize_line("palabra " * 8, size=24, stroke=0, max_width=200)
+    assert wrapped.shape[1] <= 200
+    assert wrapped.shape[0] > 2 * single.shape[0]
+
+
+def test_blend_alpha_opacity_and_clipping():
+    """Test que blend mezcla con alpha y opacidad y recorta en los bordes"""
+    frame = np.zeros((4, 4, 3), np.uint8)
+    rgb = np.full((2, 2, 3), 200, np.uint8)
+    alpha = np.array([[[255], [0]], [[128], [255]]], np.uint16)
+
+    blend(frame, rgb, alpha, 3, 3)
+    assert frame[3, 3].tolist() == [200, 200, 200]
+    assert frame[:3].max() == 0 and frame[:, :3].max() == 0
+
+    frame[:] = 0
+    blend(frame, rgb, alpha, 0, 0, opacity=0.5)
+    assert frame[0, 0, 0] == 100
+    assert frame[0, 1, 0] == 0
+    assert frame[1, 0, 0] == 50
+
+    frame[:] = 0
+    blend(frame, rgb, alpha, 10, 10)
+    blend(frame, rgb, alpha, 0, 0, opacity=0.0)
+    assert frame.max() == 0
+
+
+def test_renderer_active_and_upcoming_lines():
+    """Test que la línea activa aparece al centro tras el fundido y la siguiente se adelanta atenuada"""
+    background = np.zeros((120, 200, 3), np.uint8)
+    renderer = LyricsRenderer([(1.0, 3.0, "Hola")], 200, 120, background, size=24, stroke=1)
+
+    upcoming = renderer.make_frame(0.5)
+    assert 0 < upcoming.max() <= 255 * 0.35 + 1
+    assert np.nonzero(upcoming.max(axis=(1, 2)))[0].min() > 60
+
+    frame = renderer.make_frame(2.0)
+    rows = np.nonzero(frame.max(axis=(1, 2)))[0]
+    assert abs((rows.min() + rows.max()) / 2 - 60) <= 2
+    assert frame.max() == 255
+    assert renderer.make_frame(3.5).max() == 0
@@ -0,0 +1,93 @@
+"""Tests para el profiling de renders"""
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from video_generator import profiling
+
+MB = 1024 * 1024
+needs_clear_refs = pytest.mark.skipif(not os.path.exists("/proc/self/clear_refs"), reason="VmHWM solo en Linux")
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Eventos render_profile emitidos durante el test"""
+    collected = []
+    monkeypatch.setattr(profiling, "_listeners", [collected.append])
+    return collected
+
+
+def _allocate(megabytes: int):
+    block = np.ones(megabytes * MB, np.uint8)  # ones: las páginas se tocan y cuentan en el RSS
+    del block
+
+
+def test_profile_records_stages_and_failure(events):
+    """Test las etapas se acumulan, synthesis excluye composite y un error marca el evento como failed"""
+    with profiling.profile("lyric", size="16x16"):
+        profiling.record("synthesis", 2.0, 1.0, frames=10)
+        profiling.record("composite", 0.5, 0.25)
+    with pytest.raises(RuntimeError):
+        with profiling.profile("cover"):
+            raise RuntimeError("boom")
+
+    ok, failed = events
+    assert ok["frames"] == 10 and ok["size"] == "16x16"
+    assert ok["stages"]["synthesis"] == {"wall_seconds": 1.5, "cpu_seconds": 0.75}
+    assert failed["status"] == "failed" and "boom" in failed["error"]
+
+
+def test_stage_counts_frames_with_its_own_timing(events):
+    """Test una etapa cronometrada cuenta sus frames sin añadir muestras de duración falsas"""
+    with profiling.profile("lyric"):
+        with profiling.stage("encode", frames=48):
+            pass
+    with profiling.stage("encode", frames=10):  # Fuera de un render no hace nada
+        pass
+
+    (event,) = events
+    assert event["frames"] == 48
+    assert list(event["stages"]) == ["encode"] and event["stages"]["encode"]["wall_seconds"] > 0
+
+
+@needs_clear_refs
+def test_sequential_profiles_measure_their_own_peak(events):
+    """Test un render solo en el proceso mide su propio pico, no el del render anterior"""
+    with profiling.profile("cover"):
+        _allocate(200)
+    with profiling.profile("cover"):
+        pass
+
+    big, small = events
+    assert not big["peak_rss_shared"] and not small["peak_rss_shared"]
+    assert big["peak_rss_bytes"] - small["peak_rss_bytes"] > 150 * MB
+
+
+@needs_clear_refs
+def test_concurrent_profile_does_not_erase_peak(events):
+    """Test un render que empieza en otro hilo no reinicia el pico de uno que sigue en curso"""
+    allocated, sibling_done = threading.Event(), threading.Event()
+
+    def sibling():
+        allocated.wait()
+        with profiling.profile("cover", variant="sibling"):
+            pass
+        sibling_done.set()
+
+    thread = threading.Thread(target=sibling)
+    thread.start()
+    with profiling.profile("cover", variant="main"):
+        with profiling.profile("cover", variant="nested"):  # Anidado: cuenta en el exterior, sin reiniciar nada
+            _allocate(200)
+        baseline = profiling._peak_rss()
+        allocated.set()
+        sibling_done.wait()
+    thread.join()
+
+    by_variant = {event["variant"]: event for event in events}
+    assert set(by_variant) == {"main", "sibling"}
+    assert by_variant["main"]["peak_rss_shared"] and by_variant["sibling"]["peak_rss_shared"]
+    assert by_variant["main"]["peak_rss_bytes"] >= baseline
+    assert by_variant["sibling"]["peak_rss_bytes"] >= baseline
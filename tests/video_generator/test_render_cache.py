@@ -0,0 +1,83 @@
+"""Tests para la caché de renders direccionada por contenido"""
+import os
+import shutil
+
+import pytest
+
+from video_generator.render_cache import RenderCache, cache_key
+
+
+def _write(path, data: bytes):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_cache_key_depends_on_content_and_params(tmp_path):
+    """Test que la clave depende del contenido y los parámetros, no de la ruta ni del orden"""
+    audio = _write(tmp_path / "a.wav", b"audio")
+    copy = _write(tmp_path / "copy.wav", b"audio")
+    key = cache_key({"audio": audio, "cover": None}, {"size": [1080, 1920], "crf": 23})
+
+    assert cache_key({"cover": None, "audio": copy}, {"crf": 23, "size": [1080, 1920]}) == key
+    assert cache_key({"audio": audio, "cover": None}, {"size": [1080, 1920], "crf": 24}) != key
+    _write(tmp_path / "a.wav", b"other audio")
+    assert cache_key({"audio": audio, "cover": None}, {"size": [1080, 1920], "crf": 23}) != key
+
+
+def test_store_and_fetch_round_trip(tmp_path):
+    """Test que un render guardado se copia al destino y cuenta aciertos y fallos"""
+    cache = RenderCache(str(tmp_path / "cache"))
+    render = _write(tmp_path / "render.mp4", b"video" * 100)
+    target = tmp_path / "out" / "copy.mp4"
+
+    assert not cache.fetch("ab" * 32, str(target))
+    cache.store("ab" * 32, render)
+    assert cache.fetch("ab" * 32, str(target))
+    assert target.read_bytes() == b"video" * 100
+
+    target.write_bytes(b"overwritten")
+    assert cache.fetch("ab" * 32, str(tmp_path / "again.mp4"))
+    assert (tmp_path / "again.mp4").read_bytes() == b"video" * 100
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"], stats["entries"]) == (2, 1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_failed_store_leaves_no_partial_entry(tmp_path, monkeypatch):
+    """Test que una copia que falla a medias no deja ni la entrada ni el temporal"""
+    cache = RenderCache(str(tmp_path / "cache"))
+    render = _write(tmp_path / "render.mp4", b"video")
+
+    def partial_copy(src, dst):
+        with open(dst, "wb") as f:
+            f.write(b"vi")
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(shutil, "copyfile", partial_copy)
+    with pytest.raises(OSError):
+        cache.store("cd" * 32, render)
+    monkeypatch.undo()
+
+    assert list((tmp_path / "cache").rglob("*")) == [tmp_path / "cache" / "cd"]
+    assert not cache.fetch("cd" * 32, str(tmp_path / "out.mp4"))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    """Test que al pasar de max_bytes se expulsa la entrada usada hace más tiempo"""
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=250)
+    render = _write(tmp_path / "render.mp4", b"x" * 100)
+    keys = ["1" * 64, "2" * 64]
+    for i, key in enumerate(keys):
+        cache.store(key, render)
+        os.utime(cache._entry(key), (1000 + i, 1000 + i))
+
+    # Leer la más antigua la marca como usada: la expulsada es la otra
+    assert cache.fetch(keys[0], str(tmp_path / "hit.mp4"))
+    cache.store("3" * 64, render)
+
+    assert cache._entry(keys[0]).exists()
+    assert not cache._entry(keys[1]).exists()
+    assert cache._entry("3" * 64).exists()
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 200, 1)
@@ -0,0 +1,127 @@
+"""Tests para la render farm: prioridad, cancelación y caída de workers"""
+import os
+import signal
+import subprocess
+import time
+
+import pytest
+from moviepy.config import get_setting
+
+from video_generator import render_farm
+from video_generator.render_farm import (PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, RenderFarm, RenderJobError,
+                                         RenderStatus)
+
+TIMEOUT = 120
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    """Video de 4 s del que se sacan los recortes de los trabajos"""
+    path = str(tmp_path_factory.mktemp("farm") / "source.mp4")
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=160x120:rate=30",
+                    "-t", "4", "-c:v", "libx264", "-preset", "ultrafast", "-g", "30", path], check=True)
+    return path
+
+
+@pytest.fixture
+def farm():
+    """Farm de un solo worker: los trabajos se ejecutan de uno en uno"""
+    farm = RenderFarm(max_workers=1, job_threads=1)
+    yield farm
+    farm.shutdown(wait=False)
+
+
+def _blocker(farm, source, tmp_path, clips: int = 40) -> str:
+    """Trabajo largo que avisa de su progreso clip a clip; vuelve cuando ya está en marcha en el worker"""
+    job_id = farm.submit("extract", {"video_path": source, "segments": [(0, 1)] * clips, "exact": False,
+                                     "output_dir": str(tmp_path / "clips")}, threads=1)
+    deadline = time.time() + TIMEOUT
+    while farm.status(job_id)["progress"] <= 0 and time.time() < deadline:
+        time.sleep(0.02)
+    assert farm.status(job_id)["status"] == RenderStatus.RUNNING.value
+    return job_id
+
+
+def _trim(farm, source, tmp_path, name: str, priority: int = PRIORITY_NORMAL) -> str:
+    return farm.submit("trim", {"input_path": source, "start": 0, "end": 1, "exact": False,
+                                "output_path": str(tmp_path / f"{name}.mp4")}, priority=priority)
+
+
+def _kill_workers(farm):
+    for pid in list(farm._pool._processes):
+        os.kill(pid, signal.SIGKILL)
+
+
+def test_priority_decides_execution_order(farm, source, tmp_path):
+    """Test con el worker ocupado, los trabajos en cola arrancan por prioridad y no por llegada"""
+    blocker = _blocker(farm, source, tmp_path)
+    low = _trim(farm, source, tmp_path, "low", PRIORITY_LOW)
+    normal = _trim(farm, source, tmp_path, "normal", PRIORITY_NORMAL)
+    high = _trim(farm, source, tmp_path, "high", PRIORITY_HIGH)
+
+    jobs = [farm.wait(job_id, TIMEOUT) for job_id in (blocker, high, normal, low)]
+    assert [job["status"] for job in jobs] == [RenderStatus.DONE.value] * 4
+    started = [job["started_at"] for job in jobs]
+    assert started == sorted(started)
+
+
+def test_cancel_queued_and_running_jobs(farm, source, tmp_path):
+    """Test cancelar en cola evita que arranque; en marcha aborta en el siguiente progreso y libera el worker"""
+    blocker = _blocker(farm, source, tmp_path)
+    queued = _trim(farm, source, tmp_path, "queued")
+
+    assert farm.cancel(queued)
+    assert farm.status(queued)["status"] == RenderStatus.CANCELLED.value
+    assert farm.cancel(blocker)
+    with pytest.raises(RenderJobError) as excinfo:
+        farm.result(blocker, TIMEOUT)
+    assert excinfo.value.job["status"] == RenderStatus.CANCELLED.value
+    assert excinfo.value.job["progress"] < 1.0
+
+    after = _trim(farm, source, tmp_path, "after")
+    assert farm.wait(after, TIMEOUT)["status"] == RenderStatus.DONE.value
+    assert farm.status(queued)["started_at"] is None
+    assert not farm.cancel(after)
+
+
+def test_worker_crash_requeues_and_keeps_dispatching(farm, source, tmp_path):
+    """Test si matan al worker el trabajo vuelve a la cola, el pool se reconstruye y la cola sigue avanzando"""
+    crashed = _blocker(farm, source, tmp_path, clips=10)
+    queued = _trim(farm, source, tmp_path, "queued")
+    _kill_workers(farm)
+
+    job = farm.wait(crashed, TIMEOUT)
+    assert job["status"] == RenderStatus.DONE.value
+    assert job["crashes"] == 1
+    assert farm.wait(queued, TIMEOUT)["status"] == RenderStatus.DONE.value
+    later = _trim(farm, source, tmp_path, "later")
+    assert farm.wait(later, TIMEOUT)["status"] == RenderStatus.DONE.value
+
+
+def test_job_that_keeps_crashing_fails(farm, source, tmp_path, monkeypatch):
+    """Test un trabajo que tumba a su worker RENDER_JOB_MAX_CRASHES veces termina en FAILED"""
+    monkeypatch.setattr(render_farm, "RENDER_JOB_MAX_CRASHES", 2)
+    crashed = _blocker(farm, source, tmp_path)
+    _kill_workers(farm)
+    deadline = time.time() + TIMEOUT
+    while farm.status(crashed)["crashes"] < 1 and time.time() < deadline:
+        time.sleep(0.02)
+    while farm.status(crashed)["progress"] <= 0 and time.time() < deadline:
+        time.sleep(0.02)
+    _kill_workers(farm)
+
+    job = farm.wait(crashed, TIMEOUT)
+    assert job["status"] == RenderStatus.FAILED.value
+    assert job["crashes"] == 2
+    assert farm.wait(_trim(farm, source, tmp_path, "after"), TIMEOUT)["status"] == RenderStatus.DONE.value
+
+
+def test_finished_jobs_are_pruned(farm, source, tmp_path, monkeypatch):
+    """Test solo se conservan los últimos RENDER_FARM_MAX_FINISHED trabajos terminados"""
+    monkeypatch.setattr(render_farm, "RENDER_FARM_MAX_FINISHED", 2)
+    done = [farm.wait(_trim(farm, source, tmp_path, f"job{i}"), TIMEOUT)["id"] for i in range(3)]
+    latest = _trim(farm, source, tmp_path, "latest")
+
+    with pytest.raises(KeyError):
+        farm.status(done[0])
+    assert [job["id"] for job in farm.jobs()] == done[1:] + [latest]
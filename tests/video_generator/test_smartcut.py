@@ -0,0 +1,94 @@
+"""Tests para el smart cut (re-encode de la cabeza + copia del resto)"""
+import subprocess
+
+import numpy as np
+import pytest
+from moviepy.config import get_setting
+
+from video_generator import smartcut
+
+FPS = 30
+FLASH = 6.0  # Segundo del master en el que coinciden destello y pitido
+SAMPLE_RATE = 44100
+
+
+@pytest.fixture(scope="module")
+def master(tmp_path_factory):
+    """Master de 12 s con B-frames (preset veryfast), GOP de 2 s y un destello con pitido en FLASH"""
+    path = str(tmp_path_factory.mktemp("smartcut") / "master.mp4")
+    flash = f"between(t,{FLASH},{FLASH + 0.2})"
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-v", "error", "-y",
+                    "-f", "lavfi", "-i", f"testsrc2=size=160x120:rate={FPS},"
+                                         f"drawbox=color=white:t=fill:enable='{flash}'",
+                    "-f", "lavfi", "-i", f"aevalsrc='if({flash},sin(2*PI*1000*t),0)':s={SAMPLE_RATE}",
+                    "-t", "12", "-c:v", "libx264", "-preset", "veryfast", "-g", str(2 * FPS),
+                    "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path], check=True)
+    return path
+
+
+def _flash_frame(frames: np.ndarray) -> int:
+    return int(np.argmax(frames.reshape(len(frames), -1).mean(axis=1) > 240))
+
+
+def _beep_seconds(path: str) -> float:
+    pcm = subprocess.run([get_setting("FFMPEG_BINARY"), "-v", "error", "-i", path, "-map", "0:a:0",
+                          "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"],
+                         stdout=subprocess.PIPE, check=True).stdout
+    samples = np.abs(np.frombuffer(pcm, np.int16).astype(np.float32))
+    return int(np.argmax(samples > 0.5 * samples.max())) / SAMPLE_RATE
+
+
+def test_smart_cut_keeps_frame_count_and_av_sync(master, tmp_path, decode_frames):
+    """Test corte a mitad de GOP sobre un master con B-frames: 240 frames exactos y audio sin desfase"""
+    assert smartcut.reorder_delay(master) > 0  # El master de verdad lleva B-frames
+
+    start, end = 2.5, 10.5
+    output = smartcut.cut(master, start, end, str(tmp_path / "cut.mp4"))
+
+    frames = decode_frames(output)
+    assert len(frames) == (end - start) * FPS
+    flash = _flash_frame(frames)
+    assert flash == (FLASH - start) * FPS
+    # El pitido arranca en el mismo instante que el destello (menos de medio frame)
+    assert abs(_beep_seconds(output) - flash / FPS) < 0.5 / FPS
+
+
+def test_smart_cut_matches_full_reencode(master, tmp_path, decode_frames):
+    """Test la unión cabeza/cola no duplica ni salta frames respecto al re-encode completo"""
+    smart = decode_frames(smartcut.cut(master, 2.5, 6.5, str(tmp_path / "smart.mp4")))
+    full = decode_frames(smartcut.reencode_cut(master, 2.5, 6.5, str(tmp_path / "full.mp4")))
+
+    assert smart.shape == full.shape
+    diff = np.abs(smart.astype(np.int16) - full.astype(np.int16)).mean(axis=(1, 2, 3))
+    assert diff.max() < 8
+
+
+def test_probe_keyframes_keeps_keyframe_near_window_end(master):
+    """Test la ventana siempre incluye el keyframe del scenecut a 0.27 s de su final"""
+    for _ in range(10):
+        assert smartcut.probe_keyframes(master, 2.5, 6.5)["keyframes"] == [4.0, 6.0, 6.233333]
+
+
+def _packets(path: str) -> str:
+    out = subprocess.run([get_setting("FFMPEG_BINARY"), "-v", "error", "-i", path, "-map", "0:v:0", "-c", "copy",
+                          "-f", "framecrc", "-"], stdout=subprocess.PIPE, check=True).stdout.decode()
+    return "\n".join(line for line in out.splitlines() if not line.startswith("#"))
+
+
+def test_probe_source_once_gives_same_cut(master, tmp_path):
+    """Test cortar con la inspección previa de todo el video da los mismos paquetes que inspeccionar por corte"""
+    source = smartcut.probe_source(master, 12.0)
+    assert source["delay"] == smartcut.reorder_delay(master)
+    # Los GOPs de 2 s más los que abre el scenecut de x264 tras el destello
+    assert source["keyframes"][:4] == [0.0, 2.0, 4.0, 6.0] and source["keyframes"][-1] > 10.0
+
+    for start, end in ((2.5, 6.5), (0.5, 11.5)):
+        probed = smartcut.cut(master, start, end, str(tmp_path / "probed.mp4"))
+        shared = smartcut.cut(master, start, end, str(tmp_path / "shared.mp4"), source=source)
+        assert _packets(shared) == _packets(probed)
+
+
+def test_cut_rejects_empty_segment(master, tmp_path):
+    """Test un segmento vacío es un error, no un archivo vacío"""
+    with pytest.raises(ValueError):
+        smartcut.cut(master, 3.0, 3.0, str(tmp_path / "empty.mp4"))
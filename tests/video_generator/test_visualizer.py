@@ -0,0 +1,81 @@
+"""Tests del visualizador de audio basado en FFT"""
+import numpy as np
+import pytest
+
+from video_generator.visualizer import STYLES, AudioAnalysis, AudioVisualizer, load_mono, spectrum_bands
+
+SAMPLE_RATE = 22050
+
+
+def test_load_mono_decodes_whole_file(write_tone, tmp_path):
+    """Test que el audio se decodifica completo, mono y en [-1, 1]"""
+    samples = load_mono(write_tone(tmp_path / "a.wav", 1.0))
+    assert samples.dtype == np.float32
+    assert len(samples) == SAMPLE_RATE
+    assert 0.25 < np.abs(samples).max() <= 1.0
+
+
+def test_spectrum_peak_in_tone_band():
+    """Test que la banda más alta del espectro contiene la frecuencia del tono"""
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    samples = (0.5 * np.sin(2 * np.pi * 1000 * t)).astype(np.float32)
+    levels = spectrum_bands(samples, n_frames=24, hop=SAMPLE_RATE / 24, n_bars=32)
+
+    assert levels.shape == (24, 32)
+    assert levels.min() >= 0.0 and levels.max() <= 1.0
+    edges = np.geomspace(40.0, SAMPLE_RATE / 2, 33)
+    band = np.searchsorted(edges, 1000) - 1
+    assert abs(int(levels[12].argmax()) - band) <= 1
+
+
+def test_bars_decay_after_silence():
+    """Test que las barras caen poco a poco cuando el audio se corta"""
+    samples = np.zeros(SAMPLE_RATE, np.float32)
+    t = np.arange(SAMPLE_RATE // 2) / SAMPLE_RATE
+    samples[:len(t)] = 0.5 * np.sin(2 * np.pi * 440 * t)
+    levels = spectrum_bands(samples, n_frames=24, hop=SAMPLE_RATE / 24, n_bars=16).max(axis=1)
+
+    tail = levels[16:]
+    assert np.all(np.diff(tail) <= 1e-6)
+    assert tail[0] > 0.0
+
+
+def test_analysis_shared_between_sizes(tone):
+    """Test que un AudioAnalysis se reutiliza entre variantes y calcula cada espectro una vez"""
+    analysis = AudioAnalysis(tone, fps=24)
+    assert analysis.n_frames == 48
+
+    vertical = AudioVisualizer(analysis, 36, 64, style="bars")
+    square = AudioVisualizer(analysis, 48, 48, style="bars")
+    assert vertical.levels is square.levels
+    assert vertical.samples is analysis.samples
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_frames_draw_over_background(tone, style):
+    """Test que cada estilo dibuja sobre el fondo sin salirse de su región"""
+    background = np.full((64, 48, 3), 40, np.uint8)
+    viz = AudioVisualizer(tone, 48, 64, style=style, background=background, color=(255, 0, 0))
+
+    frame = viz.make_frame(1.0)
+    assert frame.shape == (64, 48, 3) and frame.dtype == np.uint8
+    drawn = np.all(frame == (255, 0, 0), axis=2)
+    assert drawn.any()
+    rows = np.nonzero(drawn.any(axis=1))[0]
+    assert viz.region[0] <= rows.min() and rows.max() < viz.region[1]
+    assert np.all(frame[~drawn] == 40)
+
+
+def test_make_frame_reuses_buffer(tone):
+    """Test que make_frame reutiliza el buffer y se limita al último frame"""
+    viz = AudioVisualizer(tone, 32, 32, style="waveform")
+    first = viz.make_frame(0.5)
+    assert viz.make_frame(1.0) is first
+    assert viz._frame_index(100.0) == viz.n_frames - 1
+    assert viz.clip().duration == pytest.approx(2.0)
+
+
+def test_unknown_style_rejected(tone):
+    """Test que un estilo desconocido lanza ValueError"""
+    with pytest.raises(ValueError):
+        AudioVisualizer(tone, 32, 32, style="spiral")
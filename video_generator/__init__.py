@@ -1,5 +1,9 @@
 """Video Generator Module"""
 from .generator import VideoGenerator
 from .editor import VideoEditor
+from .visualizer import AudioVisualizer
+from .render_farm import RenderFarm, RenderStatus, get_render_farm
+from .render_cache import RenderCache, get_render_cache
 
-__all__ = ['VideoGenerator', 'VideoEditor']
+__all__ = ['VideoGenerator', 'VideoEditor', 'AudioVisualizer', 'RenderFarm', 'RenderStatus', 'get_render_farm',
+           'RenderCache', 'get_render_cache']
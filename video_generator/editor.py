@@ -2,22 +2,50 @@
 ✂️ VIDEO EDITOR - EDICIÓN BÁSICA DE VIDEOS
 """
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
 from moviepy.editor import *
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from . import smartcut
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _segment_bounds(segment) -> Tuple[float, float]:
+    """(start, end) de un segmento en cualquiera de los formatos aceptados por extract_clips"""
+    if isinstance(segment, dict):
+        start = segment.get("start_time", segment.get("start"))
+        end = segment.get("end_time", segment.get("end"))
+    else:
+        start, end = segment
+    if start is None or end is None or float(end) <= float(start):
+        raise ValueError(f"Segmento inválido: {segment}")
+    return float(start), float(end)
+
+
 class VideoEditor:
     """Editor de videos para clips cortos"""
     
     @staticmethod
-    def trim_video(input_path: str, start: float, end: float, output_path: str) -> str:
-        """Recorta video entre start y end (segundos)"""
+    def submit(kind: str, priority: Optional[int] = None, threads: Optional[int] = None, **params) -> str:
+        """Encola un corte (kind: trim, promo o extract) en la render farm y devuelve el id del trabajo"""
+        from .render_farm import PRIORITY_NORMAL, get_render_farm
+        return get_render_farm().submit(kind, params, PRIORITY_NORMAL if priority is None else priority, threads)
+    
+    @staticmethod
+    def trim_video(input_path: str, start: float, end: float, output_path: str, exact: bool = True) -> str:
+        """
+        Recorta video entre start y end (segundos) sin re-codificarlo entero.
+        exact=True re-codifica solo hasta el primer keyframe (smart cut);
+        exact=False copia desde el keyframe anterior a start (más rápido, inicio aproximado).
+        """
         try:
-            video = VideoFileClip(input_path).subclip(start, end)
-            video.write_videofile(output_path, codec='libx264', audio_codec='aac')
+            smartcut.cut(input_path, start, end, output_path, exact=exact)
             logger.info(f"✅ Video recortado: {output_path}")
             return output_path
         except Exception as e:
@@ -25,22 +53,96 @@ class VideoEditor:
             raise
     
     @staticmethod
-    def create_promo_clip(video_path: str, duration: int = 30, output_path: str = None) -> str:
+    def create_promo_clip(video_path: str, duration: int = 30, output_path: str = None, exact: bool = True) -> str:
         """Crea clip promocional de X segundos desde el inicio"""
         try:
-            video = VideoFileClip(video_path)
-            promo = video.subclip(0, min(duration, video.duration))
+            video_duration = ffmpeg_parse_infos(video_path)["duration"]
             
             if not output_path:
                 output_path = str(Path(video_path).with_suffix('')) + f"_promo_{duration}s.mp4"
             
-            promo.write_videofile(output_path, codec='libx264', audio_codec='aac')
+            smartcut.cut(video_path, 0, min(duration, video_duration), output_path, exact=exact)
             logger.info(f"✅ Promo clip creado: {output_path}")
             return output_path
         except Exception as e:
             logger.error(f"❌ Error creando promo: {e}")
             raise
     
+    @staticmethod
+    def extract_clips(
+        video_path: str,
+        segments: Iterable,
+        output_dir: Optional[str] = None,
+        exact: bool = True,
+        max_workers: Optional[int] = None,
+        progress: Optional[Callable[[float], None]] = None
+    ) -> Dict:
+        """
+        Extrae varios clips de un mismo video. La fuente se inspecciona una
+        sola vez (duración, keyframes y retardo de B-frames, ver
+        smartcut.probe_source) y los cortes (smart cut o copia, según
+        `exact`) corren en procesos ffmpeg en paralelo.
+        
+        `segments` admite la salida de YOLOAnalyzer.get_viral_clips
+        ({"start_time", "end_time", ...}), dicts {"start", "end"} o tuplas
+        (start, end). Devuelve {"clips": [...], "stats": {...}}; cada clip
+        conserva los campos de su segmento y añade path y elapsed_seconds
+        (o error si ese corte falló, sin afectar al resto). `progress`
+        recibe la fracción de clips terminados.
+        """
+        started = time.perf_counter()
+        video_duration = ffmpeg_parse_infos(video_path)["duration"]
+        # Keyframes y retardo de B-frames una sola vez para todos los cortes exactos
+        probe = smartcut.probe_source(video_path, video_duration) if exact else None
+        source = Path(video_path)
+        target_dir = Path(output_dir) if output_dir else source.parent
+        target_dir.mkdir(parents=True, exist_ok=True)
+        
+        clips = []
+        for i, segment in enumerate(segments):
+            clip = dict(segment) if isinstance(segment, dict) else {}
+            start, end = _segment_bounds(segment)
+            start, end = max(0.0, start), min(end, video_duration)
+            clip.update(start=start, end=end,
+                        path=str(target_dir / f"{source.stem}_clip{i + 1:02d}_{start:.0f}-{end:.0f}s.mp4"))
+            clips.append(clip)
+        
+        def extract(clip: Dict) -> Dict:
+            t0 = time.perf_counter()
+            try:
+                smartcut.cut(video_path, clip["start"], clip["end"], clip["path"], exact=exact, source=probe)
+            except Exception as e:
+                logger.error(f"❌ Error extrayendo clip {clip['start']:.1f}-{clip['end']:.1f}s: {e}")
+                clip["error"] = str(e)
+                clip["path"] = None
+            clip["elapsed_seconds"] = time.perf_counter() - t0
+            return clip
+        
+        workers = max_workers or min(len(clips), os.cpu_count() or 1) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as pool:
+            futures = [pool.submit(extract, clip) for clip in clips]
+            try:
+                for done, _ in enumerate(as_completed(futures), 1):
+                    if progress:
+                        progress(done / len(futures))
+            except BaseException:
+                for future in futures:  # p.ej. cancelación desde progress: no arrancar más cortes
+                    future.cancel()
+                raise
+            clips = [future.result() for future in futures]
+        
+        failed = sum(1 for clip in clips if clip.get("error"))
+        stats = {
+            "count": len(clips),
+            "failed": failed,
+            "wall_seconds": time.perf_counter() - started,
+            "clip_seconds": sum(clip["end"] - clip["start"] for clip in clips if not clip.get("error")),
+            "cut_seconds": sum(clip["elapsed_seconds"] for clip in clips),
+        }
+        logger.info(f"✅ {len(clips) - failed}/{len(clips)} clips extraídos de {video_path} "
+                    f"en {stats['wall_seconds']:.2f}s")
+        return {"clips": clips, "stats": stats}
+    
     @staticmethod
     def add_text_overlay(
         video_path: str,
@@ -0,0 +1,200 @@
+"""
+📼 ENCODER - ENCODE DIRECTO A FFMPEG
+Los frames se escriben tal cual (rgb24) en el stdin de ffmpeg y el audio
+original se mezcla sin re-decodificarlo en Python. Para videos de imagen
+estática se usa `-loop 1`, sin trabajo por frame en Python.
+"""
+import logging
+import os
+import subprocess
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from moviepy.config import get_setting
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+VIDEO_PRESET = os.getenv("VIDEO_PRESET", "veryfast")
+VIDEO_CRF = int(os.getenv("VIDEO_CRF", "23"))
+VIDEO_THREADS = int(os.getenv("VIDEO_THREADS", "0"))  # 0 = automático (todos los núcleos)
+VIDEO_PIX_FMT = os.getenv("VIDEO_PIX_FMT", "yuv420p")
+AUDIO_BITRATE = os.getenv("VIDEO_AUDIO_BITRATE", "192k")
+PROGRESS_EVERY = 24  # Frames entre avisos de progreso
+
+
+class FFmpegEncoder:
+    """Encoder H.264 que recibe frames por pipe o imágenes fijas en bucle"""
+
+    def __init__(self, preset: str = VIDEO_PRESET, crf: int = VIDEO_CRF, threads: int = VIDEO_THREADS,
+                 pix_fmt: str = VIDEO_PIX_FMT, audio_bitrate: str = AUDIO_BITRATE,
+                 max_bitrate: Optional[str] = None, progress: Optional[Callable[[float], None]] = None):
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.pix_fmt = pix_fmt
+        self.audio_bitrate = audio_bitrate
+        self.max_bitrate = max_bitrate  # Tope de bitrate sobre el CRF (p.ej. "8M"), opcional
+        # progress(fracción) se llama durante el encode; si lanza una excepción el encode se aborta
+        self.progress = progress
+        self.binary = get_setting("FFMPEG_BINARY")
+
+    def with_options(self, **overrides) -> "FFmpegEncoder":
+        """Copia del encoder con algunos parámetros cambiados (preset, crf, max_bitrate...)"""
+        options = {"preset": self.preset, "crf": self.crf, "threads": self.threads, "pix_fmt": self.pix_fmt,
+                   "audio_bitrate": self.audio_bitrate, "max_bitrate": self.max_bitrate,
+                   "progress": self.progress}
+        options.update(overrides)
+        return FFmpegEncoder(**options)
+
+    def _output_args(self, output_path: str, has_audio: bool, tune: Optional[str] = None) -> List[str]:
+        args = ["-c:v", "libx264", "-preset", self.preset, "-crf", str(self.crf),
+                "-pix_fmt", self.pix_fmt, "-threads", str(self.threads)]
+        if self.max_bitrate:
+            args += ["-maxrate", self.max_bitrate, "-bufsize", self.max_bitrate]
+        if tune:
+            args += ["-tune", tune]
+        if has_audio:
+            args += ["-c:a", "aac", "-b:a", self.audio_bitrate, "-shortest"]
+        return args + ["-movflags", "+faststart", output_path]
+
+    def _run(self, cmd: List[str], frames: Optional[Iterable[np.ndarray]] = None,
+             duration: Optional[float] = None, n_frames: int = 0) -> str:
+        """
+        Ejecuta ffmpeg. En el perfil del render, synthesis es el tiempo
+        generando frames y encode el tiempo bloqueado esperando a ffmpeg
+        (con la CPU y el pico de memoria del propio proceso ffmpeg).
+        """
+        output_path = cmd[-1]
+        synthesis = synthesis_cpu = waiting = 0.0
+        # Sin pipe de frames, el progreso sale de `-progress pipe:1` (out_time_us sobre la duración)
+        track_output = frames is None and self.progress is not None and bool(duration)
+        if track_output:
+            cmd = cmd[:-1] + ["-progress", "pipe:1", "-nostats", output_path]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE if frames is not None else subprocess.DEVNULL,
+                                stdout=subprocess.PIPE if track_output else subprocess.DEVNULL,
+                                stderr=subprocess.PIPE)
+        try:
+            started = time.perf_counter()
+            if track_output:
+                for line in proc.stdout:
+                    if line.startswith(b"out_time_us=") and line[12:].strip().isdigit():
+                        self.progress(min(1.0, int(line[12:]) / 1e6 / duration))
+            if frames is not None:
+                frames = iter(frames)
+                n_frames = 0
+                try:
+                    while True:
+                        wall, cpu = time.perf_counter(), time.thread_time()
+                        frame = next(frames, None)
+                        written = time.perf_counter()
+                        synthesis += written - wall
+                        synthesis_cpu += time.thread_time() - cpu
+                        if frame is None:
+                            break
+                        proc.stdin.write(memoryview(np.ascontiguousarray(frame, dtype=np.uint8)))
+                        waiting += time.perf_counter() - written
+                        n_frames += 1
+                except BrokenPipeError:
+                    pass  # ffmpeg terminó antes de tiempo; el error está en stderr
+                finally:
+                    proc.stdin.close()
+            else:
+                waiting = time.perf_counter() - started
+            # Con -loglevel error stderr es pequeño y no bloquea mientras se escriben frames
+            wall = time.perf_counter()
+            stderr = proc.stderr.read()
+            usage = _wait(proc)
+            waiting += time.perf_counter() - wall
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        if frames is not None:
+            profiling.record("synthesis", synthesis, synthesis_cpu)
+        profiling.record("encode", waiting, usage.ru_utime + usage.ru_stime if usage else 0.0, frames=n_frames,
+                         ffmpeg_rss=usage.ru_maxrss * 1024 if usage else 0)
+        if proc.returncode != 0:
+            raise IOError(f"ffmpeg falló generando {output_path}: {stderr.decode(errors='replace').strip()}")
+        return output_path
+
+    def encode_frames(self, frames: Iterable[np.ndarray], size: Tuple[int, int], fps: float, output_path: str,
+                      audio_path: Optional[str] = None, total_frames: Optional[int] = None) -> str:
+        """Codifica frames (h, w, 3) uint8 de un generador; `size` es (w, h)"""
+        if self.progress and total_frames:
+            frames = _with_progress(frames, total_frames, self.progress)
+        w, h = size
+        cmd = [self.binary, "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-r", str(fps), "-i", "-"]
+        if audio_path:
+            cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+        return self._run(cmd + self._output_args(output_path, bool(audio_path)), frames)
+
+    def encode_clip(self, clip, fps: float, output_path: str, audio_path: Optional[str] = None) -> str:
+        """Codifica un clip de MoviePy pidiendo sus frames uno a uno (sin el writer de MoviePy)"""
+        n_frames = int(round(clip.duration * fps))
+        return self.encode_frames(iter_frames(clip, fps), clip.size, fps, output_path, audio_path, n_frames)
+
+    def encode_still(self, image_path: str, size: Tuple[int, int], duration: float, output_path: str,
+                     audio_path: Optional[str] = None, overlay_path: Optional[str] = None,
+                     overlay_position: Tuple[int, int] = (0, 0), overlay_until: Optional[float] = None,
+                     fps: float = 24) -> str:
+        """
+        Video de imagen fija con `-loop 1` (escalada y recortada a `size`).
+        Opcionalmente superpone una imagen RGBA hasta `overlay_until` segundos.
+
+        Las imágenes entran a 1 fps: con `-framerate {fps}` ffmpeg volvía a
+        decodificar el PNG, escalarlo y recortarlo en cada frame, y era más
+        lento que MoviePy. El filtro fps duplica el frame ya escalado hasta
+        `fps`; el overlay va después para que se apague en el instante exacto.
+        """
+        w, h = size
+        loop = ["-loop", "1", "-framerate", "1", "-i"]
+        cmd = [self.binary, "-y", "-loglevel", "error"] + loop + [image_path]
+        if overlay_path:
+            cmd += loop + [overlay_path]
+        if audio_path:
+            cmd += ["-i", audio_path]
+
+        base = f"scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h},fps={fps}"
+        if overlay_path:
+            x, y = overlay_position
+            enable = f":enable='lt(t,{overlay_until})'" if overlay_until else ""
+            cmd += ["-filter_complex", f"[0:v]{base}[bg];[bg][1:v]overlay={x}:{y}{enable}[v]", "-map", "[v]"]
+        else:
+            cmd += ["-vf", base, "-map", "0:v:0"]
+        if audio_path:
+            cmd += ["-map", f"{2 if overlay_path else 1}:a:0"]
+        cmd += ["-t", f"{duration:.3f}"]
+        return self._run(cmd + self._output_args(output_path, bool(audio_path), tune="stillimage"),
+                         duration=duration, n_frames=int(round(duration * fps)))
+
+
+def _wait(proc: subprocess.Popen):
+    """wait() que además devuelve el rusage del proceso hijo (None si la plataforma no lo ofrece)"""
+    if not hasattr(os, "wait4"):
+        proc.wait()
+        return None
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    except ChildProcessError:  # Ya recogido
+        proc.wait()
+        return None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return usage
+
+
+def _with_progress(frames: Iterable[np.ndarray], total: int,
+                   progress: Callable[[float], None]) -> Iterator[np.ndarray]:
+    for i, frame in enumerate(frames, 1):
+        if i % PROGRESS_EVERY == 0:
+            progress(min(1.0, i / total))
+        yield frame
+
+
+def iter_frames(clip, fps: float) -> Iterator[np.ndarray]:
+    n_frames = int(round(clip.duration * fps))
+    for i in range(n_frames):
+        yield clip.get_frame(i / fps)
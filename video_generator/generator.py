@@ -4,22 +4,123 @@ Integra OpenAI para prompts + MoviePy para edición
 """
 import os
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Sequence, Tuple
 from moviepy.editor import *
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageOps
 import numpy as np
 
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from . import profiling
+from .encoder import FFmpegEncoder
+from .lyrics import LyricsRenderer, blend, rasterize_line, timed_lines
+from .render_cache import RENDER_CACHE_ENABLED, RenderCache, cache_key, get_render_cache
+from .visualizer import AudioAnalysis, AudioVisualizer
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+FPS = 24
+TITLE_SECONDS = 5
+RENDER_BACKENDS = ("ffmpeg", "moviepy")
+VIDEO_RENDER_BACKEND = os.getenv("VIDEO_RENDER_BACKEND", "ffmpeg")
+RENDER_CACHE_VERSION = 1  # Súbelo al cambiar cómo se renderiza: invalida la caché de renders
+
+VIDEO_KINDS = ("lyric", "visualizer", "cover")
+# TikTok/Reels/Shorts, feed, YouTube e Instagram vertical
+ASPECT_SIZES = {
+    "9:16": (1080, 1920),
+    "1:1": (1080, 1080),
+    "16:9": (1920, 1080),
+    "4:5": (1080, 1350),
+}
+DEFAULT_VARIANTS = ("9:16", "1:1", "16:9")
+
+GRADIENT_TOP_COLOR = (138, 43, 226)  # Purple
+GRADIENT_BOTTOM_COLOR = (0, 0, 0)  # Black
+
+
+def _audio_duration(audio_path: str) -> float:
+    """Duración leída de la cabecera, sin decodificar el audio"""
+    return ffmpeg_parse_infos(audio_path)["duration"]
+
+
+def _load_cover(cover_image_path: str) -> Image.Image:
+    with Image.open(cover_image_path) as img:
+        return img.convert("RGB")
+
+
+def _variant_spec(variant) -> Dict:
+    """Normaliza "16:9" o {"aspect": "16:9", "crf": 20, ...} a {"aspect", "name", "encoder"}"""
+    spec = {"aspect": variant} if isinstance(variant, str) else dict(variant)
+    aspect = spec.pop("aspect", None)
+    if aspect not in ASPECT_SIZES:
+        raise ValueError(f"Aspect ratio no soportado: {aspect} (usa {', '.join(ASPECT_SIZES)})")
+    name = spec.pop("name", aspect.replace(":", "x"))
+    return {"aspect": aspect, "name": name, "encoder": spec}
+
+
+def _title_raster(title: str, artist: str):
+    return rasterize_line(f"{title}\n{artist}", size=60, stroke=2)
+
+
+@lru_cache(maxsize=16)
+def _gradient_frame(w: int, h: int, top_color: Tuple[int, int, int],
+                    bottom_color: Tuple[int, int, int]) -> np.ndarray:
+    """Gradiente vertical (h, w, 3) calculado una sola vez por tamaño y colores"""
+    ratio = (np.arange(h, dtype=np.float32) / h)[:, None]
+    column = np.asarray(top_color, np.float32) * (1 - ratio) + np.asarray(bottom_color, np.float32) * ratio
+    # Broadcast de la columna a todo el ancho; copia contigua para el encoder
+    frame = np.ascontiguousarray(np.broadcast_to(column.astype(np.uint8)[:, None, :], (h, w, 3)))
+    frame.flags.writeable = False
+    return frame
+
+
+@lru_cache(maxsize=4)
+def _gradient_cycle(w: int, h: int, top_color: Tuple[int, int, int],
+                    bottom_color: Tuple[int, int, int], frames: int) -> Tuple[np.ndarray, ...]:
+    """Ciclo de `frames` gradientes que desplazan el color superior hacia abajo y vuelven"""
+    base = _gradient_frame(w, h, top_color, bottom_color)
+    cycle = []
+    for i in range(frames):
+        # En teoría cos(2π·i/n) == cos(2π·(n-i)/n), pero en coma flotante difieren en
+        # el último bit y int() trunca a filas distintas (con n=12, h=40: 4 en la ida
+        # y 5 en la vuelta). Con la fase plegada la vuelta repite la ida exactamente
+        phase = min(i, frames - i)
+        shift = int(h * 0.25 * (1 - np.cos(2 * np.pi * phase / frames)) / 2)
+        frame = np.concatenate([np.broadcast_to(base[:1], (shift, w, 3)), base[:h - shift]])
+        frame.flags.writeable = False
+        cycle.append(frame)
+    return tuple(cycle)
+
 
 class VideoGenerator:
     """Generador de videos con IA"""
     
-    def __init__(self, output_dir: str = "data/videos"):
+    def __init__(self, output_dir: str = "data/videos", backend: str = VIDEO_RENDER_BACKEND,
+                 encoder: Optional[FFmpegEncoder] = None, cache: Optional[RenderCache] = None,
+                 use_cache: bool = RENDER_CACHE_ENABLED):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        if backend not in RENDER_BACKENDS:
+            raise ValueError(f"Backend de render desconocido: {backend} (usa {', '.join(RENDER_BACKENDS)})")
+        self.backend = backend
+        self.encoder = encoder or FFmpegEncoder()
+        self.cache = (cache or get_render_cache()) if use_cache else None
+    
+    def submit(self, kind: str, priority: Optional[int] = None, threads: Optional[int] = None, **params) -> str:
+        """
+        Encola el render en la render farm (kind: lyric, visualizer, cover o
+        variants; params: los del método correspondiente) y devuelve el id
+        del trabajo. El render corre en otro proceso con backend ffmpeg.
+        """
+        from .render_farm import PRIORITY_NORMAL, get_render_farm
+        params.setdefault("output_dir", str(self.output_dir))
+        return get_render_farm().submit(kind, params, PRIORITY_NORMAL if priority is None else priority, threads)
     
     def create_lyric_video(
         self,
@@ -29,42 +130,26 @@ class VideoGenerator:
         artist: str,
         output_name: Optional[str] = None
     ) -> str:
-        """Crea video de letras sincronizado"""
+        """
+        Crea video de letras sincronizado. `lyrics` puede ser texto LRC
+        ([mm:ss.xx] línea), la ruta a un archivo .lrc o texto plano.
+        """
         try:
             logger.info(f"🎬 Creando lyric video: {title}")
-            
-            # Cargar audio
-            audio = AudioFileClip(audio_path)
-            duration = audio.duration
-            
-            # Crear fondo
-            w, h = 1080, 1920  # Vertical para redes sociales
-            background = self._create_gradient_background(w, h, duration)
-            
-            # Añadir texto de letras
-            lyrics_clip = self._create_lyrics_clip(lyrics, duration, w, h)
-            
-            # Añadir título y artista
-            title_clip = self._create_title_clip(title, artist, w, h)
-            
-            # Componer video
-            video = CompositeVideoClip([
-                background,
-                lyrics_clip.set_position('center'),
-                title_clip.set_position(('center', 100))
-            ])
-            
-            # Añadir audio
-            video = video.set_audio(audio)
-            
-            # Exportar
             output_path = self.output_dir / (output_name or f"{title}_lyric_video.mp4")
-            video.write_videofile(
-                str(output_path),
-                fps=24,
-                codec='libx264',
-                audio_codec='aac'
-            )
+            key = self._render_key("lyric", ASPECT_SIZES["9:16"], self.encoder, audio_path, title, artist,
+                                   lyrics=lyrics)
+            if self._from_cache(key, output_path):
+                return str(output_path)
+            
+            # Fondo + letras sincronizadas (LRC o texto plano repartido), vertical para redes sociales
+            with self._profile("lyric", ASPECT_SIZES["9:16"], output_path):
+                with profiling.stage("decode"):
+                    duration = _audio_duration(audio_path)
+                with profiling.stage("assets"):
+                    lines = timed_lines(lyrics, duration)
+                self._render_lyric(lines, duration, audio_path, title, artist, ASPECT_SIZES["9:16"], output_path)
+            self._to_cache(key, output_path)
             
             logger.info(f"✅ Video creado: {output_path}")
             return str(output_path)
@@ -84,34 +169,17 @@ class VideoGenerator:
         """Crea video con visualizador de audio"""
         try:
             logger.info(f"🎬 Creando visualizer video: {title}")
-            
-            # Cargar audio
-            audio = AudioFileClip(audio_path)
-            duration = audio.duration
-            
-            # Crear visualizador
-            w, h = 1080, 1920
-            visualizer = self._create_audio_visualizer(audio_path, duration, w, h, style)
-            
-            # Añadir info del track
-            info_clip = self._create_title_clip(title, artist, w, h)
-            
-            # Componer
-            video = CompositeVideoClip([
-                visualizer,
-                info_clip.set_position(('center', 100))
-            ])
-            
-            video = video.set_audio(audio)
-            
-            # Exportar
             output_path = self.output_dir / (output_name or f"{title}_visualizer.mp4")
-            video.write_videofile(
-                str(output_path),
-                fps=24,
-                codec='libx264',
-                audio_codec='aac'
-            )
+            key = self._render_key("visualizer", ASPECT_SIZES["9:16"], self.encoder, audio_path, title, artist,
+                                   style=style)
+            if self._from_cache(key, output_path):
+                return str(output_path)
+            
+            with self._profile("visualizer", ASPECT_SIZES["9:16"], output_path):
+                with profiling.stage("decode"):
+                    analysis = AudioAnalysis(audio_path, FPS)
+                self._render_visualizer(analysis, audio_path, title, artist, style, ASPECT_SIZES["9:16"], output_path)
+            self._to_cache(key, output_path)
             
             logger.info(f"✅ Video creado: {output_path}")
             return str(output_path)
@@ -131,91 +199,279 @@ class VideoGenerator:
         """Crea video simple con portada estática + audio"""
         try:
             logger.info(f"🎬 Creando cover video: {title}")
+            output_path = self.output_dir / (output_name or f"{title}_cover_video.mp4")
+            key = self._render_key("cover", ASPECT_SIZES["9:16"], self.encoder, audio_path, title, artist,
+                                   cover_image_path=cover_image_path)
+            if self._from_cache(key, output_path):
+                return str(output_path)
+            
+            with self._profile("cover", ASPECT_SIZES["9:16"], output_path):
+                with profiling.stage("decode"):
+                    duration = _audio_duration(audio_path)
+                with profiling.stage("assets"):
+                    cover = _load_cover(cover_image_path)
+                self._render_cover(cover, audio_path, title, artist, duration, ASPECT_SIZES["9:16"], output_path)
+            self._to_cache(key, output_path)
+            
+            logger.info(f"✅ Video creado: {output_path}")
+            return str(output_path)
             
-            # Cargar audio
-            audio = AudioFileClip(audio_path)
-            duration = audio.duration
+        except Exception as e:
+            logger.error(f"❌ Error creando cover video: {e}")
+            raise
+    
+    def render_variants(
+        self,
+        kind: str,
+        audio_path: str,
+        title: str,
+        artist: str,
+        variants: Sequence = DEFAULT_VARIANTS,
+        lyrics: Optional[str] = None,
+        cover_image_path: Optional[str] = None,
+        style: str = "waveform",
+        output_prefix: Optional[str] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, str]:
+        """
+        Renderiza un mismo video (kind: lyric, visualizer o cover) en varios
+        formatos en paralelo. El audio, su análisis, los rasters de texto y
+        la portada se calculan una sola vez y se comparten entre variantes;
+        las variantes que ya están en la caché de renders no se recalculan.
+        
+        Cada variante es un aspect ratio ("9:16", "1:1", "16:9", "4:5") o un
+        dict {"aspect", "name", "crf", "max_bitrate", "preset"}.
+        Devuelve {nombre_variante: ruta}.
+        """
+        if kind not in VIDEO_KINDS:
+            raise ValueError(f"Tipo de video desconocido: {kind} (usa {', '.join(VIDEO_KINDS)})")
+        specs = [_variant_spec(variant) for variant in variants]
+        try:
+            logger.info(f"🎬 Renderizando {kind} '{title}' en {len(specs)} formatos: "
+                        f"{', '.join(spec['name'] for spec in specs)}")
+            prefix = output_prefix or f"{title}_{kind}"
             
-            # Cargar y redimensionar portada
-            img = ImageClip(cover_image_path)
-            img = img.resize(height=1920)  # Vertical
-            img = img.set_duration(duration)
+            cached, pending = {}, []
+            for spec in specs:
+                output_path = self.output_dir / f"{prefix}_{spec['name']}.mp4"
+                encoder = self.encoder.with_options(**spec["encoder"])
+                key = self._render_key(kind, ASPECT_SIZES[spec["aspect"]], encoder, audio_path, title, artist,
+                                       lyrics=lyrics, cover_image_path=cover_image_path, style=style)
+                if self._from_cache(key, output_path):
+                    cached[spec["name"]] = str(output_path)
+                else:
+                    pending.append((spec, key, output_path))
+            if not pending:
+                logger.info(f"✅ {len(cached)} variantes servidas desde la caché")
+                return cached
             
-            # Añadir overlay con info
-            info_clip = self._create_title_clip(title, artist, 1080, 1920)
+            # Recursos compartidos: se calculan antes de repartir el trabajo (perfil propio, variant=shared)
+            with profiling.profile(kind, variant="shared", backend=self.backend, output=prefix):
+                with profiling.stage("decode"):
+                    duration = _audio_duration(audio_path)
+                    if kind == "visualizer":
+                        analysis = AudioAnalysis(audio_path, FPS)
+                        if style != "waveform":
+                            analysis.levels()
+                with profiling.stage("assets"):
+                    _title_raster(title, artist)
+                    if kind == "lyric":
+                        lines = timed_lines(lyrics or "", duration)
+                    elif kind == "cover":
+                        cover = _load_cover(cover_image_path)
             
-            # Componer
-            video = CompositeVideoClip([
-                img,
-                info_clip.set_position(('center', 100)).set_opacity(0.9)
-            ])
+            # Los encoders se reparten el presupuesto de hilos en lugar de competir por todos
+            threads = max(1, (self.encoder.threads or os.cpu_count() or 1) // len(pending))
+            progress = {spec["name"]: 1.0 if spec["name"] in cached else 0.0 for spec in specs}
             
-            video = video.set_audio(audio)
+            def variant_progress(name: str):
+                def report(fraction: float):
+                    progress[name] = fraction
+                    self.encoder.progress(sum(progress.values()) / len(progress))
+                return report if self.encoder.progress else None
             
-            # Exportar
-            output_path = self.output_dir / (output_name or f"{title}_cover_video.mp4")
+            def render(spec: Dict, key: Optional[str], output_path: Path) -> str:
+                size = ASPECT_SIZES[spec["aspect"]]
+                encoder = self.encoder.with_options(threads=threads, progress=variant_progress(spec["name"]),
+                                                    **spec["encoder"])
+                with self._profile(kind, size, output_path, variant=spec["name"]):
+                    if kind == "lyric":
+                        self._render_lyric(lines, duration, audio_path, title, artist, size, output_path, encoder)
+                    elif kind == "visualizer":
+                        self._render_visualizer(analysis, audio_path, title, artist, style, size, output_path,
+                                                encoder)
+                    else:
+                        self._render_cover(cover, audio_path, title, artist, duration, size, output_path, encoder)
+                self._to_cache(key, output_path)
+                return str(output_path)
+            
+            with ThreadPoolExecutor(max_workers=max_workers or len(pending), thread_name_prefix="render") as pool:
+                futures = {spec["name"]: pool.submit(render, spec, key, output_path)
+                           for spec, key, output_path in pending}
+                rendered = {name: future.result() for name, future in futures.items()}
+            outputs = {spec["name"]: cached.get(spec["name"]) or rendered[spec["name"]] for spec in specs}
+            
+            logger.info(f"✅ {len(outputs)} variantes creadas: {', '.join(outputs.values())}")
+            return outputs
+            
+        except Exception as e:
+            logger.error(f"❌ Error renderizando variantes: {e}")
+            raise
+    
+    def _render_key(self, kind: str, size: Tuple[int, int], encoder: FFmpegEncoder, audio_path: str, title: str,
+                    artist: str, lyrics: Optional[str] = None, cover_image_path: Optional[str] = None,
+                    style: Optional[str] = None) -> Optional[str]:
+        """Clave del render en la caché: archivos de entrada + todo lo que cambia el MP4 resultante"""
+        if self.cache is None:
+            return None
+        lyrics_file = lyrics if lyrics and lyrics.endswith(".lrc") and os.path.isfile(lyrics) else None
+        params = {
+            "version": RENDER_CACHE_VERSION,
+            "kind": kind,
+            "size": list(size),
+            "title": title,
+            "artist": artist,
+            "lyrics": None if lyrics_file or kind != "lyric" else lyrics,
+            "style": style if kind == "visualizer" else None,
+            "backend": self.backend,
+            "fps": FPS,
+            "encoder": [encoder.preset, encoder.crf, encoder.pix_fmt, encoder.audio_bitrate, encoder.max_bitrate],
+        }
+        files = {"audio": audio_path, "lyrics": lyrics_file,
+                 "cover": cover_image_path if kind == "cover" else None}
+        return cache_key(files, params)
+    
+    def _from_cache(self, key: Optional[str], output_path: Path) -> bool:
+        return key is not None and self.cache.fetch(key, str(output_path))
+    
+    def _to_cache(self, key: Optional[str], output_path: Path):
+        if key is not None:
+            try:
+                self.cache.store(key, str(output_path))
+            except OSError as e:  # Una caché llena o sin permisos no debe tumbar el render
+                logger.warning(f"⚠️ No se pudo guardar el render en caché: {e}")
+    
+    def _profile(self, kind: str, size: Tuple[int, int], output_path: Path, **meta):
+        return profiling.profile(kind, size=f"{size[0]}x{size[1]}", backend=self.backend, output=str(output_path),
+                                 **meta)
+    
+    def _render_lyric(self, lines, duration: float, audio_path: str, title: str, artist: str,
+                      size: Tuple[int, int], output_path: Path, encoder: Optional[FFmpegEncoder] = None):
+        w, h = size
+        with profiling.stage("assets"):
+            background = _gradient_frame(w, h, GRADIENT_TOP_COLOR, GRADIENT_BOTTOM_COLOR)
+            lyrics_clip = LyricsRenderer(lines, w, h, background).clip(duration)
+        self._write(self._with_title(lyrics_clip, title, artist, w), audio_path, output_path, encoder)
+    
+    def _render_visualizer(self, analysis: AudioAnalysis, audio_path: str, title: str, artist: str, style: str,
+                           size: Tuple[int, int], output_path: Path, encoder: Optional[FFmpegEncoder] = None):
+        w, h = size
+        with profiling.stage("assets"):
+            visualizer = self._create_audio_visualizer(analysis, analysis.duration, w, h, style, fps=FPS)
+        self._write(self._with_title(visualizer, title, artist, w), audio_path, output_path, encoder)
+    
+    def _render_cover(self, cover: Image.Image, audio_path: str, title: str, artist: str, duration: float,
+                      size: Tuple[int, int], output_path: Path, encoder: Optional[FFmpegEncoder] = None):
+        # La portada se recorta al formato una vez con PIL; no hay escalado por frame
+        with profiling.stage("assets"):
+            fitted = ImageOps.fit(cover, size, Image.LANCZOS)
+        if self.backend == "ffmpeg":
+            # Ruta rápida: ffmpeg repite la portada con -loop 1 y superpone el título
+            self._write_cover_still(fitted, audio_path, title, artist, duration, output_path, encoder)
+            return
+        
+        img = ImageClip(np.asarray(fitted)).set_duration(duration)
+        self._write(self._with_title(img, title, artist, size[0], opacity=0.9), audio_path, output_path, encoder)
+    
+    def _write(self, video: VideoClip, audio_path: str, output_path: Path, encoder: Optional[FFmpegEncoder] = None):
+        """Exporta con el backend configurado"""
+        if self.backend == "ffmpeg":
+            # Los frames van directos al stdin de ffmpeg; el audio se mezcla desde el archivo original
+            (encoder or self.encoder).encode_clip(video, FPS, str(output_path), audio_path=audio_path)
+            return
+        video = video.set_audio(AudioFileClip(audio_path))
+        # El writer de MoviePy mezcla generación de frames y encode: se mide como una sola etapa
+        with profiling.stage("encode", frames=int(round(video.duration * FPS))):
             video.write_videofile(
                 str(output_path),
-                fps=24,
+                fps=FPS,
                 codec='libx264',
                 audio_codec='aac'
             )
-            
-            logger.info(f"✅ Video creado: {output_path}")
-            return str(output_path)
-            
-        except Exception as e:
-            logger.error(f"❌ Error creando cover video: {e}")
-            raise
     
-    def _create_gradient_background(self, w: int, h: int, duration: float) -> VideoClip:
-        """Crea fondo con gradiente animado"""
+    def _write_cover_still(self, cover: Image.Image, audio_path: str, title: str, artist: str,
+                           duration: float, output_path: Path, encoder: Optional[FFmpegEncoder] = None):
+        rgb, alpha = _title_raster(title, artist)
+        overlay = np.dstack([rgb, (alpha[..., 0] * 0.9).astype(np.uint8)])
+        with tempfile.TemporaryDirectory() as tmp:
+            cover_path = os.path.join(tmp, "cover.png")
+            overlay_path = os.path.join(tmp, "title.png")
+            with profiling.stage("assets"):
+                cover.save(cover_path)
+                Image.fromarray(overlay, "RGBA").save(overlay_path)
+            (encoder or self.encoder).encode_still(
+                cover_path, cover.size, duration, str(output_path), audio_path=audio_path,
+                overlay_path=overlay_path, overlay_position=((cover.size[0] - rgb.shape[1]) // 2, 100),
+                overlay_until=TITLE_SECONDS, fps=FPS
+            )
+    
+    def _create_gradient_background(
+        self,
+        w: int,
+        h: int,
+        duration: float,
+        top_color: Tuple[int, int, int] = GRADIENT_TOP_COLOR,
+        bottom_color: Tuple[int, int, int] = GRADIENT_BOTTOM_COLOR,
+        cycle_frames: int = 0,
+        fps: int = 24
+    ) -> VideoClip:
+        """
+        Crea fondo con gradiente. Por defecto es estático (un único frame
+        cacheado); con cycle_frames > 0 se anima en bucle reutilizando un
+        ciclo precalculado de ese número de frames.
+        """
+        if cycle_frames <= 0:
+            return ImageClip(_gradient_frame(w, h, tuple(top_color), tuple(bottom_color))).set_duration(duration)
+        
+        cycle = _gradient_cycle(w, h, tuple(top_color), tuple(bottom_color), cycle_frames)
+        
         def make_frame(t):
-            # Gradiente que cambia con el tiempo
-            top_color = np.array([138, 43, 226])  # Purple
-            bottom_color = np.array([0, 0, 0])  # Black
-            
-            gradient = np.zeros((h, w, 3), dtype=np.uint8)
-            for y in range(h):
-                ratio = y / h
-                gradient[y] = top_color * (1 - ratio) + bottom_color * ratio
-            
-            return gradient
+            return cycle[int(t * fps) % cycle_frames]
         
         return VideoClip(make_frame, duration=duration)
     
-    def _create_lyrics_clip(self, lyrics: str, duration: float, w: int, h: int) -> TextClip:
-        """Crea clip de texto con letras"""
-        return TextClip(
-            lyrics,
-            fontsize=50,
-            color='white',
-            font='Arial-Bold',
-            size=(w - 100, None),
-            method='caption'
-        ).set_duration(duration)
-    
-    def _create_title_clip(self, title: str, artist: str, w: int, h: int) -> TextClip:
-        """Crea clip con título y artista"""
-        text = f"{title}\n{artist}"
-        return TextClip(
-            text,
-            fontsize=60,
-            color='white',
-            font='Arial-Bold',
-            stroke_color='black',
-            stroke_width=2
-        ).set_duration(5)  # Aparece 5 segundos
+    def _with_title(self, base: VideoClip, title: str, artist: str, w: int, opacity: float = 1.0) -> VideoClip:
+        """
+        Superpone título y artista los primeros segundos con alpha blending
+        directo, en lugar de un CompositeVideoClip que copia y mezcla en float
+        cada frame completo.
+        """
+        rgb, alpha = _title_raster(title, artist)
+        x = (w - rgb.shape[1]) // 2
+        
+        def make_frame(t):
+            frame = base.get_frame(t)
+            if t < TITLE_SECONDS:
+                with profiling.stage("composite"):
+                    frame = frame.copy()
+                    blend(frame, rgb, alpha, x, 100, opacity)
+            return frame
+        
+        return VideoClip(make_frame, duration=base.duration)
     
     def _create_audio_visualizer(
         self,
-        audio_path: str,
+        audio,
         duration: float,
         w: int,
         h: int,
-        style: str
+        style: str,
+        fps: int = 24
     ) -> VideoClip:
-        """Crea visualizador de audio (placeholder - requiere análisis de audio)"""
-        # Por ahora, devuelve fondo animado
-        # TODO: Integrar análisis de frecuencias para visualizador real
-        return self._create_gradient_background(w, h, duration)
+        """
+        Crea visualizador de audio (waveform, bars o circular) sobre el
+        gradiente. `audio` es una ruta o un AudioAnalysis compartido.
+        """
+        background = _gradient_frame(w, h, GRADIENT_TOP_COLOR, GRADIENT_BOTTOM_COLOR)
+        visualizer = AudioVisualizer(audio, w, h, style=style, fps=fps, background=background)
+        return visualizer.clip(duration)
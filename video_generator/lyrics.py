@@ -0,0 +1,177 @@
+"""
+🎤 LYRICS - LETRAS SINCRONIZADAS (LRC)
+Cada línea se rasteriza una sola vez con PIL (caché por texto, fuente,
+tamaño y borde) y se compone en cada frame con alpha blending de NumPy,
+sin llamadas a ImageMagick durante el render.
+"""
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+from moviepy.editor import VideoClip
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FONTS = (
+    "Arial-Bold.ttf",
+    "arialbd.ttf",
+    "DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+)
+FONT_SIZE = 64
+STROKE_WIDTH = 3
+FADE_SECONDS = 0.25
+LINE_SPACING = 1.6
+INACTIVE_OPACITY = 0.35
+
+_TIMESTAMP = re.compile(r"\[(\d+):(\d+(?:\.\d+)?)\]")
+
+
+def parse_lrc(text: str) -> List[Tuple[float, str]]:
+    """
+    Devuelve [(segundo, línea)] ordenado. Admite varias marcas por línea
+    ([00:12.00][01:30.50]Estribillo) e ignora metadatos como [ar:Artista].
+    """
+    entries = []
+    for raw in text.splitlines():
+        stamps = _TIMESTAMP.findall(raw)
+        if not stamps:
+            continue
+        line = _TIMESTAMP.sub("", raw).strip()
+        for minutes, seconds in stamps:
+            entries.append((int(minutes) * 60 + float(seconds), line))
+    return sorted(entries, key=lambda entry: entry[0])
+
+
+def timed_lines(lyrics: str, duration: float) -> List[Tuple[float, float, str]]:
+    """
+    Normaliza letras LRC o texto plano a [(inicio, fin, línea)]. El texto sin
+    marcas de tiempo se reparte a partes iguales a lo largo de la duración.
+    """
+    if lyrics.endswith(".lrc") and os.path.isfile(lyrics):
+        with open(lyrics, encoding="utf-8") as f:
+            lyrics = f.read()
+
+    entries = parse_lrc(lyrics)
+    if not entries:
+        lines = [line.strip() for line in lyrics.splitlines() if line.strip()]
+        step = duration / max(len(lines), 1)
+        entries = [(i * step, line) for i, line in enumerate(lines)]
+
+    ends = [start for start, _ in entries[1:]] + [duration]
+    return [(start, end, line) for (start, line), end in zip(entries, ends) if line and end > start]
+
+
+@lru_cache(maxsize=8)
+def _load_font(font: Optional[str], size: int) -> ImageFont.FreeTypeFont:
+    for candidate in ((font,) if font else ()) + DEFAULT_FONTS:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    logger.warning(f"⚠️ Fuente '{font}' no disponible, usando la fuente por defecto de PIL")
+    return ImageFont.load_default(size=size)
+
+
+def _wrap(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> str:
+    lines = []
+    for paragraph in text.split("\n"):
+        current = ""
+        for word in paragraph.split():
+            candidate = f"{current} {word}".strip()
+            if current and font.getlength(candidate) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=512)
+def rasterize_line(text: str, font: Optional[str] = None, size: int = FONT_SIZE, stroke: int = STROKE_WIDTH,
+                   max_width: int = 980, color: Tuple[int, int, int] = (255, 255, 255),
+                   stroke_color: Tuple[int, int, int] = (0, 0, 0)) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rasteriza una línea (con ajuste de ancho) y devuelve (rgb uint8 (h, w, 3),
+    alpha uint16 (h, w, 1) en 0..255). Los arrays son de solo lectura porque se comparten.
+    """
+    pil_font = _load_font(font, size)
+    wrapped = _wrap(text, pil_font, max_width)
+    probe = ImageDraw.Draw(Image.new("L", (1, 1)))
+    bbox = probe.multiline_textbbox((0, 0), wrapped, font=pil_font, stroke_width=stroke, align="center")
+    left, top, right, bottom = (int(round(v)) for v in bbox)
+    image = Image.new("RGBA", (max(right - left, 1), max(bottom - top, 1)), (0, 0, 0, 0))
+    ImageDraw.Draw(image).multiline_text((-left, -top), wrapped, font=pil_font, fill=color + (255,),
+                                         stroke_width=stroke, stroke_fill=stroke_color + (255,), align="center")
+    rgba = np.asarray(image)
+    rgb = np.ascontiguousarray(rgba[..., :3])
+    alpha = rgba[..., 3:].astype(np.uint16)
+    rgb.flags.writeable = False
+    alpha.flags.writeable = False
+    return rgb, alpha
+
+
+def blend(frame: np.ndarray, rgb: np.ndarray, alpha: np.ndarray, x: int, y: int, opacity: float = 1.0):
+    """Alpha blending en sitio de rgb/alpha sobre frame en (x, y), recortando a los bordes"""
+    h, w = rgb.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, frame.shape[1]), min(y + h, frame.shape[0])
+    if x0 >= x1 or y0 >= y1 or opacity <= 0:
+        return
+    src = rgb[y0 - y:y1 - y, x0 - x:x1 - x]
+    a = alpha[y0 - y:y1 - y, x0 - x:x1 - x]
+    if opacity < 1.0:
+        a = (a * opacity).astype(np.uint16)
+    region = frame[y0:y1, x0:x1]
+    region[:] = ((src * a + region * (255 - a) + 127) // 255).astype(np.uint8)
+
+
+class LyricsRenderer:
+    """
+    Compone letras sincronizadas sobre un fondo: la línea activa al centro
+    (con fundido de entrada) y la anterior/siguiente atenuadas.
+    """
+
+    def __init__(self, lines: List[Tuple[float, float, str]], w: int, h: int, background: np.ndarray,
+                 font: Optional[str] = None, size: int = FONT_SIZE, stroke: int = STROKE_WIDTH):
+        self.lines = lines
+        self.starts = np.array([start for start, _, _ in lines], dtype=np.float64)
+        self.w, self.h = w, h
+        self.background = background
+        self._buffer = np.empty((h, w, 3), dtype=np.uint8)
+        self.line_gap = int(size * (LINE_SPACING - 1))
+        # Rasterizar todo por adelantado: el render solo hace blending
+        self.glyphs = [rasterize_line(text, font, size, stroke, max_width=w - 100) for _, _, text in lines]
+        logger.info(f"🎤 {len(lines)} líneas de letra rasterizadas ({rasterize_line.cache_info().currsize} en caché)")
+
+    def _height(self, index: int) -> int:
+        return self.glyphs[index][0].shape[0] if 0 <= index < len(self.glyphs) else 0
+
+    def _place(self, frame: np.ndarray, index: int, center_y: int, opacity: float):
+        if 0 <= index < len(self.glyphs):
+            rgb, alpha = self.glyphs[index]
+            blend(frame, rgb, alpha, (self.w - rgb.shape[1]) // 2, center_y - rgb.shape[0] // 2, opacity)
+
+    def make_frame(self, t: float) -> np.ndarray:
+        """Frame en t; reutiliza el mismo buffer"""
+        frame = self._buffer
+        np.copyto(frame, self.background)
+        current = int(np.searchsorted(self.starts, t, side="right")) - 1
+        center = self.h // 2
+        # Las vecinas se separan según la altura real (las líneas largas ocupan varias filas)
+        half = self._height(current) // 2 + self.line_gap
+        self._place(frame, current - 1, center - half - self._height(current - 1) // 2, INACTIVE_OPACITY)
+        self._place(frame, current + 1, center + half + self._height(current + 1) // 2, INACTIVE_OPACITY)
+        if current >= 0:
+            start, end, _ = self.lines[current]
+            if t < end:
+                self._place(frame, current, center, min(1.0, (t - start) / FADE_SECONDS))
+        return frame
+
+    def clip(self, duration: float) -> VideoClip:
+        return VideoClip(self.make_frame, duration=duration)
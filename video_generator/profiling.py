@@ -0,0 +1,322 @@
+"""
+⏱️ PROFILING - TIEMPOS POR ETAPA DE CADA RENDER
+Cada render registra, por etapa, tiempo de pared y de CPU:
+
+    decode     decodificación y análisis del audio
+    assets     rasters de texto, portada, buffers del visualizador
+    synthesis  generación de frames en Python (sin composite)
+    composite  superposición del título sobre cada frame
+    encode     espera a ffmpeg/x264 (CPU del proceso ffmpeg hijo)
+
+además de frames, fps y pico de RSS (Python y ffmpeg). El pico de Python
+es del proceso: si otros renders se solapan (render_variants, workers con
+varios hilos) el valor es el pico del lote y el evento lo marca con
+peak_rss_shared. Al terminar se
+emite un evento estructurado (log JSON, listeners, RENDER_PROFILE_LOG en
+JSONL) y se agregan métricas Prometheus: con prometheus_client se
+registran en su REGISTRY; sin él, metrics_text() devuelve el formato de
+exposición en texto.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+RENDER_PROFILE_LOG = os.getenv("RENDER_PROFILE_LOG")  # Ruta JSONL opcional para los eventos
+RENDER_METRICS_PORT = int(os.getenv("RENDER_METRICS_PORT", "0"))  # 0 = sin servidor /metrics propio
+STAGES = ("decode", "assets", "synthesis", "composite", "encode")
+SECONDS_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+FPS_BUCKETS = (1, 5, 10, 24, 48, 100, 200, 500)
+
+_current: contextvars.ContextVar = contextvars.ContextVar("render_profile", default=None)
+_listeners: List[Callable[[Dict], None]] = []
+_active: set = set()  # Perfiles en curso en el proceso, de cualquier hilo
+_active_lock = threading.Lock()
+
+
+def _reset_peak_rss():
+    # Linux >= 4.0: reinicia VmHWM de todo el proceso. Solo se llama al empezar un lote
+    # (ningún otro render en curso): así no se borra el pico de un render concurrente
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else 0
+
+
+class RenderProfile:
+    """Acumula los tiempos de un render (un video de un tamaño)"""
+
+    def __init__(self, kind: str, **meta):
+        self.kind = kind
+        self.meta = meta
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.frames = 0
+        self.ffmpeg_peak_rss = 0
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self.shared_peak = False
+        with _active_lock:
+            if _active:
+                self.shared_peak = True
+                for other in _active:
+                    other.shared_peak = True
+            else:
+                _reset_peak_rss()
+            _active.add(self)
+
+    def record(self, stage: str, wall: float, cpu: float = 0.0, frames: int = 0, ffmpeg_rss: int = 0):
+        totals = self.stages.setdefault(stage, {"wall_seconds": 0.0, "cpu_seconds": 0.0})
+        totals["wall_seconds"] += wall
+        totals["cpu_seconds"] += cpu
+        self.frames += frames
+        self.ffmpeg_peak_rss = max(self.ffmpeg_peak_rss, ffmpeg_rss)
+
+    @contextmanager
+    def stage(self, name: str, frames: int = 0):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - wall, time.thread_time() - cpu, frames)
+
+    def finish(self, status: str = "ok", error: Optional[str] = None) -> Dict:
+        wall = time.perf_counter() - self._wall
+        with _active_lock:
+            _active.discard(self)
+            peak_rss = _peak_rss()
+        stages = {name: dict(totals) for name, totals in self.stages.items()}
+        # composite se mide dentro de la generación de frames: synthesis queda exclusiva
+        if "synthesis" in stages and "composite" in stages:
+            for field in ("wall_seconds", "cpu_seconds"):
+                stages["synthesis"][field] = max(0.0, stages["synthesis"][field] - stages["composite"][field])
+        ffmpeg_cpu = stages.get("encode", {}).get("cpu_seconds", 0.0)
+        return {
+            "event": "render_profile",
+            "kind": self.kind,
+            "status": status,
+            "error": error,
+            **self.meta,
+            "wall_seconds": wall,
+            "cpu_seconds": time.thread_time() - self._cpu + ffmpeg_cpu,
+            "frames": self.frames,
+            "fps": self.frames / wall if wall > 0 else 0.0,
+            "peak_rss_bytes": peak_rss,
+            "peak_rss_shared": self.shared_peak,
+            "ffmpeg_peak_rss_bytes": self.ffmpeg_peak_rss,
+            "stages": stages,
+        }
+
+
+def current() -> Optional[RenderProfile]:
+    return _current.get()
+
+
+def stage(name: str, frames: int = 0):
+    """Mide una etapa del render en curso (no hace nada fuera de un render); frames: los que produce la etapa"""
+    profile = _current.get()
+    return profile.stage(name, frames) if profile else nullcontext()
+
+
+def record(stage_name: str, wall: float, cpu: float = 0.0, frames: int = 0, ffmpeg_rss: int = 0):
+    profile = _current.get()
+    if profile:
+        profile.record(stage_name, wall, cpu, frames, ffmpeg_rss)
+
+
+@contextmanager
+def profile(kind: str, **meta):
+    """Perfila el render del bloque y emite su evento al salir (status failed si lanza)"""
+    if _current.get() is not None:  # Render anidado: cuenta en el perfil exterior
+        yield _current.get()
+        return
+    render = RenderProfile(kind, **meta)
+    token = _current.set(render)
+    status, error = "ok", None
+    try:
+        yield render
+    except BaseException as e:
+        status, error = "failed", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        emit(render.finish(status, error))
+
+
+def add_listener(listener: Callable[[Dict], None]):
+    """Registra una función que recibe cada evento render_profile"""
+    _listeners.append(listener)
+
+
+def emit(event: Dict):
+    observe(event)
+    logger.info(json.dumps(event, default=str))
+    if RENDER_PROFILE_LOG:
+        with open(RENDER_PROFILE_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, default=str) + "\n")
+    for listener in _listeners:
+        try:
+            listener(event)
+        except Exception as e:
+            logger.warning(f"⚠️ Listener de profiling falló: {e}")
+
+
+# --- Métricas Prometheus ---
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RenderMetrics:
+    """Agregados de todos los renders observados en este proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.renders: Dict[tuple, int] = {}          # (kind, status)
+        self.stage_seconds: Dict[tuple, _Histogram] = {}  # (kind, stage)
+        self.stage_cpu: Dict[tuple, float] = {}      # (kind, stage)
+        self.frames: Dict[str, int] = {}
+        self.fps: Dict[str, _Histogram] = {}
+        self.peak_rss: Dict[tuple, int] = {}         # (kind, process)
+
+    def observe(self, event: Dict):
+        kind = event["kind"]
+        with self._lock:
+            key = (kind, event["status"])
+            self.renders[key] = self.renders.get(key, 0) + 1
+            if event["status"] != "ok":
+                return
+            for name, totals in event["stages"].items():
+                self.stage_seconds.setdefault((kind, name), _Histogram(SECONDS_BUCKETS)).observe(totals["wall_seconds"])
+                self.stage_cpu[(kind, name)] = self.stage_cpu.get((kind, name), 0.0) + totals["cpu_seconds"]
+            self.stage_seconds.setdefault((kind, "total"), _Histogram(SECONDS_BUCKETS)).observe(event["wall_seconds"])
+            self.frames[kind] = self.frames.get(kind, 0) + event["frames"]
+            if event["frames"]:
+                self.fps.setdefault(kind, _Histogram(FPS_BUCKETS)).observe(event["fps"])
+            for process, field in (("python", "peak_rss_bytes"), ("ffmpeg", "ffmpeg_peak_rss_bytes")):
+                self.peak_rss[(kind, process)] = max(self.peak_rss.get((kind, process), 0), event[field])
+
+    def families(self) -> List[Dict]:
+        """Métricas como [{name, type, help, samples: [(sufijo, labels, valor)]}]"""
+        with self._lock:
+            families = [
+                {"name": "render_jobs_total", "type": "counter", "help": "Renders terminados por tipo y estado",
+                 "samples": [("", {"kind": k, "status": s}, v) for (k, s), v in self.renders.items()]},
+                {"name": "render_stage_seconds", "type": "histogram", "help": "Tiempo de pared por etapa de render",
+                 "samples": _histogram_samples(self.stage_seconds, ("kind", "stage"))},
+                {"name": "render_stage_cpu_seconds_total", "type": "counter", "help": "Tiempo de CPU por etapa",
+                 "samples": [("", {"kind": k, "stage": s}, v) for (k, s), v in self.stage_cpu.items()]},
+                {"name": "render_frames_total", "type": "counter", "help": "Frames renderizados",
+                 "samples": [("", {"kind": k}, v) for k, v in self.frames.items()]},
+                {"name": "render_fps", "type": "histogram", "help": "Frames por segundo de cada render",
+                 "samples": _histogram_samples({(k,): h for k, h in self.fps.items()}, ("kind",))},
+                {"name": "render_peak_rss_bytes", "type": "gauge", "help": "Pico de memoria residente por render",
+                 "samples": [("", {"kind": k, "process": p}, v) for (k, p), v in self.peak_rss.items()]},
+            ]
+        return families
+
+
+def _histogram_samples(histograms: Dict[tuple, _Histogram], label_names) -> List:
+    samples = []
+    for key, histogram in histograms.items():
+        labels = dict(zip(label_names, key))
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            samples.append(("_bucket", {**labels, "le": str(float(bound))}, count))
+        samples.append(("_bucket", {**labels, "le": "+Inf"}, histogram.count))
+        samples.append(("_sum", labels, histogram.sum))
+        samples.append(("_count", labels, histogram.count))
+    return samples
+
+
+_metrics = RenderMetrics()
+
+
+def observe(event: Dict):
+    _metrics.observe(event)
+
+
+def metrics_text() -> str:
+    """Métricas de render en formato de exposición de Prometheus"""
+    lines = []
+    for family in _metrics.families():
+        lines.append(f"# HELP {family['name']} {family['help']}")
+        lines.append(f"# TYPE {family['name']} {family['type']}")
+        for suffix, labels, value in family["samples"]:
+            rendered = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{family['name']}{suffix}{{{rendered}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+try:
+    from prometheus_client import REGISTRY, start_http_server
+    from prometheus_client.core import Metric
+
+    class _Collector:
+        def collect(self):
+            for family in _metrics.families():
+                metric = Metric(family["name"], family["help"], family["type"])
+                for suffix, labels, value in family["samples"]:
+                    metric.add_sample(family["name"] + suffix, labels, value)
+                yield metric
+
+    REGISTRY.register(_Collector())
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+
+def start_metrics_server(port: int = RENDER_METRICS_PORT):
+    """Sirve /metrics en `port` (con prometheus_client si está instalado)"""
+    if PROMETHEUS_AVAILABLE:
+        start_http_server(port)
+    else:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=server.serve_forever, name="render-metrics", daemon=True).start()
+    logger.info(f"📈 Métricas de render en :{port}/metrics")
@@ -0,0 +1,157 @@
+"""
+♻️ RENDER CACHE - CACHÉ DIRECCIONADA POR CONTENIDO
+Un render se identifica por el hash de sus archivos de entrada (audio,
+portada, letra) y de sus parámetros. Si ya existe en el almacén, se copia
+al destino en lugar de renderizar. El almacén está acotado en bytes y
+expulsa primero las entradas usadas hace más tiempo (LRU por mtime).
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", "data/cache/renders")
+RENDER_CACHE_MAX_GB = float(os.getenv("RENDER_CACHE_MAX_GB", "20"))
+RENDER_CACHE_ENABLED = os.getenv("RENDER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CHUNK_SIZE = 1 << 20
+
+
+@lru_cache(maxsize=256)
+def _digest(path: str, size: int, mtime_ns: int) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 del contenido; se recalcula solo si cambian tamaño o mtime"""
+    stat = os.stat(path)
+    return _digest(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def cache_key(files: Dict[str, Optional[str]], params: Dict) -> str:
+    """Clave de un render: contenido de los archivos de entrada + parámetros (serializables en JSON)"""
+    payload = {
+        "files": {name: file_digest(path) if path else None for name, path in sorted(files.items())},
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class RenderCache:
+    """Almacén en disco de renders, acotado a `max_bytes`"""
+
+    def __init__(self, root: str = RENDER_CACHE_DIR, max_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(RENDER_CACHE_MAX_GB * 1024 ** 3) if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        # Contadores de este proceso (cada worker de la render farm lleva los suyos)
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "bytes_served": 0}
+
+    def _entry(self, key: str, suffix: str = ".mp4") -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Copia la entrada `key` a output_path si existe. Devuelve True en un acierto"""
+        entry = self._entry(key, Path(output_path).suffix)
+        try:
+            os.utime(entry)  # Marca de uso para la política LRU
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            # Copia (no hardlink): si alguien sobrescribe el destino, la caché no se corrompe
+            shutil.copyfile(entry, output_path)
+        except FileNotFoundError:
+            self._count("misses")
+            return False
+        self._count("hits")
+        self._count("bytes_served", entry.stat().st_size)
+        logger.info(f"♻️ Render en caché: {output_path}")
+        return True
+
+    def store(self, key: str, path: str):
+        """Guarda el render `path` bajo `key` (escritura atómica) y aplica la política de tamaño"""
+        entry = self._entry(key, Path(path).suffix)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, entry)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._count("stores")
+        self.evict()
+
+    def _entries(self):
+        for shard in self.root.iterdir():
+            if not shard.is_dir():
+                continue
+            for entry in shard.iterdir():
+                if entry.suffix != ".tmp":
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # Expulsada por otro proceso
+                        continue
+                    yield entry, stat.st_size, stat.st_mtime
+
+    def evict(self) -> int:
+        """Borra las entradas menos usadas hasta quedar por debajo de max_bytes"""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for entry, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+            logger.info(f"🧹 Caché de renders: {evicted} entradas expulsadas ({total / 1024 ** 2:.0f} MB en uso)")
+        return evicted
+
+    def stats(self) -> Dict:
+        entries = list(self._entries())
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update(
+            hit_rate=stats["hits"] / lookups if lookups else 0.0,
+            entries=len(entries),
+            bytes=sum(size for _, size, _ in entries),
+            max_bytes=self.max_bytes,
+        )
+        return stats
+
+    def clear(self):
+        for entry, _, _ in list(self._entries()):
+            entry.unlink(missing_ok=True)
+
+
+_cache: Optional[RenderCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """Caché de renders del proceso: se crea en el primer uso."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RenderCache()
+    return _cache
@@ -0,0 +1,436 @@
+"""
+🏭 RENDER FARM - POOL DE PROCESOS PARA RENDERS
+Los renders salen del proceso que los pide (API, launcher) y se ejecutan en
+un pool de procesos dimensionado según los núcleos de la máquina. Cada
+trabajo tiene prioridad, presupuesto de hilos para ffmpeg, progreso y se
+puede cancelar.
+
+Spec de un trabajo: {"kind", "params", "priority", "threads"}, donde kind
+es uno de JOB_KINDS y params son los argumentos del método correspondiente
+de VideoGenerator (más output_dir) o VideoEditor.
+"""
+import collections
+import enum
+import heapq
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9  # Menor número = se ejecuta antes
+
+RENDER_JOB_THREADS = int(os.getenv("RENDER_JOB_THREADS", "2"))
+RENDER_FARM_WORKERS = int(os.getenv("RENDER_FARM_WORKERS", "0"))  # 0 = núcleos / hilos por trabajo
+RENDER_JOB_MAX_CRASHES = int(os.getenv("RENDER_JOB_MAX_CRASHES", "2"))  # Caídas de worker antes de dar el trabajo por FAILED
+RENDER_FARM_RETENTION = float(os.getenv("RENDER_FARM_RETENTION", "3600"))  # Segundos que se conservan los terminados
+RENDER_FARM_MAX_FINISHED = int(os.getenv("RENDER_FARM_MAX_FINISHED", "1000"))
+
+
+class RenderStatus(enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+
+class RenderCancelled(Exception):
+    """Se lanza dentro del worker cuando el trabajo en curso se cancela."""
+
+
+class RenderJobError(Exception):
+    """Un trabajo terminó en FAILED o CANCELLED (ver `job`)."""
+
+    def __init__(self, message: str, job: Optional[Dict] = None):
+        super().__init__(message)
+        self.job = job
+
+
+# --- Lado worker (se ejecuta en los procesos del pool) ---
+
+_progress_queue = None
+_cancelled = None
+_job_id = None
+
+
+def _init_worker(progress_queue, cancelled):
+    global _progress_queue, _cancelled
+    _progress_queue = progress_queue
+    _cancelled = cancelled
+    # Los perfiles de render viajan al coordinador, que agrega las métricas de todos los workers
+    profiling.add_listener(lambda event: _progress_queue.put((_job_id, event)))
+
+
+def _generator(params: Dict, threads: int, progress: Callable):
+    from .encoder import FFmpegEncoder
+    from .generator import VideoGenerator
+    return VideoGenerator(output_dir=params.pop("output_dir", "data/videos"), backend="ffmpeg",
+                          encoder=FFmpegEncoder(threads=threads, progress=progress))
+
+
+def _lyric(params, threads, progress):
+    return _generator(params, threads, progress).create_lyric_video(**params)
+
+
+def _visualizer(params, threads, progress):
+    return _generator(params, threads, progress).create_visualizer_video(**params)
+
+
+def _cover(params, threads, progress):
+    return _generator(params, threads, progress).create_cover_video(**params)
+
+
+def _variants(params, threads, progress):
+    return _generator(params, threads, progress).render_variants(**params)
+
+
+def _trim(params, threads, progress):
+    from .editor import VideoEditor
+    return VideoEditor.trim_video(**params)
+
+
+def _promo(params, threads, progress):
+    from .editor import VideoEditor
+    return VideoEditor.create_promo_clip(**params)
+
+
+def _extract(params, threads, progress):
+    from .editor import VideoEditor
+    return VideoEditor.extract_clips(max_workers=threads, progress=progress, **params)
+
+
+JOB_HANDLERS = {
+    "lyric": _lyric,
+    "visualizer": _visualizer,
+    "cover": _cover,
+    "variants": _variants,
+    "trim": _trim,
+    "promo": _promo,
+    "extract": _extract,
+}
+JOB_KINDS = tuple(JOB_HANDLERS)
+
+
+def _run_job(job_id: str, kind: str, params: Dict, threads: int):
+    """Punto de entrada en el worker: el progreso es también el punto de cancelación"""
+    global _job_id
+    _job_id = job_id
+
+    def progress(fraction: float):
+        if job_id in _cancelled:
+            raise RenderCancelled(job_id)
+        _progress_queue.put((job_id, fraction))
+
+    progress(0.0)
+    result = JOB_HANDLERS[kind](dict(params), threads, progress)
+    _progress_queue.put((job_id, 1.0))
+    return result
+
+
+# --- Lado coordinador ---
+
+class RenderJob:
+    """Estado de un trabajo en el proceso coordinador"""
+
+    def __init__(self, kind: str, params: Dict, priority: int, threads: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.threads = threads
+        self.seq = 0
+        self.crashes = 0
+        self.status = RenderStatus.QUEUED
+        self.progress = 0.0
+        self.profiles: List[Dict] = []
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "threads": self.threads,
+            "status": self.status.value,
+            "crashes": self.crashes,
+            "progress": self.progress,
+            "profiles": list(self.profiles),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class RenderFarm:
+    """
+    Pool de procesos con cola por prioridad. Solo se envía al pool un
+    trabajo por worker libre, así la prioridad decide el orden real de
+    ejecución (y no el orden de llegada al executor).
+
+    Si un worker muere (OOM, SIGKILL) el pool se reconstruye y los trabajos
+    en curso vuelven a la cola; el que acumula RENDER_JOB_MAX_CRASHES caídas
+    termina en FAILED. Los trabajos terminados se olvidan pasados
+    RENDER_FARM_RETENTION segundos o al superar RENDER_FARM_MAX_FINISHED.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, job_threads: Optional[int] = None):
+        cpus = os.cpu_count() or 1
+        self.job_threads = max(1, job_threads or RENDER_JOB_THREADS)
+        self.max_workers = max_workers or RENDER_FARM_WORKERS or max(1, cpus // self.job_threads)
+        # spawn: el coordinador tiene hilos (y quizá conexiones) que no deben heredarse con fork
+        self._ctx = mp.get_context("spawn")
+        self._manager = self._ctx.Manager()
+        self._cancelled = self._manager.dict()
+        self._progress = self._ctx.Queue()
+        self._pool = self._new_pool()
+        self._jobs: Dict[str, RenderJob] = {}
+        self._finished = collections.deque()  # ids en orden de finalización, para podar _jobs
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(self.max_workers)
+        self._stopping = False
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="render-dispatch", daemon=True)
+        self._listener = threading.Thread(target=self._progress_loop, name="render-progress", daemon=True)
+        self._dispatcher.start()
+        self._listener.start()
+        if profiling.RENDER_METRICS_PORT:
+            profiling.start_metrics_server()
+        logger.info(f"🏭 Render farm: {self.max_workers} workers x {self.job_threads} hilos ({cpus} núcleos)")
+
+    def submit(self, kind: str, params: Optional[Dict] = None, priority: int = PRIORITY_NORMAL,
+               threads: Optional[int] = None) -> str:
+        """Encola un trabajo y devuelve su id"""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind} (usa {', '.join(JOB_KINDS)})")
+        budget = max(1, min(threads or self.job_threads, os.cpu_count() or 1))
+        job = RenderJob(kind, dict(params or {}), priority, budget)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("La render farm está detenida")
+            self._prune()
+            job.seq = next(self._seq)
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (priority, job.seq, job.id))
+            self._cond.notify()
+        logger.info(f"🎬 Render {job.id} encolado: {kind} (prioridad {priority}, {budget} hilos)")
+        return job.id
+
+    def status(self, job_id: str) -> Dict:
+        return self._job(job_id).to_dict()
+
+    def jobs(self) -> List[Dict]:
+        with self._cond:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancela un trabajo. Si está en cola no llega a ejecutarse; si está
+        en marcha se aborta en su siguiente aviso de progreso. Devuelve
+        False si ya había terminado.
+        """
+        job = self._job(job_id)
+        with self._cond:
+            if job.status == RenderStatus.QUEUED:
+                self._complete(job, RenderStatus.CANCELLED, error="cancelado")
+                return True
+            if job.status == RenderStatus.RUNNING:
+                self._cancelled[job_id] = True
+                return True
+        return False
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Dict:
+        job = self._job(job_id)
+        job.done.wait(timeout)
+        return job.to_dict()
+
+    def result(self, job_id: str, timeout: Optional[float] = None):
+        """Espera el trabajo y devuelve su resultado; lanza RenderJobError si falló o se canceló"""
+        job = self.wait(job_id, timeout)
+        if job["status"] == RenderStatus.DONE.value:
+            return job["result"]
+        if job["status"] in (RenderStatus.QUEUED.value, RenderStatus.RUNNING.value):
+            raise TimeoutError(f"El render {job_id} sigue en {job['status']}")
+        raise RenderJobError(f"El render {job_id} terminó en {job['status']}: {job['error']}", job)
+
+    def metrics(self) -> Dict:
+        with self._cond:
+            by_status = {status.value: 0 for status in RenderStatus}
+            for job in self._jobs.values():
+                by_status[job.status.value] += 1
+        return {"workers": self.max_workers, "job_threads": self.job_threads, "jobs": by_status}
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = True):
+        with self._cond:
+            self._stopping = True
+            if cancel_pending:
+                for job in self._jobs.values():
+                    if job.status == RenderStatus.QUEUED:
+                        self._complete(job, RenderStatus.CANCELLED, error="cancelado")
+            self._cond.notify_all()
+        self._pool.shutdown(wait=wait)
+        self._progress.put(None)
+        self._manager.shutdown()
+
+    # --- Internos ---
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._ctx,
+                                   initializer=_init_worker, initargs=(self._progress, self._cancelled))
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        """Sustituye un pool roto; varios trabajos pueden avisar del mismo pool, solo el primero lo cambia"""
+        with self._cond:
+            if self._pool is not broken or self._stopping:
+                return
+            self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("⚠️ Un worker de la render farm murió: pool reconstruido")
+
+    def _job(self, job_id: str) -> RenderJob:
+        try:
+            return self._jobs[job_id]
+        except KeyError:
+            raise KeyError(f"Render desconocido: {job_id}") from None
+
+    def _complete(self, job: RenderJob, status: RenderStatus, result=None, error: Optional[str] = None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        self._finished.append(job.id)
+        job.done.set()
+
+    def _requeue(self, job: RenderJob):
+        """Devuelve a la cola un trabajo en curso, en su posición original"""
+        job.status = RenderStatus.QUEUED
+        job.progress = 0.0
+        job.started_at = None
+        heapq.heappush(self._heap, (job.priority, job.seq, job.id))
+        self._cond.notify()
+
+    def _prune(self):
+        """Olvida los trabajos terminados más antiguos (con self._cond adquirido)"""
+        horizon = time.time() - RENDER_FARM_RETENTION
+        while self._finished:
+            job = self._jobs.get(self._finished[0])
+            if job is not None and len(self._finished) <= RENDER_FARM_MAX_FINISHED and job.finished_at > horizon:
+                break
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def _next_job(self) -> Optional[RenderJob]:
+        with self._cond:
+            while True:
+                while self._heap:
+                    _, _, job_id = heapq.heappop(self._heap)
+                    job = self._jobs.get(job_id)
+                    if job is not None and job.status == RenderStatus.QUEUED:
+                        job.status = RenderStatus.RUNNING
+                        job.started_at = time.time()
+                        return job
+                if self._stopping:
+                    return None
+                self._cond.wait()
+
+    def _dispatch_loop(self):
+        while True:
+            self._slots.acquire()
+            job = self._next_job()
+            if job is None:
+                return
+            pool = self._pool
+            try:
+                future = pool.submit(_run_job, job.id, job.kind, job.params, job.threads)
+            except RuntimeError as e:  # pool roto (BrokenProcessPool) o cerrado
+                if isinstance(e, BrokenProcessPool) and not self._stopping:
+                    # Un worker murió antes de que el dispatcher se enterase: el trabajo no llegó a salir
+                    self._replace_pool(pool)
+                    with self._cond:
+                        self._requeue(job)
+                    self._slots.release()
+                    continue
+                with self._cond:
+                    self._complete(job, RenderStatus.FAILED, error=str(e))
+                self._slots.release()
+                return
+            future.add_done_callback(lambda f, job=job, pool=pool: self._on_done(job, pool, f))
+
+    def _on_done(self, job: RenderJob, pool: ProcessPoolExecutor, future):
+        try:
+            result = future.result()
+        except RenderCancelled:
+            status, result, error = RenderStatus.CANCELLED, None, "cancelado"
+        except BrokenProcessPool as e:
+            # Se cae todo el pool: no se sabe qué trabajo mató al worker, así que
+            # cada trabajo en curso suma una caída y vuelve a la cola
+            self._replace_pool(pool)
+            job.crashes += 1
+            if job.id in self._cancelled:
+                status, result, error = RenderStatus.CANCELLED, None, "cancelado"
+            elif job.crashes < RENDER_JOB_MAX_CRASHES and not self._stopping:
+                with self._cond:
+                    self._requeue(job)
+                self._slots.release()
+                logger.warning(f"⚠️ Render {job.id} ({job.kind}) vuelve a la cola tras la caída de su worker")
+                return
+            else:
+                status, result, error = RenderStatus.FAILED, None, f"worker caído {job.crashes} veces: {e}"
+        except Exception as e:
+            status, result, error = RenderStatus.FAILED, None, f"{type(e).__name__}: {e}"
+        else:
+            status, error = RenderStatus.DONE, None
+        with self._cond:
+            self._complete(job, status, result, error)
+        self._cancelled.pop(job.id, None)
+        self._slots.release()
+        elapsed = job.finished_at - (job.started_at or job.finished_at)
+        log = logger.error if status == RenderStatus.FAILED else logger.info
+        log(f"Render {job.id} ({job.kind}) {status.value} en {elapsed:.1f}s" + (f": {error}" if error else ""))
+
+    def _progress_loop(self):
+        while True:
+            message = self._progress.get()
+            if message is None:
+                return
+            job_id, payload = message
+            job = self._jobs.get(job_id)
+            if isinstance(payload, dict):  # Evento render_profile de un worker
+                profiling.observe(payload)
+                if job is not None:
+                    job.profiles.append(payload)
+            elif job is not None and job.status == RenderStatus.RUNNING:
+                job.progress = max(job.progress, payload)
+
+
+_farm: Optional[RenderFarm] = None
+_farm_lock = threading.Lock()
+
+
+def get_render_farm() -> RenderFarm:
+    """Render farm del proceso: se crea en el primer uso."""
+    global _farm
+    if _farm is None:
+        with _farm_lock:
+            if _farm is None:
+                _farm = RenderFarm()
+    return _farm
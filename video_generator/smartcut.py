@@ -0,0 +1,191 @@
+"""
+✂️ SMART CUT - RECORTES SIN RE-ENCODE COMPLETO
+Recorta copiando el stream (sin decodificar) y, en modo exacto, solo
+re-codifica el tramo entre el punto de corte y el siguiente keyframe.
+"""
+import logging
+import os
+import re
+import subprocess
+import tempfile
+from fractions import Fraction
+from typing import Dict, List, Optional
+
+from moviepy.config import get_setting
+
+logger = logging.getLogger(__name__)
+
+KEYFRAME_WINDOW = 10.0  # Segundos alrededor del corte en los que buscar keyframes
+SMART_CUT_CODECS = ("h264",)
+HEAD_PRESET = "veryfast"
+HEAD_CRF = 18  # El tramo re-codificado es corto: calidad alta para que no se note
+
+_STREAM = re.compile(r"Stream #\d+:\d+.*?: Video: (\w+).*?, (\w+)(?:\(|,)")
+_FPS = re.compile(r"Stream #\d+:\d+.*?: Video: .*?([\d.]+) fps")
+_PTS_TIME = re.compile(r"pts_time:\s*([\d.]+).*?iskey:1")
+_CRC_TB = re.compile(r"^#tb 0: (\d+)/(\d+)", re.M)
+_CRC_PACKET = re.compile(r"^0,\s*(-?\d+),\s*(-?\d+),", re.M)
+
+
+def _ffmpeg(args: List[str]) -> subprocess.CompletedProcess:
+    cmd = [get_setting("FFMPEG_BINARY"), "-hide_banner", "-y"] + args
+    return subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False)
+
+
+def _check(proc: subprocess.CompletedProcess, output_path: str):
+    if proc.returncode != 0:
+        raise IOError(f"ffmpeg falló generando {output_path}: {proc.stderr.decode(errors='replace').strip()[-2000:]}")
+
+
+def probe_keyframes(path: str, start: float, end: float) -> Dict:
+    """
+    Códec, pix_fmt, fps y keyframes entre start y end. Solo se
+    decodifican los keyframes (-skip_frame nokey) de esa ventana.
+    La duración se limita en la entrada: como -t de salida depende de los
+    frames descartados, a veces perdía el último keyframe de la ventana.
+    """
+    proc = _ffmpeg(["-ss", str(max(start, 0.0)), "-t", str(max(end - start, 0.001)), "-copyts",
+                    "-skip_frame", "nokey", "-i", path,
+                    "-map", "0:v:0", "-an", "-vf", "showinfo", "-f", "null", "-"])
+    stderr = proc.stderr.decode(errors="replace")
+    _check(proc, path)
+    stream = _STREAM.search(stderr)
+    fps = _FPS.search(stderr)
+    return {
+        "codec": stream.group(1) if stream else None,
+        "pix_fmt": stream.group(2) if stream else None,
+        "fps": str(Fraction(fps.group(1)).limit_denominator(1001)) if fps else None,
+        "keyframes": sorted(float(t) for t in _PTS_TIME.findall(stderr)),
+    }
+
+
+def reorder_delay(path: str) -> Fraction:
+    """
+    Segundos entre el PTS y el DTS del primer paquete de video: el retardo
+    de reordenación que introducen los B-frames (0 si no los hay).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        crc = os.path.join(tmp, "packets.crc")
+        _check(_ffmpeg(["-i", path, "-map", "0:v:0", "-c", "copy", "-frames:v", "1", "-f", "framecrc", crc]), path)
+        with open(crc) as f:
+            text = f.read()
+    tb, packet = _CRC_TB.search(text), _CRC_PACKET.search(text)
+    if not tb or not packet:
+        return Fraction(0)
+    dts, pts = int(packet.group(1)), int(packet.group(2))
+    return max(pts - dts, 0) * Fraction(int(tb.group(1)), int(tb.group(2)))
+
+
+def probe_source(path: str, duration: float) -> Dict:
+    """
+    probe_keyframes de todo el video más su reorder_delay: lo que necesita
+    smart_cut, calculado una vez para hacer varios cortes del mismo archivo.
+    """
+    info = probe_keyframes(path, 0.0, duration)
+    info["delay"] = reorder_delay(path)
+    return info
+
+
+def fast_cut(input_path: str, start: float, end: float, output_path: str) -> str:
+    """Copia de streams desde el keyframe anterior a start: instantáneo, pero el inicio no es exacto"""
+    proc = _ffmpeg(["-ss", str(start), "-i", input_path, "-t", str(end - start),
+                    "-map", "0:v:0", "-map", "0:a:0?", "-c", "copy",
+                    "-avoid_negative_ts", "make_zero", "-movflags", "+faststart", output_path])
+    _check(proc, output_path)
+    return output_path
+
+
+def reencode_cut(input_path: str, start: float, end: float, output_path: str) -> str:
+    """Corte exacto re-codificando todo el segmento (fallback para códecs sin smart cut)"""
+    proc = _ffmpeg(["-ss", str(start), "-i", input_path, "-t", str(end - start),
+                    "-map", "0:v:0", "-map", "0:a:0?", "-c:v", "libx264", "-preset", HEAD_PRESET,
+                    "-crf", str(HEAD_CRF), "-pix_fmt", "yuv420p", "-c:a", "aac",
+                    "-movflags", "+faststart", output_path])
+    _check(proc, output_path)
+    return output_path
+
+
+def _reencode_part(input_path: str, at: float, frames: int, pix_fmt: str, delay: Fraction, output_path: str) -> str:
+    """
+    Re-codifica `frames` frames desde `at`, sin B-frames (DTS == PTS). Los DTS
+    se retrasan `delay` segundos, lo mismo que los del tramo copiado, para que
+    sigan siendo crecientes al unir las partes.
+    """
+    _check(_ffmpeg(["-ss", f"{at:.6f}", "-i", input_path, "-map", "0:v:0", "-an", "-frames:v", str(frames),
+                    "-c:v", "libx264", "-preset", HEAD_PRESET, "-crf", str(HEAD_CRF), "-bf", "0",
+                    "-pix_fmt", pix_fmt or "yuv420p",
+                    "-bsf:v", f"setts=dts=DTS-round({float(delay):.6f}/TB)", output_path]), output_path)
+    return output_path
+
+
+def smart_cut(input_path: str, start: float, end: float, output_path: str, source: Optional[Dict] = None) -> str:
+    """
+    Corte exacto: copia los GOPs completos entre el primer keyframe >= start y
+    el último keyframe <= end, y re-codifica solo los dos extremos. Cada tramo
+    se escribe como MP4 (conserva PTS/DTS, también con B-frames) y se unen con
+    el demuxer concat. El audio se copia desde start: queda alineado con
+    precisión de un frame de audio (~21 ms en AAC).
+    Asume frame rate constante y GOPs cerrados, como los videos que genera VideoGenerator.
+    `source` es el resultado de probe_source; sin él se inspeccionan solo las
+    ventanas alrededor de los puntos de corte.
+    """
+    info = source or probe_keyframes(input_path, start, min(end, start + KEYFRAME_WINDOW))
+    if info["codec"] not in SMART_CUT_CODECS or not info["fps"]:
+        logger.info(f"Smart cut no disponible para '{info['codec']}', re-codificando el segmento")
+        return reencode_cut(input_path, start, end, output_path)
+
+    frame_tolerance = 0.001
+    keyframes = info["keyframes"]
+    if source is None and end - start > KEYFRAME_WINDOW:
+        keyframes = keyframes + probe_keyframes(input_path, end - KEYFRAME_WINDOW, end)["keyframes"]
+    first = next((k for k in keyframes if k >= start - frame_tolerance), None)
+    last = max((k for k in keyframes if k <= end + frame_tolerance), default=None)
+    if first is None or last is None or last <= first:
+        # El segmento no contiene ningún GOP completo: re-codificarlo es igual de rápido
+        return reencode_cut(input_path, start, end, output_path)
+
+    frame = 1 / Fraction(info["fps"])
+    head_frames = round((first - start) / frame)
+    copy_frames = round((last - first) / frame)
+    tail_frames = round((end - start) / frame) - head_frames - copy_frames
+    with tempfile.TemporaryDirectory() as tmp:
+        middle = os.path.join(tmp, "middle.mp4")
+        # Un milisegundo después del keyframe: la búsqueda cae exactamente en él. Con
+        # GOPs cerrados, los primeros copy_frames paquetes son justo los frames de [first, last)
+        _check(_ffmpeg(["-ss", f"{first + frame_tolerance:.6f}", "-i", input_path, "-map", "0:v:0", "-an",
+                        "-frames:v", str(copy_frames), "-c", "copy", "-avoid_negative_ts", "make_zero",
+                        middle]), middle)
+        delay = source["delay"] if source else reorder_delay(middle)
+        parts = []
+        if head_frames > 0:
+            parts.append((_reencode_part(input_path, start, head_frames, info["pix_fmt"], delay,
+                                         os.path.join(tmp, "head.mp4")), head_frames))
+        parts.append((middle, copy_frames))
+        if tail_frames > 0:
+            parts.append((_reencode_part(input_path, last - frame_tolerance, tail_frames, info["pix_fmt"], delay,
+                                         os.path.join(tmp, "tail.mp4")), tail_frames))
+
+        # Cada parte declara su duración exacta en frames: el concat desplaza
+        # los timestamps originales de la siguiente en esa cantidad
+        listing = os.path.join(tmp, "parts.txt")
+        with open(listing, "w") as f:
+            for path, frames in parts:
+                f.write(f"file '{path}'\nduration {float(frames * frame):.6f}\n")
+        _check(_ffmpeg(["-f", "concat", "-safe", "0", "-i", listing,
+                        "-ss", str(start), "-t", f"{end - start:.6f}", "-i", input_path,
+                        "-map", "0:v:0", "-map", "1:a:0?", "-c", "copy",
+                        "-movflags", "+faststart", output_path]), output_path)
+    return output_path
+
+
+def cut(input_path: str, start: float, end: float, output_path: str, exact: bool = True,
+        source: Optional[Dict] = None) -> str:
+    """
+    Recorta [start, end) con smart cut (exact=True) o copia desde keyframe
+    (exact=False). `source` (probe_source) evita volver a inspeccionar el video.
+    """
+    if end <= start:
+        raise ValueError(f"Segmento vacío: start={start} end={end}")
+    if exact:
+        return smart_cut(input_path, start, end, output_path, source)
+    return fast_cut(input_path, start, end, output_path)
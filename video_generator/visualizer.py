@@ -0,0 +1,196 @@
+"""
+🎚️ AUDIO VISUALIZER - VISUALIZADOR DE AUDIO BASADO EN FFT
+Decodifica el audio una sola vez, calcula la STFT de todos los frames por
+adelantado y dibuja cada frame con operaciones vectorizadas de NumPy sobre
+un buffer preasignado.
+"""
+import logging
+import subprocess
+from typing import Optional, Tuple
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.editor import VideoClip
+
+logger = logging.getLogger(__name__)
+
+STYLES = ("waveform", "bars", "circular")
+SAMPLE_RATE = 22050
+N_FFT = 2048
+N_BARS = 64
+MIN_FREQ = 40.0
+DB_RANGE = 60.0
+DECAY = 0.85  # Caída por frame de las barras (las subidas son instantáneas)
+BAR_COLOR = (255, 255, 255)
+
+
+def load_mono(audio_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decodifica el audio completo a un array float32 mono en [-1, 1] con una sola pasada de ffmpeg"""
+    cmd = [get_setting("FFMPEG_BINARY"), "-v", "error", "-i", audio_path,
+           "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(sample_rate), "-"]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if proc.returncode != 0:
+        raise IOError(f"No se pudo decodificar {audio_path}: {proc.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def frame_windows(samples: np.ndarray, n_frames: int, hop: float, size: int) -> np.ndarray:
+    """Vista (n_frames, size) de ventanas centradas en cada frame de video, sin copiar el audio"""
+    padded = np.pad(samples, (size // 2, size))
+    starts = np.minimum((np.arange(n_frames) * hop).astype(np.int64), len(padded) - size)
+    return np.lib.stride_tricks.sliding_window_view(padded, size)[starts]
+
+
+def spectrum_bands(samples: np.ndarray, n_frames: int, hop: float, sample_rate: int = SAMPLE_RATE,
+                   n_fft: int = N_FFT, n_bars: int = N_BARS) -> np.ndarray:
+    """
+    STFT por lotes de todos los frames y agrupación en bandas logarítmicas.
+    Devuelve (n_frames, n_bars) en [0, 1].
+    """
+    windows = frame_windows(samples, n_frames, hop, n_fft) * np.hanning(n_fft).astype(np.float32)
+    magnitudes = np.abs(np.fft.rfft(windows, axis=1)).astype(np.float32)
+
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    edges = np.geomspace(MIN_FREQ, sample_rate / 2, n_bars + 1)
+    # Cada banda tiene al menos un bin, aunque en graves sean más estrechas que la resolución
+    idx = np.maximum.accumulate(np.maximum(np.searchsorted(freqs, edges[:-1]), np.arange(n_bars) + 1))
+    idx = np.minimum(idx, magnitudes.shape[1] - 1)
+    counts = np.diff(np.append(idx, magnitudes.shape[1])).clip(min=1)
+    bands = np.add.reduceat(magnitudes, idx, axis=1) / counts
+
+    db = 20 * np.log10(bands + 1e-9)
+    levels = np.clip((db - (db.max() - DB_RANGE)) / DB_RANGE, 0.0, 1.0)
+    for i in range(1, n_frames):
+        levels[i] = np.maximum(levels[i], levels[i - 1] * DECAY)
+    return levels
+
+
+class AudioAnalysis:
+    """
+    Audio decodificado y espectro por frame de video. No depende del tamaño
+    del video, así que se comparte entre variantes (9:16, 1:1, 16:9...).
+    """
+
+    def __init__(self, audio_path: str, fps: int = 24):
+        self.audio_path = audio_path
+        self.fps = fps
+        self.samples = load_mono(audio_path)
+        self.duration = len(self.samples) / SAMPLE_RATE
+        self.n_frames = max(1, int(np.ceil(self.duration * fps)))
+        self.hop = SAMPLE_RATE / fps
+        self._levels = {}
+
+    def levels(self, n_bars: int = N_BARS) -> np.ndarray:
+        if n_bars not in self._levels:
+            self._levels[n_bars] = spectrum_bands(self.samples, self.n_frames, self.hop, n_bars=n_bars)
+        return self._levels[n_bars]
+
+
+class AudioVisualizer:
+    """Visualizador de audio con estilos waveform, bars y circular"""
+
+    def __init__(self, audio, w: int, h: int, style: str = "waveform", fps: int = 24,
+                 background: Optional[np.ndarray] = None, color: Tuple[int, int, int] = BAR_COLOR,
+                 n_bars: int = N_BARS):
+        """`audio` es una ruta o un AudioAnalysis ya calculado (con el mismo fps)"""
+        if style not in STYLES:
+            raise ValueError(f"Estilo de visualizador desconocido: {style} (usa {', '.join(STYLES)})")
+        self.w, self.h, self.style, self.fps = w, h, style, fps
+        self.color = np.asarray(color, dtype=np.uint8)
+        self.n_bars = n_bars
+
+        analysis = audio if isinstance(audio, AudioAnalysis) else AudioAnalysis(audio, fps)
+        self.samples = analysis.samples
+        self.duration = analysis.duration
+        self.n_frames = analysis.n_frames
+        self.hop = analysis.hop
+
+        self.background = background if background is not None else np.zeros((h, w, 3), np.uint8)
+        self._buffer = np.empty((h, w, 3), dtype=np.uint8)
+
+        if style == "waveform":
+            self._setup_waveform()
+        elif style == "bars":
+            self.levels = analysis.levels(n_bars)
+            self._setup_bars()
+        else:
+            self.levels = analysis.levels(n_bars)
+            self._setup_circular()
+        logger.info(f"🎚️ Visualizador '{style}' listo: {self.n_frames} frames, {self.duration:.1f}s")
+
+    # --- Precálculo por estilo (una vez) ---
+
+    def _setup_waveform(self):
+        self.region = (int(self.h * 0.35), int(self.h * 0.65))
+        height = self.region[1] - self.region[0]
+        # Ventana de un frame de audio repartida entre las columnas de la imagen
+        self.wave_size = int(np.ceil(self.hop / self.w)) * self.w
+        self.rows = np.arange(height, dtype=np.float32)[:, None] - height / 2
+
+    def _setup_bars(self):
+        self.region = (int(self.h * 0.55), int(self.h * 0.85))
+        height = self.region[1] - self.region[0]
+        margin = int(self.w * 0.05)
+        width = self.w - 2 * margin
+        columns = np.arange(self.w) - margin
+        self.bar_of_column = np.clip(columns * self.n_bars // width, 0, self.n_bars - 1)
+        slot = width / self.n_bars
+        inside = (columns >= 0) & (columns < width) & ((columns % slot) < slot * 0.75)
+        self.column_mask = inside[None, :]
+        # Altura en píxeles desde abajo de cada fila de la región
+        self.rows = (height - np.arange(height, dtype=np.float32))[:, None]
+        self.bar_height = float(height)
+
+    def _setup_circular(self):
+        size = min(self.w, self.h) - int(min(self.w, self.h) * 0.1)
+        top = (self.h - size) // 2
+        left = (self.w - size) // 2
+        self.region = (top, top + size)
+        self.columns = (left, left + size)
+        ys, xs = np.mgrid[0:size, 0:size].astype(np.float32) - size / 2
+        self.radius = np.hypot(xs, ys)
+        angle = (np.arctan2(ys, xs) + np.pi) / (2 * np.pi)
+        position = angle * self.n_bars
+        self.bar_of_pixel = np.minimum(position.astype(np.int64), self.n_bars - 1)
+        self.pixel_mask = (position % 1.0) < 0.7
+        self.inner_radius = size * 0.2
+        self.bar_height = size / 2 - self.inner_radius
+
+    # --- Dibujo por frame ---
+
+    def _frame_index(self, t: float) -> int:
+        return min(int(t * self.fps), self.n_frames - 1)
+
+    def _draw_waveform(self, i: int, region: np.ndarray):
+        start = int(i * self.hop)
+        chunk = self.samples[start:start + self.wave_size]
+        if len(chunk) < self.wave_size:
+            chunk = np.pad(chunk, (0, self.wave_size - len(chunk)))
+        columns = chunk.reshape(self.w, -1)
+        half = region.shape[0] / 2
+        top = -columns.max(axis=1) * half
+        bottom = -columns.min(axis=1) * half
+        mask = (self.rows >= np.minimum(top, -1)[None, :]) & (self.rows <= np.maximum(bottom, 1)[None, :])
+        region[mask] = self.color
+
+    def _draw_bars(self, i: int, region: np.ndarray):
+        heights = self.levels[i][self.bar_of_column] * self.bar_height
+        mask = (self.rows <= heights[None, :]) & self.column_mask
+        region[mask] = self.color
+
+    def _draw_circular(self, i: int, region: np.ndarray):
+        outer = self.inner_radius + self.levels[i][self.bar_of_pixel] * self.bar_height
+        mask = (self.radius >= self.inner_radius) & (self.radius <= outer) & self.pixel_mask
+        region[:, self.columns[0]:self.columns[1]][mask] = self.color
+
+    def make_frame(self, t: float) -> np.ndarray:
+        """Frame en t; reutiliza el mismo buffer, así que el consumidor debe copiarlo si lo guarda"""
+        i = self._frame_index(t)
+        frame = self._buffer
+        np.copyto(frame, self.background)
+        region = frame[self.region[0]:self.region[1]]
+        getattr(self, f"_draw_{self.style}")(i, region)
+        return frame
+
+    def clip(self, duration: Optional[float] = None) -> VideoClip:
+        return VideoClip(self.make_frame, duration=duration or self.duration)